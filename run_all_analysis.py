@@ -156,6 +156,7 @@ def main():
         
         # 5. 比較分析（基本分析とデータ変換に依存）
         ("src/analysis/compare_voting_methods.py", "投票方法の比較"),
+        ("src/analysis/voting_method_engine.py", "投票方式エンジンによる一括比較"),
         
         # 6. 感度分析（他の分析結果を利用する可能性があるため後半に配置）
         ("src/analysis/sensitivity_analysis.py", "感度分析"),
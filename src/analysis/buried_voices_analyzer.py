@@ -19,10 +19,208 @@ warnings.filterwarnings("ignore", category=UserWarning, module="matplotlib")
 
 # ルートディレクトリへのパスを取得
 ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.append(ROOT_DIR)
 
-def analyze_buried_voices(votes_file='votes.csv', candidates_file='candidates.csv', threshold=4):
+from src.utils.ballot_matrix import to_ballot_matrix
+from src.utils.preference_inference import infer_preferences
+
+# 閾値比較で使用する閾値（QVの投票値 1〜9）
+ALL_THRESHOLDS = list(range(1, 10))
+
+def compute_threshold_table(ballots, thresholds=ALL_THRESHOLDS):
     """
-    埋もれた声（最大選好以外の投票が一人一票方式では反映されない票）を分析する
+    投票行列から、複数の閾値での埋もれた声を一括で計算する
+
+    各投票者の最大投票先（argmax）と、候補者×投票値のヒストグラムの累積和を用いるため、
+    閾値の数によらず O(投票者数 × 候補者数) の計算で全閾値の結果が得られる
+    
+    Parameters:
+    -----------
+    ballots : numpy.ndarray
+        投票者×候補者の投票行列
+    thresholds : list of int
+        計算する閾値のリスト（1以上の整数）
+    
+    Returns:
+    --------
+    dict
+        'thresholds' : 閾値の配列 (T,)
+        'votes_count' : 閾値以上の票数 (T, 候補者数)
+        'max_votes' : 最大投票先となった投票者数 (候補者数,)
+        'buried_voices' : 閾値以上かつ最大投票先ではない票数 (T, 候補者数)
+    """
+    ballots = np.asarray(ballots, dtype=int)
+    thresholds = np.asarray(list(thresholds), dtype=int)
+    if np.any(thresholds < 1):
+        raise ValueError(f"閾値は1以上の整数で指定してください: {thresholds.tolist()}")
+    
+    num_voters, num_candidates = ballots.shape
+    
+    # 各投票者の最大投票先（同点の場合は最初の候補、正の投票がない投票者は対象外）
+    max_candidate = ballots.argmax(axis=1) if num_candidates > 0 else np.zeros(num_voters, dtype=int)
+    has_max = ballots.max(axis=1, initial=0) > 0
+    max_votes = np.bincount(max_candidate[has_max], minlength=num_candidates)
+    
+    # 候補者×投票値のヒストグラム（負の票は閾値判定に影響しないため0として扱う）
+    num_values = max(int(ballots.max(initial=0)), int(thresholds.max(initial=0))) + 1
+    values = np.clip(ballots, 0, None)
+    flat_index = np.arange(num_candidates) * num_values + values
+    histogram = np.bincount(flat_index.ravel(), minlength=num_candidates * num_values)
+    histogram = histogram.reshape(num_candidates, num_values)
+    
+    # 最大投票先に入った票だけのヒストグラム
+    max_index = flat_index[np.arange(num_voters), max_candidate][has_max]
+    max_histogram = np.bincount(max_index, minlength=num_candidates * num_values)
+    max_histogram = max_histogram.reshape(num_candidates, num_values)
+    
+    # 投票値の降順に累積し、「閾値以上」の件数表に変換
+    votes_at_or_above = np.cumsum(histogram[:, ::-1], axis=1)[:, ::-1]
+    max_at_or_above = np.cumsum(max_histogram[:, ::-1], axis=1)[:, ::-1]
+    
+    votes_count = votes_at_or_above[:, thresholds].T
+    buried_voices = votes_count - max_at_or_above[:, thresholds].T
+    
+    return {
+        'thresholds': thresholds,
+        'votes_count': votes_count,
+        'max_votes': max_votes,
+        'buried_voices': buried_voices
+    }
+
+def compute_transfer_matrix(ballots, thresholds=ALL_THRESHOLDS):
+    """
+    埋もれた声が一人一票方式ではどの候補に投じられるか（候補者×候補者の移転行列）を一括で計算する
+
+    transfers[t, i, j] は、候補者 j に閾値 thresholds[t] 以上の票を投じたが j が最大投票先ではなく、
+    最大投票先が候補者 i だった投票者の数。最大投票先の判定は compute_threshold_table() と同じで、
+    i について合計すると compute_threshold_table() の buried_voices と一致する。
+    (最大投票先, 投票先, 投票値) の組のヒストグラムを投票値の降順に累積するため、
+    閾値の数によらず、計算量は最大投票先以外への正の票の数に比例する
+
+    Parameters:
+    -----------
+    ballots : numpy.ndarray
+        投票者×候補者の投票行列
+    thresholds : list of int
+        計算する閾値のリスト（1以上の整数）
+
+    Returns:
+    --------
+    dict
+        'thresholds' : 閾値の配列 (T,)
+        'transfers' : 移転行列 (T, 最大投票先の候補者数, 埋もれた票の候補者数)
+    """
+    ballots = np.asarray(ballots, dtype=int)
+    thresholds = np.asarray(list(thresholds), dtype=int)
+    if np.any(thresholds < 1):
+        raise ValueError(f"閾値は1以上の整数で指定してください: {thresholds.tolist()}")
+
+    num_voters, num_candidates = ballots.shape
+
+    # 各投票者の最大投票先（同点の場合は最初の候補、正の投票がない投票者は対象外）
+    max_candidate = ballots.argmax(axis=1) if num_candidates > 0 else np.zeros(num_voters, dtype=int)
+    is_max = np.zeros(ballots.shape, dtype=bool)
+    is_max[np.arange(num_voters), max_candidate] = True
+
+    # 最大投票先以外への正の票だけを (最大投票先, 投票先, 投票値) のヒストグラムに集計
+    voter_index, candidate_index = np.nonzero((ballots > 0) & ~is_max)
+    num_values = max(int(ballots.max(initial=0)), int(thresholds.max(initial=0))) + 1
+    flat_index = (max_candidate[voter_index] * num_candidates + candidate_index) * num_values
+    flat_index = flat_index + ballots[voter_index, candidate_index]
+    histogram = np.bincount(flat_index, minlength=num_candidates * num_candidates * num_values)
+    histogram = histogram.reshape(num_candidates, num_candidates, num_values)
+
+    # 投票値の降順に累積し、「閾値以上」の件数に変換
+    at_or_above = np.cumsum(histogram[:, :, ::-1], axis=2)[:, :, ::-1]
+
+    return {
+        'thresholds': thresholds,
+        'transfers': np.moveaxis(at_or_above[:, :, thresholds], 2, 0)
+    }
+
+def transfer_matrix_table(transfer_results, candidates):
+    """
+    compute_transfer_matrix() の結果を長形式（閾値×埋もれた票の候補×最大投票先の1行ずつ）の表にする
+
+    フロー図（埋もれた票の候補 → 一人一票方式での投票先）の作成に使う
+    """
+    thresholds = transfer_results['thresholds']
+    transfers = transfer_results['transfers']
+    num_candidates = transfers.shape[1]
+    titles = candidates['title_en'].to_numpy() if 'title_en' in candidates.columns else candidates['title'].to_numpy()
+
+    # transfers[t, i, j] を (閾値, 埋もれた票の候補 j, 最大投票先 i) の順に並べる
+    threshold_grid, buried_grid, max_grid = np.meshgrid(
+        np.arange(len(thresholds)), np.arange(num_candidates), np.arange(num_candidates), indexing='ij'
+    )
+    return pd.DataFrame({
+        'threshold': thresholds[threshold_grid.ravel()],
+        'buried_candidate_id': buried_grid.ravel(),
+        'buried_title_en': titles[buried_grid.ravel()],
+        'max_candidate_id': max_grid.ravel(),
+        'max_title_en': titles[max_grid.ravel()],
+        'voters': transfers[threshold_grid.ravel(), max_grid.ravel(), buried_grid.ravel()]
+    })
+
+def compute_preference_buried_voices(ballots, credits=99, max_votes=9):
+    """
+    効用モデルから逆推定した選好の範囲（preference_inference）に基づいて埋もれた声を計算する
+
+    票数の同点や丸めにより最大選好の候補が一意に決まらない投票者を区別するため、
+    選好の範囲が他のどの候補の範囲よりも確実に下にある「確実に埋もれた票」と、
+    最大選好である可能性が否定できない票を除いた「埋もれた可能性のある票」を数える
+    
+    Parameters:
+    -----------
+    ballots : numpy.ndarray
+        投票者×候補者の投票行列
+    credits : int
+        1人あたりのクレジット
+    max_votes : int
+        1候補あたりの最大票数
+    
+    Returns:
+    --------
+    dict
+        'certainly_buried' : 正の票のうち、他の候補の選好の下限が自身の上限を上回る票数 (候補者数,)
+        'possibly_buried' : 正の票のうち、確実に最大選好とはいえない票数 (候補者数,)
+        'buried_intensity' : 最大投票先以外への選好（予算正規化）の合計 (候補者数,)
+        'top_intensity' : 最大投票先への選好（予算正規化）の合計 (候補者数,)
+    """
+    ballots = np.asarray(ballots, dtype=int)
+    num_voters, num_candidates = ballots.shape
+    inferred = infer_preferences(ballots, credits, max_votes)
+    lower, upper = inferred['lower'], inferred['upper']
+    rows = np.arange(num_voters)
+    
+    def max_of_others(values):
+        # 各候補について、自身を除いた他の候補の最大値（上位2つから求める）
+        order = np.argsort(-values, axis=1, kind='stable')
+        first = values[rows, order[:, 0]]
+        second = values[rows, order[:, 1]] if num_candidates > 1 else np.full(num_voters, -np.inf)
+        others = np.repeat(first[:, None], num_candidates, axis=1)
+        others[rows, order[:, 0]] = second
+        return others
+    
+    positive = ballots > 0
+    certainly_top = lower > max_of_others(upper)
+    possibly_top = upper >= max_of_others(lower)
+    
+    # compute_threshold_table() と同じ最大投票先（同点の場合は最初の候補）
+    is_max = np.zeros_like(positive)
+    is_max[rows, ballots.argmax(axis=1)] = True
+    normalized = np.clip(inferred['normalized'], 0, None)
+    
+    return {
+        'certainly_buried': (positive & ~possibly_top).sum(axis=0),
+        'possibly_buried': (positive & ~certainly_top).sum(axis=0),
+        'buried_intensity': np.where(positive & ~is_max, normalized, 0).sum(axis=0),
+        'top_intensity': np.where(positive & is_max, normalized, 0).sum(axis=0)
+    }
+
+def analyze_buried_voices_all_thresholds(votes_file='votes.csv', candidates_file='candidates.csv', thresholds=ALL_THRESHOLDS):
+    """
+    複数の閾値での埋もれた声を、データの読み込み1回・一括計算で分析する
     
     Parameters:
     -----------
@@ -30,13 +228,13 @@ def analyze_buried_voices(votes_file='votes.csv', candidates_file='candidates.cs
         投票データのファイルパス
     candidates_file : str
         候補者データのファイルパス
-    threshold : int
-        分析に含める最小投票値の閾値（デフォルト: 4 - 強い選好）
+    thresholds : list of int
+        分析する閾値のリスト（デフォルト: 1〜9）
     
     Returns:
     --------
     dict
-        分析結果を含む辞書
+        閾値をキーとし、analyze_buried_voices() と同じ形式の結果を値とする辞書
     """
     # データの読み込み
     votes = pd.read_csv(os.path.join(ROOT_DIR, 'data', votes_file))
@@ -45,66 +243,46 @@ def analyze_buried_voices(votes_file='votes.csv', candidates_file='candidates.cs
     # 候補者数を動的に取得
     num_candidates = len(candidates)
     
-    # 結果格納用の辞書を初期化
-    buried_voices = {i: 0 for i in range(num_candidates)}
-    votes_count = {i: 0 for i in range(num_candidates)}
-    max_votes_count = {i: 0 for i in range(num_candidates)}
+    # 全閾値の結果を一括計算
+    table = compute_threshold_table(to_ballot_matrix(votes, num_candidates), thresholds)
+    max_votes_count = {i: int(table['max_votes'][i]) for i in range(num_candidates)}
     
-    # 各投票者の最大投票ポイントを特定
-    for _, voter_row in votes.iterrows():
-        max_vote = 0
-        max_candidate = None
-        
-        # 各候補への投票を確認
-        for i in range(num_candidates):
-            col_name = f'candidate_{i}'
-            if col_name in voter_row and not pd.isna(voter_row[col_name]):
-                vote_value = voter_row[col_name]
-                
-                # 閾値以上の票を集計
-                if vote_value >= threshold:
-                    votes_count[i] += 1
-                
-                # 最大投票の更新
-                if vote_value > max_vote:
-                    max_vote = vote_value
-                    max_candidate = i
-        
-        # この投票者の最大投票を記録
-        if max_candidate is not None:
-            max_votes_count[max_candidate] += 1
-    
-    # 各候補に対する有効票で、最大投票ではないものを計算
-    for _, voter_row in votes.iterrows():
-        max_vote = 0
-        max_candidate = None
-        
-        # まず最大投票を特定
-        for i in range(num_candidates):
-            col_name = f'candidate_{i}'
-            if col_name in voter_row and not pd.isna(voter_row[col_name]):
-                vote_value = voter_row[col_name]
-                if vote_value > max_vote:
-                    max_vote = vote_value
-                    max_candidate = i
-        
-        # 埋もれた声を計算
-        for i in range(num_candidates):
-            col_name = f'candidate_{i}'
-            if col_name in voter_row and not pd.isna(voter_row[col_name]):
-                vote_value = voter_row[col_name]
-                if vote_value >= threshold and i != max_candidate:
-                    buried_voices[i] += 1
-    
-    # 結果を辞書にまとめる
-    results = {
-        'votes_count': votes_count,
-        'max_votes': max_votes_count,
-        'buried_voices': buried_voices
-    }
+    results = {}
+    for t_index, threshold in enumerate(table['thresholds']):
+        results[int(threshold)] = {
+            'votes_count': {i: int(table['votes_count'][t_index, i]) for i in range(num_candidates)},
+            'max_votes': dict(max_votes_count),
+            'buried_voices': {i: int(table['buried_voices'][t_index, i]) for i in range(num_candidates)}
+        }
     
     return results
 
+def analyze_buried_voices(votes_file='votes.csv', candidates_file='candidates.csv', threshold=4):
+    """
+    埋もれた声（最大選好以外の投票が一人一票方式では反映されない票）を分析する
+    
+    Parameters:
+    -----------
+    votes_file : str
+        投票データのファイルパス
+    candidates_file : str
+        候補者データのファイルパス
+    threshold : int
+        分析に含める最小投票値の閾値（デフォルト: 4 - 強い選好）
+    
+    Returns:
+    --------
+    dict
+        分析結果を含む辞書
+    """
+    results = analyze_buried_voices_all_thresholds(
+        votes_file=votes_file,
+        candidates_file=candidates_file,
+        thresholds=[threshold]
+    )
+    
+    return results[threshold]
+
 def analyze_specific_candidate(votes_file='votes.csv', candidate_id=0, threshold=4):
     """
     特定の候補に関する詳細分析を行う
@@ -301,7 +479,11 @@ def visualize_candidate_analysis(candidate_analysis, candidate_name, output_dir=
 
 def compare_thresholds(votes_file='votes.csv', candidates_file='candidates.csv', output_dir='buried_voices'):
     """
-    異なる閾値（1と4）での埋もれた声の分析結果を比較する
+    全閾値（1〜9）での埋もれた声を一括で計算し、閾値1と4の結果を比較する
+    
+    閾値1と4の比較グラフ（results/figures/<output_dir>）と比較表
+    （buried_voices_comparison.csv）に加えて、全閾値の結果を閾値表
+    （results/data/buried_voices_threshold_table.csv）として保存する
     
     Parameters:
     -----------
@@ -311,6 +493,12 @@ def compare_thresholds(votes_file='votes.csv', candidates_file='candidates.csv',
         候補者データのファイルパス
     output_dir : str
         出力先ディレクトリ
+    
+    Returns:
+    --------
+    dict
+        閾値（1〜9）をキーとする analyze_buried_voices() 形式の結果
+        （'buried_voices', 'votes_count', 'max_votes' など）
     """
     # 出力ディレクトリの作成
     output_path = os.path.join(ROOT_DIR, 'results', 'figures', output_dir)
@@ -319,16 +507,12 @@ def compare_thresholds(votes_file='votes.csv', candidates_file='candidates.csv',
     # 候補者データを読み込む
     candidates = pd.read_csv(os.path.join(ROOT_DIR, 'data', candidates_file))
     
-    # 異なる閾値で分析を実行
-    thresholds = [1, 4]
-    results = {}
-    
-    for threshold in thresholds:
-        results[threshold] = analyze_buried_voices(
-            votes_file=votes_file,
-            candidates_file=candidates_file,
-            threshold=threshold
-        )
+    # 全閾値（1〜9）の分析を一括で実行
+    results = analyze_buried_voices_all_thresholds(
+        votes_file=votes_file,
+        candidates_file=candidates_file,
+        thresholds=ALL_THRESHOLDS
+    )
     
     # 閾値による埋もれた声の比較グラフ
     plt.figure(figsize=(14, 8))
@@ -397,6 +581,22 @@ def compare_thresholds(votes_file='votes.csv', candidates_file='candidates.csv',
     data_dir = os.path.join(ROOT_DIR, 'results', 'data')
     os.makedirs(data_dir, exist_ok=True)
     results_df.to_csv(os.path.join(data_dir, 'buried_voices_comparison.csv'), index=False)
+    
+    # 全閾値の結果を閾値表として保存
+    table_rows = []
+    for threshold, threshold_results in results.items():
+        for i in range(len(candidates)):
+            table_rows.append({
+                'threshold': threshold,
+                'candidate_id': candidates.loc[i, 'candidate_id'],
+                'project_name': candidates.loc[i, 'title_en'],
+                'votes_count': threshold_results['votes_count'][i],
+                'max_votes': threshold_results['max_votes'][i],
+                'buried_voices': threshold_results['buried_voices'][i]
+            })
+    pd.DataFrame(table_rows).to_csv(os.path.join(data_dir, 'buried_voices_threshold_table.csv'), index=False)
+    
+    return results
 
 def main():
     """メイン関数"""
@@ -406,22 +606,14 @@ def main():
     # 異なる閾値で埋もれた声を分析・比較
     print("異なる閾値での埋もれた声の比較分析を実行しています...")
     
-    # 閾値の比較分析を実行
-    compare_thresholds(
+    # 閾値の比較分析を実行（全閾値の結果を一括で取得）
+    threshold_results = compare_thresholds(
         output_dir=output_dir
     )
     
-    # 閾値1での埋もれた声分析
-    print("\n閾値1での埋もれた声の分析を実行中...")
-    analysis_results_t1 = analyze_buried_voices(
-        threshold=1
-    )
-    
-    # 閾値4での埋もれた声分析
-    print("\n閾値4での埋もれた声の分析を実行中...")
-    analysis_results_t4 = analyze_buried_voices(
-        threshold=4
-    )
+    # 閾値1・閾値4での埋もれた声分析
+    analysis_results_t1 = threshold_results[1]
+    analysis_results_t4 = threshold_results[4]
     
     # 結果を表示
     print("\n=== 埋もれた声の分析結果 ===")
@@ -435,6 +627,32 @@ def main():
     for i in range(len(candidates)):
         print(f"{i}. {candidates.loc[i, 'title_en']}: {analysis_results_t4['buried_voices'][i]}票")
     
+    # 逆推定した選好の範囲に基づく埋もれた声
+    votes = pd.read_csv(os.path.join(ROOT_DIR, 'data', 'votes.csv'))
+    ballots = to_ballot_matrix(votes, len(candidates))
+    preference_results = compute_preference_buried_voices(ballots)
+    preference_df = pd.DataFrame({'candidate_id': range(len(candidates)), 'title_en': candidates['title_en']})
+    for name, values in preference_results.items():
+        preference_df[name] = values
+    
+    print("\n選好の逆推定に基づく埋もれた声（確実 / 可能性あり / 選好の強さの合計）:")
+    for _, row in preference_df.iterrows():
+        print(f"{row['candidate_id']}. {row['title_en']}: {row['certainly_buried']}票 / {row['possibly_buried']}票 / {row['buried_intensity']:.1f}")
+    
+    data_dir = os.path.join(ROOT_DIR, 'results', 'data')
+    os.makedirs(data_dir, exist_ok=True)
+    preference_df.to_csv(os.path.join(data_dir, 'buried_voices_preference.csv'), index=False)
+
+    # 埋もれた声の移転先（一人一票方式ではどの候補に投じられるか）
+    transfer_df = transfer_matrix_table(compute_transfer_matrix(ballots), candidates)
+
+    print("\n閾値4での埋もれた声の主な移転先（埋もれた票の候補 → 最大投票先）:")
+    top_transfers = transfer_df[(transfer_df['threshold'] == 4) & (transfer_df['voters'] > 0)]
+    for _, row in top_transfers.sort_values('voters', ascending=False).head(5).iterrows():
+        print(f"{row['buried_title_en']} → {row['max_title_en']}: {row['voters']}人")
+
+    transfer_df.to_csv(os.path.join(data_dir, 'buried_voices_transfers.csv'), index=False)
+
     # 結果を可視化
     visualize_buried_voices(
         analysis_results=analysis_results_t1,
@@ -3,6 +3,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
+import sys
 
 # Setting font to avoid font errors
 plt.rcParams['font.family'] = 'sans-serif'
@@ -12,6 +13,15 @@ plt.rcParams['font.sans-serif'] = ['Arial', 'DejaVu Sans', 'Liberation Sans', 'B
 import warnings
 warnings.filterwarnings("ignore", category=UserWarning, module="matplotlib")
 
+# Make the shared utilities importable when run as a script
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.append(ROOT_DIR)
+
+from src.utils.ballot_matrix import to_ballot_matrix
+
+# Strong preference threshold used for "buried voices"
+BURIED_VOICE_THRESHOLD = 4
+
 # Load data
 votes_df = pd.read_csv('data/votes.csv')
 candidates_df = pd.read_csv('data/candidates.csv')
@@ -22,97 +32,55 @@ if 'title_en' in candidates_df.columns:
     # Use English title when available
     candidates_df_en['title'] = candidates_df['title_en']
 
+# Evaluate all tie-handling policies for "buried voices" at once
+def calculate_buried_voices_policies(ballots, threshold=BURIED_VOICE_THRESHOLD):
+    """
+    Vectorised buried-voices kernel over a (voters x candidates) ballot matrix.
+
+    Returns per-candidate buried voices for each tie-handling policy:
+    - 'original': vote >= threshold and strictly below the voter's max vote
+    - 'simple': vote >= threshold and not the voter's first max candidate
+    - 'probabilistic': like 'simple', but a max vote tied between k candidates
+      counts as (1 - 1/k) buried voices for each of them
+    """
+    ballots = np.asarray(ballots)
+    num_candidates = ballots.shape[1]
+    
+    above = ballots >= threshold
+    row_max = ballots.max(axis=1, keepdims=True)
+    
+    # Max masks and the number of candidates sharing each voter's max
+    is_max = ballots == row_max
+    tie_counts = is_max.sum(axis=1, keepdims=True)
+    first_max = ballots.argmax(axis=1)[:, np.newaxis] == np.arange(num_candidates)
+    
+    original = (above & ~is_max).sum(axis=0)
+    simple = (above & ~first_max).sum(axis=0)
+    probabilistic = np.where(above, np.where(is_max, 1.0 - 1.0 / tie_counts, 1.0), 0.0).sum(axis=0)
+    
+    return {
+        'original': original,
+        'simple': simple,
+        'probabilistic': probabilistic
+    }
+
 # Calculate buried voices probabilistically
 def calculate_buried_voices_probabilistic():
-    # Identify maximum vote points for each voter
-    max_votes = {}
-    buried_voices = {i: 0 for i in range(len(candidates_df))}
+    ballots = to_ballot_matrix(votes_df, len(candidates_df))
+    probabilistic = calculate_buried_voices_policies(ballots)['probabilistic']
     
-    for _, voter_row in votes_df.iterrows():
-        voter_id = voter_row['voter_id']
-        
-        # Check votes for each candidate
-        vote_values = {}
-        for i in range(len(candidates_df)):
-            col_name = f'candidate_{i}'
-            if col_name in voter_row and not pd.isna(voter_row[col_name]):
-                vote_value = voter_row[col_name]
-                vote_values[i] = vote_value
-        
-        if not vote_values:
-            continue
-            
-        # Find the maximum vote value
-        max_vote_value = max(vote_values.values())
-        
-        # List candidates with maximum vote value
-        max_candidates = [cand for cand, value in vote_values.items() if value == max_vote_value]
-        
-        # Distribute maximum vote probabilistically (in case of ties)
-        probability_per_candidate = 1.0 / len(max_candidates)  # Distribute probability equally
-        
-        # Calculate "buried voices" - votes >= 4 and not the max vote candidate
-        for candidate, vote_value in vote_values.items():
-            if vote_value >= 4:
-                if candidate in max_candidates:
-                    # If max vote candidate, count (1-probability of being chosen) as buried voice
-                    buried_voices[candidate] += (1 - probability_per_candidate)
-                else:
-                    # If not max vote candidate, count 100% as buried voice
-                    buried_voices[candidate] += 1
-    
-    return buried_voices
+    return {i: probabilistic[i] for i in range(len(candidates_df))}
 
 # Compare different algorithms for calculating "buried voices"
 def compare_algorithms():
-    # Simple maximum vote method (only the first maximum found is considered)
-    simple_buried_voices = {i: 0 for i in range(len(candidates_df))}
-    
-    for _, voter_row in votes_df.iterrows():
-        max_vote = 0
-        max_candidate = None
-        
-        # Identify the maximum vote
-        for i in range(len(candidates_df)):
-            col_name = f'candidate_{i}'
-            if col_name in voter_row and not pd.isna(voter_row[col_name]):
-                vote_value = voter_row[col_name]
-                if vote_value > max_vote:
-                    max_vote = vote_value
-                    max_candidate = i
-        
-        # Calculate buried voices
-        for i in range(len(candidates_df)):
-            col_name = f'candidate_{i}'
-            if col_name in voter_row and not pd.isna(voter_row[col_name]):
-                vote_value = voter_row[col_name]
-                if vote_value >= 4 and i != max_candidate:
-                    simple_buried_voices[i] += 1
-    
-    # Probabilistic method
-    probabilistic_buried_voices = calculate_buried_voices_probabilistic()
-    
-    # Original implementation method (vote_value < max_vote)
-    original_buried_voices = {i: 0 for i in range(len(candidates_df))}
-    
-    for _, voter_row in votes_df.iterrows():
-        max_vote = 0
-        
-        # Identify the maximum vote value
-        for i in range(len(candidates_df)):
-            col_name = f'candidate_{i}'
-            if col_name in voter_row and not pd.isna(voter_row[col_name]):
-                vote_value = voter_row[col_name]
-                if vote_value > max_vote:
-                    max_vote = vote_value
-        
-        # Calculate buried voices (original method: vote_value >= 4 and vote_value < max_vote)
-        for i in range(len(candidates_df)):
-            col_name = f'candidate_{i}'
-            if col_name in voter_row and not pd.isna(voter_row[col_name]):
-                vote_value = voter_row[col_name]
-                if vote_value >= 4 and vote_value < max_vote:
-                    original_buried_voices[i] += 1
+    # Original (vote_value < max_vote), simple max (first maximum found) and
+    # probabilistic (tie-split) methods evaluated together on the ballot matrix
+    ballots = to_ballot_matrix(votes_df, len(candidates_df))
+    policy_results = calculate_buried_voices_policies(ballots)
+    
+    original_buried_voices = {i: policy_results['original'][i] for i in range(len(candidates_df))}
+    simple_buried_voices = {i: policy_results['simple'][i] for i in range(len(candidates_df))}
+    probabilistic_buried_voices = {i: policy_results['probabilistic'][i] for i in range(len(candidates_df))}
     
     # HTML/JS values
     html_buried = [21, 15, 14, 10, 9, 8, 7]
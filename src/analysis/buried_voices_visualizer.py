@@ -4,6 +4,13 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from matplotlib.colors import LinearSegmentedColormap
 import os
+import sys
+
+# ルートディレクトリへのパスを取得
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.append(ROOT_DIR)
+
+from src.utils.vote_histogram import VoteHistogram
 
 # データの読み込み
 votes_df = pd.read_csv('data/votes.csv')
@@ -81,16 +88,9 @@ def create_buried_voices_graph():
 
 # 投票強度のヒートマップを作成
 def create_preference_intensity_heatmap():
-    # 投票強度の分布を集計 (0-9の10段階)
-    intensity_matrix = np.zeros((len(candidates_df), 10))
-    
-    for _, voter_row in votes_df.iterrows():
-        for i in range(len(candidates_df)):
-            col_name = f'candidate_{i}'
-            if col_name in voter_row and not pd.isna(voter_row[col_name]):
-                vote_value = int(voter_row[col_name])
-                if 0 <= vote_value <= 9:  # 範囲チェック
-                    intensity_matrix[i, vote_value] += 1
+    # 投票強度の分布を集計 (0-9の10段階、候補者×投票値の度数表から)
+    vote_histogram = VoteHistogram.from_votes(votes_df, num_candidates=len(candidates_df))
+    intensity_matrix = vote_histogram.select(min_value=0, max_value=9).counts.astype(float)
     
     # 出力ディレクトリが存在しない場合は作成
     os.makedirs('results/figures/comparison', exist_ok=True)
@@ -2,7 +2,13 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import os
-from scipy import stats
+import sys
+
+# ルートディレクトリへのパスを取得
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.append(ROOT_DIR)
+
+from src.utils.vote_histogram import VoteHistogram
 
 # グラフのフォントエンコーディングを設定
 plt.rcParams['font.sans-serif'] = ['Arial', 'Helvetica', 'DejaVu Sans']
@@ -26,42 +32,29 @@ if use_english_titles:
     # 英語タイトルを使用
     vote_summary['title'] = vote_summary['title_en']
 
-# 候補者ごとの投票データを抽出
-vote_data = {}
-for i in range(len(candidates)):
-    col_name = f'candidate_{i}'
-    if col_name in votes.columns:
-        # 候補者名を取得（英語名を使用）
-        if use_english_titles:
-            cand_name = candidates.iloc[i]['title_en']
-        else:
-            cand_name = candidates.iloc[i]['title']
-        
-        # 投票データを取得
-        vote_data[cand_name] = votes[col_name].dropna().values
-
-# 基礎統計量を計算
-stats_data = []
-for project, data in vote_data.items():
-    # ゼロ票を除外したデータ（Quadratic Votingでは0票は投票していないと解釈）
-    non_zero_data = data[data > 0]
-    
-    stats_dict = {
-        'Project': project,
-        'Total Votes': sum(data),  # 合計票
-        'Mean': np.mean(non_zero_data) if len(non_zero_data) > 0 else 0,  # 平均（0票を除く）
-        'Median': np.median(non_zero_data) if len(non_zero_data) > 0 else 0,  # 中央値（0票を除く）
-        'Std Dev': np.std(non_zero_data) if len(non_zero_data) > 0 else 0,  # 標準偏差（0票を除く）
-        'Min': np.min(non_zero_data) if len(non_zero_data) > 0 else 0,  # 最小値（0票を除く）
-        'Max': np.max(data),  # 最大値
-        'Voters': len(non_zero_data),  # 投票者数（0票を除く）
-        'Mode': stats.mode(non_zero_data)[0] if len(non_zero_data) > 0 else 0,  # 最頻値（0票を除く）
-        'Zero Votes': np.sum(data == 0),  # 0票の数
-    }
-    stats_data.append(stats_dict)
-
-# DataFrameに変換
-stats_df = pd.DataFrame(stats_data)
+# 候補者名を取得（英語名を使用）
+title_column = 'title_en' if use_english_titles else 'title'
+project_names = [candidates.iloc[i][title_column] for i in range(len(candidates))
+                 if f'candidate_{i}' in votes.columns]
+
+# 候補者×投票値の度数表を一度だけ集計し、統計量はすべて度数から計算する
+vote_histogram = VoteHistogram.from_votes(votes, num_candidates=len(project_names))
+# ゼロ票を除外した度数表（Quadratic Votingでは0票は投票していないと解釈）
+positive_histogram = vote_histogram.select(min_value=1)
+
+# 基礎統計量を計算（投票のない候補者の統計量は0とする）
+stats_df = pd.DataFrame({
+    'Project': project_names,
+    'Total Votes': vote_histogram.total(),  # 合計票
+    'Mean': np.nan_to_num(positive_histogram.mean()),  # 平均（0票を除く）
+    'Median': np.nan_to_num(positive_histogram.median()),  # 中央値（0票を除く）
+    'Std Dev': np.nan_to_num(positive_histogram.std()),  # 標準偏差（0票を除く）
+    'Min': np.nan_to_num(positive_histogram.min()).astype(int),  # 最小値（0票を除く）
+    'Max': vote_histogram.max().astype(int),  # 最大値
+    'Voters': positive_histogram.count(),  # 投票者数（0票を除く）
+    'Mode': np.nan_to_num(positive_histogram.mode()).astype(int),  # 最頻値（0票を除く）
+    'Zero Votes': vote_histogram.count_of(0),  # 0票の数
+})
 
 # 予算配分を計算（総投票数に比例）
 total_budget = 250000  # 総予算（円）
@@ -106,7 +99,7 @@ with open('results/reports/statistics_report.txt', 'w', encoding='utf-8') as f:
     f.write(f"- Total Number of Voters: {total_voters}\n")
     
     # 合計投票数
-    total_votes = sum([np.sum(data > 0) for data in vote_data.values()])
+    total_votes = positive_histogram.count().sum()
     f.write(f"- Total Number of Votes Cast: {total_votes}\n")
     
     # 平均投票先数（1人あたり何プロジェクトに投票したか）
@@ -114,7 +107,7 @@ with open('results/reports/statistics_report.txt', 'w', encoding='utf-8') as f:
     f.write(f"- Average Number of Projects Voted Per Person: {avg_projects_per_voter:.2f}\n")
     
     # 投票者1人あたりの平均投票ポイント
-    total_points = sum([np.sum(data) for data in vote_data.values()])
+    total_points = vote_histogram.total().sum()
     avg_points_per_voter = total_points / total_voters
     f.write(f"- Average Points Used Per Voter: {avg_points_per_voter:.2f}\n")
     
@@ -132,9 +125,9 @@ with open('results/reports/statistics_report.txt', 'w', encoding='utf-8') as f:
 with open('results/reports/statistics_report.html', 'w', encoding='utf-8') as f:
     # 全体の投票データに関する統計情報を変数に格納
     total_voters = len(votes['voter_id'].unique())
-    total_votes_cast = sum([np.sum(data > 0) for data in vote_data.values()])
+    total_votes_cast = positive_histogram.count().sum()
     avg_projects_per_voter = total_votes_cast / total_voters
-    total_points = sum([np.sum(data) for data in vote_data.values()])
+    total_points = vote_histogram.total().sum()
     avg_points_per_voter = total_points / total_voters
     max_points_project = stats_df.iloc[0]['Project']
     max_points = stats_df.iloc[0]['Total Votes']
@@ -220,13 +213,12 @@ with open('results/reports/statistics_report.html', 'w', encoding='utf-8') as f:
 
 # プロジェクト別の投票分布グラフも作成
 try:
-    for project, data in vote_data.items():
+    for project, counts in zip(project_names, positive_histogram.counts):
         # 非ゼロデータのみ使用
-        non_zero_data = data[data > 0]
-        if len(non_zero_data) > 0:
+        if counts.sum() > 0:
             plt.figure(figsize=(10, 6))
-            # ヒストグラム作成（1-9の範囲で）
-            plt.hist(non_zero_data, bins=range(1, 11), alpha=0.7, color='skyblue', edgecolor='black')
+            # ヒストグラム作成（1-9の範囲で、度数表を重みとして使用）
+            plt.hist(positive_histogram.values, bins=range(1, 11), weights=counts, alpha=0.7, color='skyblue', edgecolor='black')
             plt.title(f'Vote Distribution for {project}')
             plt.xlabel('Vote Value')
             plt.ylabel('Number of Voters')
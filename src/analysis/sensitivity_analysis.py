@@ -7,12 +7,23 @@ QVにおける中立バイアスの感度分析スクリプト
 """
 
 import os
+import sys
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from scipy import stats
 import matplotlib.ticker as mtick
+from concurrent.futures import ProcessPoolExecutor
+
+# ルートディレクトリへのパスを取得
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.append(ROOT_DIR)
+
+from src.utils.ballot_matrix import long_to_ballot_matrix
+from src.utils.qv_allocation import allocate_qv_budget, removed_contributions_by_key
+from src.utils.rng import make_rng, DEFAULT_SEED
+from src.utils.adaptive_mc import run_adaptive_replicates
 
 # 定数定義
 EPSILON = 1e-10  # ゼロ除算回避のための小さな値
@@ -21,6 +32,10 @@ DATA_DIR = 'data'  # データディレクトリ
 VOTES_FILE = f'{DATA_DIR}/votes.csv'
 CANDIDATES_FILE = f'{DATA_DIR}/vote_summary.csv'
 OUTPUT_DIR = './results/figures/neutral_bias'
+DEFAULT_BIAS_RATIOS = [0.0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0]
+MC_QUANTILES = (0.05, 0.5, 0.95)  # モンテカルロ結果の分位点
+MC_CHUNK_SIZE = 500  # 1タスクあたりの試行回数
+CLUSTER_LABELS_FILE = os.path.join(OUTPUT_DIR, 'vote_patterns_with_clusters.csv')  # identify_voting_patterns の出力
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 def get_translation_dict():
@@ -118,32 +133,81 @@ def load_data():
 
 def calculate_qv_results(votes_df, total_budget=250000):
     """QV方式の予算配分を計算"""
-    # 各投票のコスト（= vote_value^2）とsqrt(cost)
-    votes_df['cost'] = votes_df['vote_value']**2
-    votes_df['sqrt_cost'] = np.sqrt(votes_df['cost'])
+    # 投票行列に変換し、共通カーネルで sqrt(vote_value^2) に比例した配分を計算
+    _, ballots = long_to_ballot_matrix(votes_df)
+    allocation = allocate_qv_budget(ballots, score='votes', total_budget=total_budget)
     
-    # プロジェクトごとのsqrt(cost)の合計
-    project_scores = votes_df.groupby('candidate_id')['sqrt_cost'].sum()
+    # 投票データに含まれるプロジェクトのみを結果に含める
+    candidate_ids = np.sort(votes_df['candidate_id'].unique())
     
-    # 全体のsqrt(cost)の合計
-    total_score = project_scores.sum()
+    # 結果をDataFrameにまとめる
+    results = pd.DataFrame({
+        'total_sqrt_cost': allocation['total_score'][0, candidate_ids],
+        'budget_allocation': allocation['budget_allocation'][0, candidate_ids],
+        'total_votes': allocation['total_votes'][0, candidate_ids]
+    }, index=pd.Index(candidate_ids, name='candidate_id'))
     
-    # 予算配分計算
-    budget_allocation = (project_scores / total_score) * total_budget if total_score > 0 else pd.Series(0, index=project_scores.index)
+    return results
+
+def load_cluster_labels(cluster_file=CLUSTER_LABELS_FILE):
+    """
+    identify_voting_patterns.py が出力したクラスターラベルを読み込む
     
-    # プロジェクトごとの投票数（合計）も計算
-    vote_counts = votes_df.groupby('candidate_id')['vote_value'].sum()
+    Returns:
+    --------
+    DataFrame
+        voter_id と cluster の2列を持つデータ
+    """
+    clusters = pd.read_csv(cluster_file, index_col=0)
     
-    # 結果をDataFrameにまとめる
-    results = pd.DataFrame({
-        'total_sqrt_cost': project_scores,
-        'budget_allocation': budget_allocation,
-        'total_votes': vote_counts
+    return pd.DataFrame({
+        'voter_id': clusters.index.values,
+        'cluster': clusters['cluster'].values
     })
+
+def select_votes_by_segment(segment_labels, segment_ratios, rng):
+    """
+    セグメントごとに異なる割合で投票を無作為に選択する（全セグメントを一度に処理）
     
-    return results
+    各投票に一様乱数キーを割り当て、セグメント内でキーが小さい順に
+    int(セグメント内の票数 × 割合) 個を選択する
+    
+    Parameters:
+    -----------
+    segment_labels : array-like
+        投票ごとのセグメントラベル（クラスターID、プロジェクトIDなど）
+    segment_ratios : dict
+        セグメントラベル → 選択割合（0-1の値）。含まれないセグメントは選択しない
+    rng : numpy.random.Generator
+        乱数生成器
+        
+    Returns:
+    --------
+    numpy.ndarray
+        選択された投票を True とするブールマスク
+    """
+    segment_codes, segments = pd.factorize(pd.Series(segment_labels))
+    ratios = np.array([segment_ratios.get(segment, 0.0) for segment in segments], dtype=float)
+    
+    # セグメント内の票数と選択数
+    counts = np.bincount(segment_codes[segment_codes >= 0], minlength=len(segments))
+    num_selected = (counts * ratios).astype(int)
+    
+    # セグメント→乱数キーの順に並べ、セグメント内での順位を求める
+    keys = rng.random(len(segment_codes))
+    order = np.lexsort((keys, segment_codes))
+    sorted_codes = segment_codes[order]
+    segment_start = np.searchsorted(sorted_codes, sorted_codes)
+    position = np.arange(len(order)) - segment_start
+    
+    selected = np.zeros(len(segment_codes), dtype=bool)
+    valid = sorted_codes >= 0
+    selected[order[valid]] = position[valid] < num_selected[sorted_codes[valid]]
+    
+    return selected
 
-def apply_bias_correction(votes_df, bias_ratio, reduction_mode='uniform', cluster_data=None, project_specific_ratios=None):
+def apply_bias_correction(votes_df, bias_ratio, reduction_mode='uniform', cluster_data=None, project_specific_ratios=None,
+                          cluster_ratios=None, seed=DEFAULT_SEED):
     """
     中立バイアスの補正を適用する
     
@@ -158,9 +222,13 @@ def apply_bias_correction(votes_df, bias_ratio, reduction_mode='uniform', cluste
         'cluster' - クラスターごとに異なる補正率を適用
         'project' - プロジェクトごとに異なる補正率を適用
     cluster_data : DataFrame
-        クラスターモードで使用する投票者クラスターデータ
+        クラスターモードで使用する投票者クラスターデータ（voter_id, cluster 列。load_cluster_labels() の出力）
     project_specific_ratios : dict
         プロジェクトモードで使用するプロジェクトごとの補正率
+    cluster_ratios : dict
+        クラスターモードで使用するクラスターごとの補正率（指定しない場合は全クラスターに bias_ratio を適用）
+    seed : int
+        乱数シード
         
     Returns:
     --------
@@ -182,8 +250,8 @@ def apply_bias_correction(votes_df, bias_ratio, reduction_mode='uniform', cluste
     # 補正対象の投票をランダムに選択
     if reduction_mode == 'uniform':
         # 一律削減モード - 単純にランダムに選択
-        np.random.seed(42)  # 結果の再現性のため
-        random_indices = np.random.choice(
+        rng = make_rng(seed)  # 結果の再現性のため
+        random_indices = rng.choice(
             small_votes_df.index, 
             size=int(total_small_votes * bias_ratio), 
             replace=False
@@ -199,45 +267,29 @@ def apply_bias_correction(votes_df, bias_ratio, reduction_mode='uniform', cluste
         if cluster_data is None:
             raise ValueError("クラスターモードにはクラスターデータが必要です")
         
-        affected_votes = 0
-        # クラスターごとに異なる補正率を適用
-        for cluster_id, cluster_bias_ratio in cluster_data.items():
-            # クラスターに属する投票者の小票を特定
-            cluster_voters = cluster_data[cluster_data['cluster'] == cluster_id]['voter_id'].unique()
-            cluster_small_votes = small_votes_df[small_votes_df['voter_id'].isin(cluster_voters)]
-            
-            # ランダムに選択して補正
-            np.random.seed(42 + int(cluster_id))  # クラスターごとに異なるシード値
-            random_indices = np.random.choice(
-                cluster_small_votes.index, 
-                size=int(len(cluster_small_votes) * cluster_bias_ratio), 
-                replace=False
-            )
-            
-            corrected_votes_df.loc[random_indices, 'vote_value'] = 0
-            affected_votes += len(random_indices)
+        # 小票ごとに投票者のクラスターを対応付け（ラベルのない投票者の票は削減しない）
+        voter_clusters = cluster_data.drop_duplicates('voter_id').set_index('voter_id')['cluster']
+        small_vote_clusters = small_votes_df['voter_id'].map(voter_clusters)
+        
+        if cluster_ratios is None:
+            cluster_ratios = {cluster_id: bias_ratio for cluster_id in voter_clusters.unique()}
+        
+        # 全クラスターの小票を一度に選択して補正
+        selected = select_votes_by_segment(small_vote_clusters.values, cluster_ratios, make_rng(seed))
+        corrected_votes_df.loc[small_votes_df.index[selected], 'vote_value'] = 0
+        
+        affected_votes = int(selected.sum())
             
     elif reduction_mode == 'project':
         # プロジェクト別削減モード - プロジェクトごとに異なる割合で削減
         if project_specific_ratios is None:
             raise ValueError("プロジェクトモードにはプロジェクトごとの補正率が必要です")
         
-        affected_votes = 0
-        # プロジェクトごとに異なる補正率を適用
-        for project_id, proj_bias_ratio in project_specific_ratios.items():
-            # プロジェクトの小票を特定
-            project_small_votes = small_votes_df[small_votes_df['candidate_id'] == project_id]
-            
-            # ランダムに選択して補正
-            np.random.seed(42 + int(project_id))  # プロジェクトごとに異なるシード値
-            random_indices = np.random.choice(
-                project_small_votes.index, 
-                size=int(len(project_small_votes) * proj_bias_ratio), 
-                replace=False
-            )
-            
-            corrected_votes_df.loc[random_indices, 'vote_value'] = 0
-            affected_votes += len(random_indices)
+        # 全プロジェクトの小票を一度に選択して補正
+        selected = select_votes_by_segment(small_votes_df['candidate_id'].values, project_specific_ratios, make_rng(seed))
+        corrected_votes_df.loc[small_votes_df.index[selected], 'vote_value'] = 0
+        
+        affected_votes = int(selected.sum())
     
     else:
         raise ValueError(f"Unknown reduction mode: {reduction_mode}")
@@ -251,7 +303,7 @@ def apply_bias_correction(votes_df, bias_ratio, reduction_mode='uniform', cluste
     
     return corrected_votes_df, correction_stats
 
-def run_sensitivity_analysis(votes_df, candidates_df, bias_ratios=None, mode='uniform'):
+def run_sensitivity_analysis(votes_df, candidates_df, bias_ratios=None, mode='uniform', cluster_data=None, segment_weights=None):
     """
     一連の感度分析を実行する
     
@@ -265,6 +317,12 @@ def run_sensitivity_analysis(votes_df, candidates_df, bias_ratios=None, mode='un
         テストするバイアス率のリスト（0-1の値）
     mode : str
         削減モード
+    cluster_data : DataFrame
+        クラスターモードで使用する投票者クラスターデータ（load_cluster_labels() の出力）
+    segment_weights : dict
+        クラスター・プロジェクトモードでのセグメントごとの相対的な重み。
+        各バイアス率でのセグメントの補正率は min(1, バイアス率 × 重み) となる
+        （指定しない場合は全セグメントの重みを1とする）
         
     Returns:
     --------
@@ -272,7 +330,19 @@ def run_sensitivity_analysis(votes_df, candidates_df, bias_ratios=None, mode='un
         感度分析結果
     """
     if bias_ratios is None:
-        bias_ratios = [0.0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0]
+        bias_ratios = DEFAULT_BIAS_RATIOS
+    
+    # セグメント（クラスター・プロジェクト）の一覧
+    if mode == 'cluster':
+        if cluster_data is None:
+            raise ValueError("クラスターモードにはクラスターデータが必要です")
+        segments = cluster_data['cluster'].unique()
+    elif mode == 'project':
+        segments = votes_df['candidate_id'].unique()
+    else:
+        segments = []
+    if segment_weights is None:
+        segment_weights = {segment: 1.0 for segment in segments}
     
     # オリジナルの投票結果の計算
     original_results = calculate_qv_results(votes_df)
@@ -282,8 +352,16 @@ def run_sensitivity_analysis(votes_df, candidates_df, bias_ratios=None, mode='un
     
     # 各バイアス率でのシミュレーション
     for bias_ratio in bias_ratios:
+        # セグメントごとの補正率
+        segment_ratios = {segment: min(1.0, bias_ratio * segment_weights.get(segment, 0.0)) for segment in segments}
+        
         # バイアス補正の適用
-        corrected_votes_df, correction_stats = apply_bias_correction(votes_df, bias_ratio, mode)
+        corrected_votes_df, correction_stats = apply_bias_correction(
+            votes_df, bias_ratio, mode,
+            cluster_data=cluster_data,
+            cluster_ratios=segment_ratios if mode == 'cluster' else None,
+            project_specific_ratios=segment_ratios if mode == 'project' else None
+        )
         
         # 補正後の投票結果の計算
         corrected_results = calculate_qv_results(corrected_votes_df)
@@ -323,6 +401,377 @@ def run_sensitivity_analysis(votes_df, candidates_df, bias_ratios=None, mode='un
     
     return sensitivity_results
 
+def _monte_carlo_chunk(small_scores, small_votes, num_removed, base_scores, base_votes, total_budget, n_draws, seed, stream_keys):
+    """
+    一律削減モードのモンテカルロ試行を n_draws 回分まとめて実行する
+    
+    小票ごとに一様乱数キーを引き、キーが小さい順に num_removed 個を削除する
+    （非復元抽出と同じ分布）。削除マスク (試行数×小票数) と小票の寄与行列 (小票数×プロジェクト数) の
+    行列積で、全試行の配分を一度に計算する。乱数は (seed, stream_keys) の独立ストリームを使う
+    """
+    rng = make_rng(seed, *stream_keys)
+    keys = rng.random((n_draws, len(small_scores)))
+    removal_mask = (keys.argsort(axis=1).argsort(axis=1) < num_removed).astype(float)
+    
+    total_scores = base_scores - removal_mask @ small_scores
+    total_votes = base_votes - removal_mask @ small_votes
+    
+    totals = total_scores.sum(axis=1, keepdims=True)
+    budget_allocation = np.divide(total_scores, totals, out=np.zeros(total_scores.shape), where=totals > 0) * total_budget
+    
+    return budget_allocation, total_votes
+
+def _monte_carlo_crn_chunk(small_scores, small_votes, num_removed, base_scores, base_votes, total_budget, n_draws, seed, stream_keys):
+    """
+    共通乱数法で全バイアス率のモンテカルロ試行を n_draws 回分まとめて実行する
+    
+    試行ごとに小票のキーを一度だけ引き、すべてのバイアス率で共有する。バイアス率 r では
+    キーが小さい順に num_removed[r] 個を削除するため、削除される票はバイアス率について入れ子になる
+    
+    Returns:
+    --------
+    budget_allocation, total_votes : numpy.ndarray
+        (試行数, バイアス率数, プロジェクト数)
+    """
+    rng = make_rng(seed, *stream_keys)
+    keys = rng.random((n_draws, len(small_scores)))
+    
+    total_scores = base_scores - removed_contributions_by_key(keys, small_scores, num_removed)
+    total_votes = base_votes - removed_contributions_by_key(keys, small_votes, num_removed)
+    
+    totals = total_scores.sum(axis=2, keepdims=True)
+    budget_allocation = np.divide(total_scores, totals, out=np.zeros(total_scores.shape), where=totals > 0) * total_budget
+    
+    return budget_allocation, total_votes
+
+def _adaptive_monte_carlo(small_scores, small_votes, num_removed, base_scores, base_votes, total_budget,
+                          max_draws, seed, stream_prefix, tolerance, common_random_numbers):
+    """
+    予算配分比率の信頼区間の半幅が tolerance 以下になるまで、MC_CHUNK_SIZE 回ずつ試行を追加する
+    
+    チャンク番号 c の乱数ストリームは stream_prefix + (c,) で、固定回数の実行と同じ乱数列を使う
+    （適応的に停止した結果は、固定回数の実行結果の先頭部分と一致する）
+    
+    Returns:
+    --------
+    budget_allocation, total_votes : numpy.ndarray
+        全試行の結果（共通乱数法の場合は (試行数, バイアス率数, プロジェクト数)）
+    converged : bool
+        許容誤差以下で停止したかどうか
+    """
+    worker = _monte_carlo_crn_chunk if common_random_numbers else _monte_carlo_chunk
+    vote_batches = []
+    
+    def draw_batch(chunk_index, n_draws):
+        budget_allocation, total_votes = worker(small_scores, small_votes, num_removed, base_scores, base_votes,
+                                                total_budget, n_draws, seed, tuple(stream_prefix) + (chunk_index,))
+        vote_batches.append(total_votes)
+        return budget_allocation / total_budget
+    
+    result = run_adaptive_replicates(draw_batch, tolerance, batch_size=MC_CHUNK_SIZE, max_replicates=max_draws)
+    
+    return result['samples'] * total_budget, np.concatenate(vote_batches), result['converged']
+
+def run_monte_carlo_sensitivity(votes_df, candidates_df, bias_ratios=None, n_draws=2000, seed=DEFAULT_SEED,
+                                n_jobs=None, total_budget=250000, quantiles=MC_QUANTILES, common_random_numbers=False,
+                                tolerance=None):
+    """
+    一律削減モードの感度分析をモンテカルロ法で実行する
+    
+    各バイアス率で n_draws 回の無作為削除を行い、予算配分の平均・分位点と
+    プロジェクトの順位が変わる確率を求める。試行はチャンクに分けてプロセスプールで並列実行し、
+    乱数はチャンクごとに独立なストリームを使うため、並列数によらず同じ結果になる
+    
+    Parameters:
+    -----------
+    votes_df : DataFrame
+        投票データ（長形式）
+    candidates_df : DataFrame
+        候補プロジェクトデータ
+    bias_ratios : list
+        テストするバイアス率のリスト（0-1の値）
+    n_draws : int
+        バイアス率ごとの試行回数（tolerance を指定した場合は試行回数の上限）
+    seed : int
+        乱数シード
+    n_jobs : int
+        並列プロセス数（None の場合はCPUコア数、1 の場合は逐次実行）
+    total_budget : float
+        配分する予算総額
+    quantiles : tuple of float
+        出力する分位点
+    common_random_numbers : bool
+        True の場合、試行ごとの乱数キーを全バイアス率で共有する（共通乱数法）。
+        各試行の予算配分がバイアス率について滑らかに変化し、バイアス率間の差の推定誤差が小さくなる
+    tolerance : float, optional
+        指定した場合、すべてのプロジェクトの予算配分比率（0-1）の平均の95%信頼区間の半幅が
+        この値以下になるまで MC_CHUNK_SIZE 回ずつ試行を追加する（バイアス率ごとに停止、
+        共通乱数法の場合は全バイアス率で一括して停止）。結果には n_draws と converged 列が入る
+        
+    Returns:
+    --------
+    mc_results : DataFrame
+        バイアス率×プロジェクトごとのモンテカルロ集計結果
+    """
+    if bias_ratios is None:
+        bias_ratios = DEFAULT_BIAS_RATIOS
+    if n_jobs is None:
+        n_jobs = os.cpu_count() or 1
+    
+    # 投票行列と元の配分
+    _, ballots = long_to_ballot_matrix(votes_df)
+    original = allocate_qv_budget(ballots, score='votes', total_budget=total_budget)
+    base_scores = original['total_score'][0]
+    base_votes = original['total_votes'][0].astype(float)
+    original_budget = original['budget_allocation'][0]
+    
+    # 1-2票の位置と、各小票のプロジェクト別寄与（小票数×プロジェクト数）
+    voter_index, candidate_index = np.nonzero((ballots >= 1) & (ballots <= 2))
+    small_values = ballots[voter_index, candidate_index]
+    small_scores = np.zeros((len(small_values), ballots.shape[1]))
+    small_scores[np.arange(len(small_values)), candidate_index] = np.abs(small_values)
+    small_votes = np.zeros_like(small_scores)
+    small_votes[np.arange(len(small_values)), candidate_index] = small_values
+    total_small_votes = len(small_values)
+    
+    chunk_sizes = [min(MC_CHUNK_SIZE, n_draws - start) for start in range(0, n_draws, MC_CHUNK_SIZE)]
+    num_removed = [int(total_small_votes * bias_ratio) for bias_ratio in bias_ratios]
+    if tolerance is not None:
+        # 適応的停止（バイアス率ごと、共通乱数法の場合は全バイアス率で1つのタスク）
+        worker = _adaptive_monte_carlo
+        if common_random_numbers:
+            tasks = [(small_scores, small_votes, num_removed, base_scores, base_votes,
+                      total_budget, n_draws, seed, (), tolerance, True)]
+        else:
+            tasks = [(small_scores, small_votes, num_removed[r], base_scores, base_votes,
+                      total_budget, n_draws, seed, (r,), tolerance, False)
+                     for r in range(len(bias_ratios))]
+    elif common_random_numbers:
+        # チャンクごとのタスク（乱数ストリームはチャンクごとに独立で、全バイアス率で共有）
+        worker = _monte_carlo_crn_chunk
+        tasks = [(small_scores, small_votes, num_removed, base_scores, base_votes,
+                  total_budget, chunk_size, seed, (c,))
+                 for c, chunk_size in enumerate(chunk_sizes)]
+    else:
+        # バイアス率×チャンクごとのタスク（乱数ストリームは (バイアス率番号, チャンク番号) ごとに独立）
+        worker = _monte_carlo_chunk
+        tasks = [(small_scores, small_votes, num_removed[r], base_scores, base_votes,
+                  total_budget, chunk_size, seed, (r, c))
+                 for r in range(len(bias_ratios)) for c, chunk_size in enumerate(chunk_sizes)]
+    
+    if n_jobs > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            chunk_results = list(executor.map(worker, *zip(*tasks)))
+    else:
+        chunk_results = [worker(*task) for task in tasks]
+    
+    # バイアス率ごとの試行結果 (試行数, プロジェクト数)
+    if tolerance is not None:
+        if common_random_numbers:
+            budgets_all, votes_all, converged = chunk_results[0]
+            ratio_budgets = [budgets_all[:, r] for r in range(len(bias_ratios))]
+            ratio_votes = [votes_all[:, r] for r in range(len(bias_ratios))]
+            ratio_converged = [converged] * len(bias_ratios)
+        else:
+            ratio_budgets = [budget for budget, _, _ in chunk_results]
+            ratio_votes = [vote for _, vote, _ in chunk_results]
+            ratio_converged = [converged for _, _, converged in chunk_results]
+    elif common_random_numbers:
+        all_budgets = np.concatenate([budget for budget, _ in chunk_results])
+        all_votes = np.concatenate([vote for _, vote in chunk_results])
+        ratio_budgets = [all_budgets[:, r] for r in range(len(bias_ratios))]
+        ratio_votes = [all_votes[:, r] for r in range(len(bias_ratios))]
+    else:
+        ratio_budgets = [np.vstack([budget for budget, _ in chunk_results[r * len(chunk_sizes):(r + 1) * len(chunk_sizes)]])
+                         for r in range(len(bias_ratios))]
+        ratio_votes = [np.vstack([vote for _, vote in chunk_results[r * len(chunk_sizes):(r + 1) * len(chunk_sizes)]])
+                       for r in range(len(bias_ratios))]
+    
+    # 元の順位（予算配分の降順、0が1位）
+    original_rank = np.argsort(np.argsort(-original_budget))
+    
+    results_list = []
+    for r, bias_ratio in enumerate(bias_ratios):
+        budgets = ratio_budgets[r]
+        votes = ratio_votes[r]
+        
+        budget_change = (budgets - original_budget) / original_budget * 100
+        budget_quantiles = np.quantile(budgets, quantiles, axis=0)
+        change_quantiles = np.quantile(budget_change, quantiles, axis=0)
+        ranks = np.argsort(np.argsort(-budgets, axis=1), axis=1)
+        rank_change_prob = (ranks != original_rank).mean(axis=0)
+        
+        for project_id in range(ballots.shape[1]):
+            if 'title' in candidates_df.columns:
+                project_name = candidates_df.loc[candidates_df['candidate_id'] == project_id, 'title'].iloc[0]
+            else:
+                project_name = f"Project {project_id}"
+            
+            row = {
+                'bias_ratio': bias_ratio,
+                'project_id': project_id,
+                'project_name': translate_project_name(project_name),
+                'n_draws': len(budgets),
+                'original_votes': base_votes[project_id],
+                'mean_corrected_votes': votes[:, project_id].mean(),
+                'original_budget': original_budget[project_id],
+                'mean_budget': budgets[:, project_id].mean(),
+                'std_budget': budgets[:, project_id].std(ddof=1) if len(budgets) > 1 else 0.0,
+                'mean_budget_change_pct': budget_change[:, project_id].mean(),
+                'rank_change_prob': rank_change_prob[project_id],
+                'affected_votes': int(total_small_votes * bias_ratio),
+                'total_small_votes': total_small_votes
+            }
+            if tolerance is not None:
+                row['converged'] = ratio_converged[r]
+            for q, budget_q, change_q in zip(quantiles, budget_quantiles, change_quantiles):
+                row[f'budget_q{int(round(q * 100)):02d}'] = budget_q[project_id]
+                row[f'budget_change_pct_q{int(round(q * 100)):02d}'] = change_q[project_id]
+            results_list.append(row)
+    
+    return pd.DataFrame(results_list)
+
+def expected_allocation_under_removal(ballots, bias_ratios, total_budget=250000):
+    """
+    一律削減モードでの予算配分の期待値と分散を解析的に計算する（サンプリングなし）
+    
+    小票（1-2票）N 個から k = int(N × バイアス率) 個を非復元抽出で削除するとき、
+    各票の削除確率は p = k / N、異なる2票の削除指示変数の共分散は -p(1-p)/(N-1) となる。
+    小票はそれぞれ1つのプロジェクトにのみ寄与するため、プロジェクト別スコア合計の
+    期待値と共分散行列は次の閉形式で求まる
+    
+        E[S_c] = S_c - p × s_c
+        Cov[S_c, S_d] = p(1-p)/(N-1) × (N × q_c × δ_cd - s_c × s_d)
+    
+    （s_c: プロジェクト c の小票の合計、q_c: 小票の2乗和）。予算配分 S_c / ΣS は
+    期待値の比で近似し、分散はデルタ法（一次近似）で求める。
+    run_monte_carlo_sensitivity() の結果を参照値として検証できる
+    
+    Parameters:
+    -----------
+    ballots : numpy.ndarray
+        投票行列 (投票者数, 候補者数)、または複数の選挙をまとめた (選挙数, 投票者数, 候補者数)。
+        投票者数の異なる選挙は0票の行で埋めてよい
+    bias_ratios : array-like
+        バイアス率のリスト（0-1の値）
+    total_budget : float
+        配分する予算総額
+        
+    Returns:
+    --------
+    dict
+        'expected_votes' : 投票値合計の期待値 ([選挙数,] バイアス率数, 候補者数)
+        'expected_budget' : 予算配分の期待値（一次近似）
+        'std_budget' : 予算配分の標準偏差（一次近似）
+        'num_removed' : 削除される小票の数 ([選挙数,] バイアス率数)
+    """
+    ballots = np.asarray(ballots)
+    single_election = ballots.ndim == 2
+    if single_election:
+        ballots = ballots[np.newaxis]
+    
+    # 選挙ごとの元のスコア合計と小票の集計 (選挙数, 候補者数)
+    original = allocate_qv_budget(ballots, score='votes', total_budget=total_budget)
+    base_scores = original['total_score']
+    base_votes = original['total_votes'].astype(float)
+    small = np.where((ballots >= 1) & (ballots <= 2), ballots, 0).astype(float)
+    small_sum = small.sum(axis=1)
+    small_sq_sum = (small ** 2).sum(axis=1)
+    num_small = np.count_nonzero(small, axis=(1, 2)).astype(float)
+    
+    # 削除確率 (選挙数, バイアス率数)。削除数は run_monte_carlo_sensitivity() と同じ int(N × バイアス率)
+    bias_ratios = np.asarray(bias_ratios, dtype=float)
+    num_removed = np.trunc(num_small[:, np.newaxis] * bias_ratios)
+    p = np.divide(num_removed, num_small[:, np.newaxis], out=np.zeros(num_removed.shape), where=num_small[:, np.newaxis] > 0)
+    
+    # スコア合計の期待値 (選挙数, バイアス率数, 候補者数)
+    expected_scores = base_scores[:, np.newaxis, :] - p[..., np.newaxis] * small_sum[:, np.newaxis, :]
+    expected_votes = base_votes[:, np.newaxis, :] - p[..., np.newaxis] * small_sum[:, np.newaxis, :]
+    
+    # スコア合計の共分散行列の形状部分 (選挙数, 候補者数, 候補者数) と係数 p(1-p)/(N-1)
+    num_candidates = ballots.shape[2]
+    shape_matrix = (num_small[:, np.newaxis, np.newaxis] * small_sq_sum[:, :, np.newaxis] * np.eye(num_candidates)
+                    - small_sum[:, :, np.newaxis] * small_sum[:, np.newaxis, :])
+    denominator = np.maximum(num_small - 1, 1)[:, np.newaxis]
+    cov_scale = p * (1 - p) / denominator
+    
+    # 予算配分の期待値と、デルタ法による分散
+    # ∂(S_c/T)/∂S_d = (δ_cd - S_c/T) / T
+    totals = expected_scores.sum(axis=2, keepdims=True)
+    shares = np.divide(expected_scores, totals, out=np.zeros(expected_scores.shape), where=totals > 0)
+    inv_totals = np.divide(1.0, totals, out=np.zeros(totals.shape), where=totals > 0)
+    jacobian = (np.eye(num_candidates) - shares[..., np.newaxis]) * inv_totals[..., np.newaxis]
+    share_var = cov_scale[..., np.newaxis] * np.einsum('erci,eij,ercj->erc', jacobian, shape_matrix, jacobian)
+    
+    results = {
+        'expected_votes': expected_votes,
+        'expected_budget': shares * total_budget,
+        'std_budget': np.sqrt(np.clip(share_var, 0, None)) * total_budget,
+        'num_removed': num_removed.astype(int)
+    }
+    if single_election:
+        results = {key: value[0] for key, value in results.items()}
+    
+    return results
+
+def run_analytic_sensitivity(votes_df, candidates_df, bias_ratios=None, total_budget=250000):
+    """
+    一律削減モードの感度分析を解析的に実行する（expected_allocation_under_removal() の DataFrame 版）
+    
+    出力列は run_monte_carlo_sensitivity() と対応しており、モンテカルロ結果と突き合わせて検証できる
+    
+    Parameters:
+    -----------
+    votes_df : DataFrame
+        投票データ（長形式）
+    candidates_df : DataFrame
+        候補プロジェクトデータ
+    bias_ratios : list
+        バイアス率のリスト（0-1の値）
+    total_budget : float
+        配分する予算総額
+        
+    Returns:
+    --------
+    analytic_results : DataFrame
+        バイアス率×プロジェクトごとの期待値・標準偏差
+    """
+    if bias_ratios is None:
+        bias_ratios = DEFAULT_BIAS_RATIOS
+    
+    _, ballots = long_to_ballot_matrix(votes_df)
+    original = allocate_qv_budget(ballots, score='votes', total_budget=total_budget)
+    original_budget = original['budget_allocation'][0]
+    original_votes = original['total_votes'][0]
+    total_small_votes = int(((ballots >= 1) & (ballots <= 2)).sum())
+    
+    expected = expected_allocation_under_removal(ballots, bias_ratios, total_budget=total_budget)
+    
+    # プロジェクト名
+    num_candidates = ballots.shape[1]
+    if 'title' in candidates_df.columns:
+        names = candidates_df.set_index('candidate_id')['title'].reindex(range(num_candidates))
+        project_names = [translate_project_name(name) for name in names]
+    else:
+        project_names = [f"Project {project_id}" for project_id in range(num_candidates)]
+    
+    num_ratios = len(bias_ratios)
+    budget_change = (expected['expected_budget'] - original_budget) / original_budget * 100
+    
+    return pd.DataFrame({
+        'bias_ratio': np.repeat(bias_ratios, num_candidates),
+        'project_id': np.tile(np.arange(num_candidates), num_ratios),
+        'project_name': np.tile(project_names, num_ratios),
+        'original_votes': np.tile(original_votes, num_ratios),
+        'mean_corrected_votes': expected['expected_votes'].ravel(),
+        'original_budget': np.tile(original_budget, num_ratios),
+        'mean_budget': expected['expected_budget'].ravel(),
+        'std_budget': expected['std_budget'].ravel(),
+        'mean_budget_change_pct': budget_change.ravel(),
+        'affected_votes': np.repeat(expected['num_removed'], num_candidates),
+        'total_small_votes': total_small_votes
+    })
+
 def plot_sensitivity_results(sensitivity_results, output_file):
     """感度分析結果のプロット"""
     trans_dict = get_translation_dict()
@@ -359,6 +808,31 @@ def plot_sensitivity_results(sensitivity_results, output_file):
     
     return
 
+def plot_monte_carlo_results(mc_results, output_file, lower='budget_change_pct_q05', upper='budget_change_pct_q95'):
+    """モンテカルロ感度分析結果のプロット（平均と信頼区間の帯）"""
+    projects = mc_results['project_name'].unique()
+    colors = plt.cm.tab10(np.linspace(0, 1, len(projects)))
+    
+    plt.figure(figsize=(12, 8))
+    
+    for i, project in enumerate(projects):
+        project_data = mc_results[mc_results['project_name'] == project]
+        x = project_data['bias_ratio'] * 100  # パーセント表示に変換
+        plt.plot(x, project_data['mean_budget_change_pct'], marker='o', label=project, color=colors[i], linewidth=2)
+        plt.fill_between(x, project_data[lower], project_data[upper], color=colors[i], alpha=0.2)
+    
+    plt.axhline(y=0, color='gray', linestyle='--', alpha=0.7)
+    
+    plt.title(f"Neutral Bias Sensitivity Analysis (Monte Carlo, n={mc_results['n_draws'].iloc[0]})", fontsize=16)
+    plt.xlabel("Small Vote Bias Ratio (%)", fontsize=14)
+    plt.ylabel("Budget Allocation Change (%)", fontsize=14)
+    plt.legend(title="Project", loc='best')
+    plt.grid(True, alpha=0.3)
+    
+    plt.tight_layout()
+    plt.savefig(output_file)
+    plt.close()
+
 def generate_detailed_analysis(sensitivity_results, bias_ratio=0.5, output_file=None):
     """
     特定のバイアス率での詳細分析レポートを生成
@@ -472,7 +946,7 @@ def main():
     sensitivity_results = run_sensitivity_analysis(
         votes_df, 
         candidates_df, 
-        bias_ratios=[0.0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0],
+        bias_ratios=DEFAULT_BIAS_RATIOS,
         mode='uniform'
     )
     
@@ -494,6 +968,43 @@ def main():
             output_file=os.path.join(OUTPUT_DIR, 'sensitivity_analysis.png')
         )
     
+    # クラスター別削減モードの感度分析（identify_voting_patterns.py のクラスターラベルを使用）
+    if os.path.exists(CLUSTER_LABELS_FILE):
+        cluster_data = load_cluster_labels()
+        cluster_results = run_sensitivity_analysis(
+            votes_df,
+            candidates_df,
+            bias_ratios=DEFAULT_BIAS_RATIOS,
+            mode='cluster',
+            cluster_data=cluster_data
+        )
+        cluster_results.to_csv(os.path.join(OUTPUT_DIR, 'sensitivity_analysis_cluster_results.csv'), index=False)
+        plot_sensitivity_results(
+            cluster_results,
+            os.path.join(OUTPUT_DIR, 'sensitivity_analysis_cluster.png')
+        )
+    else:
+        print(f"クラスターラベルが見つからないため、クラスター別削減モードをスキップします: {CLUSTER_LABELS_FILE}")
+    
+    # モンテカルロ感度分析（バイアス率ごとに多数の削除パターンを試行）
+    mc_results = run_monte_carlo_sensitivity(
+        votes_df,
+        candidates_df,
+        bias_ratios=DEFAULT_BIAS_RATIOS,
+        n_draws=2000
+    )
+    mc_results.to_csv(os.path.join(OUTPUT_DIR, 'sensitivity_analysis_monte_carlo.csv'), index=False)
+    plot_monte_carlo_results(
+        mc_results,
+        os.path.join(OUTPUT_DIR, 'sensitivity_analysis_monte_carlo.png')
+    )
+    
+    # 解析的な感度分析（期待値と一次近似の標準偏差）。モンテカルロ結果との差を確認する
+    analytic_results = run_analytic_sensitivity(votes_df, candidates_df, bias_ratios=DEFAULT_BIAS_RATIOS)
+    analytic_results.to_csv(os.path.join(OUTPUT_DIR, 'sensitivity_analysis_analytic.csv'), index=False)
+    max_diff = (analytic_results['mean_budget'] - mc_results['mean_budget']).abs().max()
+    print(f"解析解とモンテカルロ平均の予算配分の最大差: {max_diff:,.0f}円")
+    
     print("感度分析が完了しました。結果は output ディレクトリに保存されています。")
 
 if __name__ == "__main__":
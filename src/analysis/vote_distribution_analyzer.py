@@ -13,9 +13,16 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from scipy import stats
 import matplotlib.ticker as mtick
+import sys
 import time  # 処理時間計測用
 import gc  # ガベージコレクション用
 
+# ルートディレクトリへのパスを取得
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.append(ROOT_DIR)
+
+from src.utils.vote_histogram import VoteHistogram
+
 # パフォーマンス向上のための設定
 plt.rcParams['figure.dpi'] = 100
 plt.switch_backend('agg')  # 描画エンジンを高速なものに
@@ -49,6 +56,7 @@ class VoteDistributionAnalyzer:
         
         # 分析結果格納用
         self.votes_long_df = None
+        self.vote_histogram = None
         self.vote_distribution = None
         self.vote_stats = None
         self.voter_stats = None
@@ -56,6 +64,9 @@ class VoteDistributionAnalyzer:
         
         # 長形式データへの変換
         self._convert_to_long_format()
+        
+        # 候補者×投票値の度数表（投票値の統計量はすべてここから計算する）
+        self.vote_histogram = VoteHistogram.from_votes(self.votes_df, num_candidates=len(self.candidates_df))
     
     def _convert_to_long_format(self):
         """投票データを長形式に変換"""
@@ -81,11 +92,9 @@ class VoteDistributionAnalyzer:
         """投票値の分布分析"""
         print("投票分布を分析しています...")
         
-        # 候補者ごとの投票統計
-        self.vote_stats = self.votes_long_df.groupby('candidate_id')['vote_value'].agg([
-            'count', 'mean', 'std', 'min', 'max', 
-            lambda x: (x == 1).sum()  # 1票の数
-        ]).rename(columns={'<lambda_0>': 'one_vote_count'})
+        # 候補者ごとの投票統計（度数表から計算）
+        self.vote_stats = self.vote_histogram.describe()
+        self.vote_stats['one_vote_count'] = self.vote_histogram.count_of(1)[self.vote_stats.index]  # 1票の数
         
         # 候補者名を追加
         self.vote_stats = self.vote_stats.merge(
@@ -133,11 +142,11 @@ class VoteDistributionAnalyzer:
         print("中立バイアスを検出しています...")
         
         # 全体の投票値分布
-        vote_dist = self.votes_long_df['vote_value'].value_counts().sort_index()
+        vote_dist = self.vote_histogram.value_counts()
         vote_dist_pct = vote_dist / vote_dist.sum() * 100
         
         # 均等分布を仮定した場合の期待値
-        total_votes = len(self.votes_long_df) 
+        total_votes = self.vote_histogram.count().sum()
         expected_per_vote = total_votes / 9  # 均等分布なら各票数(1-9)は同じ頻度
         
         # 分布の不均等性を計算
@@ -0,0 +1,220 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+複数の投票方式を同じ投票行列に対して一括で評価する投票方式エンジン
+各方式は「投票行列 → 候補者ごとの得点」を返す関数として登録し、
+得点・予算配分・ジニ係数・ローレンツ曲線をすべての方式についてまとめて計算する
+"""
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+# ルートディレクトリへのパスを取得
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.append(ROOT_DIR)
+
+from src.utils.ballot_matrix import load_ballot_matrix
+from src.analysis.compare_voting_methods import calculate_opov_tallies, TOTAL_BUDGET
+
+OUTPUT_DATA_DIR = os.path.join(ROOT_DIR, 'results', 'data')
+OUTPUT_REPORT_DIR = os.path.join(ROOT_DIR, 'results', 'reports')
+
+# ====== 投票方式（投票行列 → 候補者ごとの得点） ======
+
+def qv_tallies(ballots):
+    """二次投票方式: 正の投票値をそのまま合計する"""
+    return np.clip(ballots, 0, None).sum(axis=0).astype(float)
+
+def opov_tallies(ballots):
+    """一人一票方式: 最大投票値の候補に1票（同率一位は等分）"""
+    return calculate_opov_tallies(ballots)
+
+def approval_tallies(ballots, threshold=1):
+    """承認投票方式: 投票値が閾値以上の候補を承認したものとして数える"""
+    return (ballots >= threshold).sum(axis=0).astype(float)
+
+def borda_tallies(ballots):
+    """
+    ボルダ方式: 投票値の順位から得点を与える
+    各投票者は自分がより低く評価した候補の数を得点として与え、同点は平均順位で分け合う
+    （正の投票を1つも行っていない投票者は除外）
+    """
+    active = ballots[ballots.max(axis=1) > 0]
+    if len(active) == 0:
+        return np.zeros(ballots.shape[1])
+
+    return (stats.rankdata(active, axis=1) - 1).sum(axis=0)
+
+def cumulative_tallies(ballots):
+    """累積投票方式: 使用したクレジット（投票値の2乗）を線形に合計する"""
+    return (np.clip(ballots, 0, None) ** 2).sum(axis=0).astype(float)
+
+def capped_tallies(ballots, cap=3):
+    """上限付き二次投票方式: 1候補あたりの投票値を上限で打ち切って合計する"""
+    return np.clip(ballots, 0, cap).sum(axis=0).astype(float)
+
+# 方式名と計算関数の対応（新しい方式はここに登録する）
+VOTING_RULES = {
+    'qv': qv_tallies,
+    'opov': opov_tallies,
+    'approval': approval_tallies,
+    'borda': borda_tallies,
+    'cumulative': cumulative_tallies,
+    'capped': capped_tallies
+}
+
+# 既定で比較する方式（表示名 → (方式名, パラメータ)）
+DEFAULT_METHODS = {
+    'qv': ('qv', {}),
+    'opov': ('opov', {}),
+    'approval_1': ('approval', {'threshold': 1}),
+    'approval_4': ('approval', {'threshold': 4}),
+    'borda': ('borda', {}),
+    'cumulative': ('cumulative', {}),
+    'capped_3': ('capped', {'cap': 3}),
+    'capped_5': ('capped', {'cap': 5})
+}
+
+# ====== 不平等度の指標 ======
+
+def gini_coefficients(allocations):
+    """
+    方式ごとの配分（方式数×候補者数）のジニ係数を一括で計算する
+
+    compare_voting_methods.gini() を行ごとに適用した結果と一致する
+    """
+    allocations = np.sort(np.atleast_2d(allocations), axis=1)
+    n = allocations.shape[1]
+    index = np.arange(1, n + 1)
+    totals = allocations.sum(axis=1)
+
+    weighted = ((2 * index - n - 1) * allocations).sum(axis=1)
+    return np.divide(weighted, n * totals, out=np.zeros(len(totals)), where=totals > 0)
+
+def lorenz_curves(allocations):
+    """
+    方式ごとの配分（方式数×候補者数）のローレンツ曲線を一括で計算する
+
+    Returns:
+    --------
+    population : numpy.ndarray
+        累積候補者割合（(0,0)を含む、長さ 候補者数+1）
+    cumulative_share : numpy.ndarray
+        方式ごとの累積配分割合（方式数×(候補者数+1)）
+    """
+    allocations = np.sort(np.atleast_2d(allocations), axis=1)
+    n = allocations.shape[1]
+    cumsum = np.cumsum(allocations, axis=1)
+    totals = cumsum[:, -1:]
+    cumsum_norm = np.divide(cumsum, totals, out=np.zeros(cumsum.shape), where=totals > 0)
+
+    population = np.arange(0, n + 1) / n
+    cumulative_share = np.hstack([np.zeros((len(allocations), 1)), cumsum_norm])
+
+    return population, cumulative_share
+
+# ====== エンジン本体 ======
+
+def evaluate_voting_methods(ballots, methods=None, total_budget=TOTAL_BUDGET):
+    """
+    同じ投票行列に対して複数の投票方式をまとめて評価する
+
+    Parameters:
+    -----------
+    ballots : numpy.ndarray
+        投票者×候補者の投票行列
+    methods : dict, optional
+        表示名 → (VOTING_RULES の方式名, パラメータ辞書)。指定しない場合は DEFAULT_METHODS
+    total_budget : float
+        配分する予算総額
+
+    Returns:
+    --------
+    dict
+        'methods' : 方式の表示名リスト (M,)
+        'tallies' : 得点 (M, 候補者数)
+        'budget_allocation' : 予算配分 (M, 候補者数)
+        'percentage' : 予算配分の割合（%） (M, 候補者数)
+        'gini' : 予算配分のジニ係数 (M,)
+        'lorenz_x', 'lorenz_y' : ローレンツ曲線 (候補者数+1,), (M, 候補者数+1)
+    """
+    if methods is None:
+        methods = DEFAULT_METHODS
+
+    ballots = np.asarray(ballots)
+
+    tallies = []
+    for name, (rule, params) in methods.items():
+        if rule not in VOTING_RULES:
+            raise ValueError(f"Unknown voting rule: {rule}")
+        tallies.append(VOTING_RULES[rule](ballots, **params))
+    tallies = np.vstack(tallies)
+
+    # 得点に比例した予算配分
+    totals = tallies.sum(axis=1, keepdims=True)
+    shares = np.divide(tallies, totals, out=np.zeros(tallies.shape), where=totals > 0)
+    budget_allocation = shares * total_budget
+
+    lorenz_x, lorenz_y = lorenz_curves(budget_allocation)
+
+    return {
+        'methods': list(methods.keys()),
+        'tallies': tallies,
+        'budget_allocation': budget_allocation,
+        'percentage': shares * 100,
+        'gini': gini_coefficients(budget_allocation),
+        'lorenz_x': lorenz_x,
+        'lorenz_y': lorenz_y
+    }
+
+def results_to_dataframe(results, candidate_names):
+    """evaluate_voting_methods() の結果を 方式×候補者 の長形式 DataFrame に変換する"""
+    num_methods = len(results['methods'])
+    num_candidates = len(candidate_names)
+
+    return pd.DataFrame({
+        'method': np.repeat(results['methods'], num_candidates),
+        'candidate_id': np.tile(np.arange(num_candidates), num_methods),
+        'title': np.tile(np.asarray(candidate_names), num_methods),
+        'votes': results['tallies'].ravel(),
+        'budget_allocation': results['budget_allocation'].ravel(),
+        'percentage': results['percentage'].ravel(),
+        'gini': np.repeat(results['gini'], num_candidates)
+    })
+
+def main():
+    """メイン処理"""
+    print("投票方式エンジンによる一括比較を実行中...")
+
+    candidates_df = pd.read_csv(os.path.join(ROOT_DIR, 'data', 'candidates.csv'))
+    _, ballots = load_ballot_matrix('votes.csv', len(candidates_df))
+
+    results = evaluate_voting_methods(ballots)
+
+    # 結果を保存
+    os.makedirs(OUTPUT_DATA_DIR, exist_ok=True)
+    os.makedirs(OUTPUT_REPORT_DIR, exist_ok=True)
+
+    results_df = results_to_dataframe(results, candidates_df['title_en'])
+    results_df.to_csv(os.path.join(OUTPUT_DATA_DIR, 'voting_method_engine_results.csv'), index=False)
+
+    with open(os.path.join(OUTPUT_REPORT_DIR, 'voting_method_engine_summary.txt'), 'w', encoding='utf-8') as f:
+        f.write("# Voting Method Engine: Budget Allocation by Method\n\n")
+        f.write("| Method | Gini | " + " | ".join(candidates_df['title_en']) + " |\n")
+        f.write("|---|---|" + "---|" * len(candidates_df) + "\n")
+
+        for m, method in enumerate(results['methods']):
+            shares = " | ".join(f"{p:.1f}%" for p in results['percentage'][m])
+            f.write(f"| {method} | {results['gini'][m]:.3f} | {shares} |\n")
+
+    for m, method in enumerate(results['methods']):
+        print(f"  {method}: Gini={results['gini'][m]:.3f}")
+
+    print("\n投票方式の一括比較が完了しました。結果は results/data, results/reports ディレクトリに保存されています。")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+シナリオファイル（JSON）に記述したパラメータグリッドで中立バイアス除去シミュレーションを一括実行するスクリプト
+
+シナリオファイルの形式:
+    {
+      "n_replicates": 1000,          # シナリオごとのレプリケート数
+      "seed": 42,                    # 乱数シード
+      "scenarios": [
+        {"family": "A", "grid": {"percentage": [0.1, 0.3, 0.5]}},
+        {"family": "C", "grid": {"threshold": [1.5, 2.0], "conversion_rate": [0.5]}}
+      ]
+    }
+
+grid の各パラメータのリストの直積を展開し、同一のパラメータセットは一度だけ実行する。
+結果は (scenario_id, candidate_id) を索引とする1つの表にまとめて保存する
+"""
+
+import os
+import sys
+import json
+import numbers
+import argparse
+import itertools
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+# ルートディレクトリへのパスを取得
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+sys.path.append(ROOT_DIR)
+
+from src.simulation.comparison.simulate_unbiased_voting import (
+    load_csv_data, scenario_a_masks, scenario_b_masks, scenario_c_masks, calculate_replicate_qv_results,
+    VOTE_STATS_FILE, VOTER_STATS_FILE, SIMULATION_OUTPUT_DIR, N_REPLICATES,
+    SCENARIO_B_PROBABILITIES, SCENARIO_C_THRESHOLD, SCENARIO_C_CONVERSION_RATE
+)
+from src.utils.rng import make_rng, stream_key, DEFAULT_SEED
+
+DEFAULT_SCENARIO_FILE = os.path.join(os.path.dirname(__file__), 'unbiased_voting_scenarios.json')
+DEFAULT_OUTPUT_FILE = os.path.join(SIMULATION_OUTPUT_DIR, 'scenario_batch_results.csv')
+
+# シナリオ系列ごとの既定パラメータ（grid で指定しなかったパラメータに使用）
+SCENARIO_DEFAULTS = {
+    'A': {'percentage': 0.3},
+    'B': {'probabilities': SCENARIO_B_PROBABILITIES},
+    'C': {'threshold': SCENARIO_C_THRESHOLD, 'conversion_rate': SCENARIO_C_CONVERSION_RATE}
+}
+
+def load_scenario_file(scenario_file):
+    """
+    シナリオファイルを読み込み、重複を除いたシナリオのリストに展開する
+
+    Parameters:
+    -----------
+    scenario_file : str
+        シナリオファイル（JSON）のパス
+
+    Returns:
+    --------
+    scenarios : list of dict
+        'scenario_id', 'family', 'params' を持つシナリオのリスト（ファイル内の出現順）
+    config : dict
+        シナリオファイル全体の設定（n_replicates, seed）
+    """
+    with open(scenario_file, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+
+    scenarios = []
+    seen = set()
+    for entry in config.get('scenarios', []):
+        family = entry['family']
+        if family not in SCENARIO_DEFAULTS:
+            raise ValueError(f"Unknown scenario family: {family}")
+
+        grid = entry.get('grid', {})
+        unknown = set(grid) - set(SCENARIO_DEFAULTS[family])
+        if unknown:
+            raise ValueError(f"Unknown parameters for scenario {family}: {sorted(unknown)}")
+
+        # パラメータリストの直積を展開
+        names = list(grid.keys())
+        for values in itertools.product(*(grid[name] for name in names)):
+            params = dict(SCENARIO_DEFAULTS[family])
+            params.update(zip(names, values))
+
+            # 同一のパラメータセットは一度だけ実行する
+            scenario_id = make_scenario_id(family, params)
+            if scenario_id in seen:
+                continue
+            seen.add(scenario_id)
+            scenarios.append({'scenario_id': scenario_id, 'family': family, 'params': params})
+
+    return scenarios, config
+
+def normalize_param_value(value):
+    """
+    シナリオIDに使うためにパラメータ値を正規化する
+
+    数値は float に揃える（2 と 2.0 を同じパラメータセットとして扱うため）。辞書・リストは要素ごとに正規化する
+    """
+    if isinstance(value, dict):
+        return {str(key): normalize_param_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize_param_value(item) for item in value]
+    if isinstance(value, numbers.Real) and not isinstance(value, bool):
+        return float(value)
+    return value
+
+def make_scenario_id(family, params):
+    """シナリオ系列とパラメータから一意なシナリオIDを作る（例: C|conversion_rate=0.5|threshold=1.5）"""
+    parts = [family]
+    for name in sorted(params):
+        value = normalize_param_value(params[name])
+        if isinstance(value, (dict, list)):
+            value = json.dumps(value, sort_keys=True, ensure_ascii=False)
+        parts.append(f"{name}={value}")
+
+    return '|'.join(parts)
+
+def run_scenario(scenario_id, family, params, votes_df, vote_stats, voter_stats, n_replicates, seed):
+    """
+    1つのシナリオを n_replicates 回実行し、候補者ごとの予算配分の分布を返す
+    （プロセスプールのワーカーで実行するためモジュールレベルで定義）
+
+    乱数はシナリオIDから決まる独立ストリームを使うため、シナリオの追加・並べ替えや並列数によらず
+    同じシナリオは同じ結果になる
+    """
+    rng = make_rng(seed, stream_key(scenario_id))
+
+    if family == 'A':
+        drop_masks = scenario_a_masks(votes_df, params['percentage'], n_replicates, rng)
+    elif family == 'B':
+        drop_masks = scenario_b_masks(votes_df, voter_stats, params['probabilities'], n_replicates, rng)
+    else:
+        drop_masks = scenario_c_masks(votes_df, vote_stats, params['threshold'], params['conversion_rate'], n_replicates, rng)
+
+    return calculate_replicate_qv_results(votes_df, drop_masks)
+
+def run_scenario_batch(scenario_file=DEFAULT_SCENARIO_FILE, n_jobs=None, output_file=DEFAULT_OUTPUT_FILE):
+    """
+    シナリオファイルの全シナリオをプロセスプールで実行し、1つの結果表にまとめて保存する
+
+    Parameters:
+    -----------
+    scenario_file : str
+        シナリオファイル（JSON）のパス
+    n_jobs : int
+        並列プロセス数（None の場合はCPUコア数、1 の場合は逐次実行）
+    output_file : str
+        結果表の保存先
+
+    Returns:
+    --------
+    pandas.DataFrame
+        (scenario_id, candidate_id) を索引とする結果表
+    """
+    if n_jobs is None:
+        n_jobs = os.cpu_count() or 1
+
+    scenarios, config = load_scenario_file(scenario_file)
+    n_replicates = config.get('n_replicates', N_REPLICATES)
+    seed = config.get('seed', DEFAULT_SEED)
+    print(f"{len(scenarios)}個のシナリオ（重複除去後）を {n_replicates} 回ずつ実行します...")
+
+    # データ読み込み
+    candidates_df, votes_df = load_csv_data()
+    vote_stats = pd.read_csv(VOTE_STATS_FILE)
+    voter_stats = pd.read_csv(VOTER_STATS_FILE, index_col='voter_id')
+
+    tasks = [
+        (scenario['scenario_id'], scenario['family'], scenario['params'], votes_df, vote_stats, voter_stats,
+         n_replicates, seed)
+        for scenario in scenarios
+    ]
+
+    if n_jobs > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            scenario_results = list(executor.map(run_scenario, *zip(*tasks)))
+    else:
+        scenario_results = [run_scenario(*task) for task in tasks]
+
+    # 1つの表にまとめる
+    frames = []
+    for scenario, results in zip(scenarios, scenario_results):
+        results = results.reset_index()
+        results.insert(0, 'scenario_id', scenario['scenario_id'])
+        results.insert(1, 'family', scenario['family'])
+        for name, value in scenario['params'].items():
+            results[name] = json.dumps(value, sort_keys=True, ensure_ascii=False) if isinstance(value, dict) else value
+        frames.append(results)
+
+    batch_results = pd.concat(frames, ignore_index=True)
+    batch_results = batch_results.merge(candidates_df[['candidate_id', 'name']], on='candidate_id', how='left')
+    batch_results = batch_results.set_index(['scenario_id', 'candidate_id'])
+
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    batch_results.to_csv(output_file)
+    print(f"Saved: {output_file}")
+
+    return batch_results
+
+def main():
+    parser = argparse.ArgumentParser(description='シナリオファイルに基づく中立バイアス除去シミュレーションの一括実行')
+    parser.add_argument('--scenarios', default=DEFAULT_SCENARIO_FILE, help='シナリオファイル（JSON）のパス')
+    parser.add_argument('--n-jobs', '-j', type=int, default=None, help='並列プロセス数 (デフォルト: CPUコア数)')
+    parser.add_argument('--output', '-o', default=DEFAULT_OUTPUT_FILE, help='結果表の保存先')
+    args = parser.parse_args()
+
+    run_scenario_batch(args.scenarios, args.n_jobs, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -6,9 +6,17 @@
 """
 
 import os
+import sys
 import pandas as pd
 import numpy as np
-import random
+
+# ルートディレクトリへのパスを取得
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+sys.path.append(ROOT_DIR)
+
+from src.utils.ballot_matrix import long_to_ballot_matrix
+from src.utils.qv_allocation import allocate_qv_budget
+from src.utils.rng import as_generator, make_rng, stream_key, DEFAULT_SEED
 
 # Define file paths
 ANALYSIS_OUTPUT_DIR = 'results/data'
@@ -74,106 +82,186 @@ def load_csv_data():
     
     return candidates_df, votes_long_df
 
-def simulate_scenario_a(votes_df, percentage):
-    """シナリオA: 一定割合の1票を0票に変換"""
-    simulated_votes_df = votes_df.copy()
+# 複数回試行（レプリケート）の回数と出力する分位点
+N_REPLICATES = 1000
+REPLICATE_QUANTILES = (0.05, 0.5, 0.95)
+
+def select_within_segments(segment_codes, num_selected, n_replicates=1, rng=None):
+    """
+    セグメントごとに決まった数の行を非復元抽出で選ぶ（全レプリケートを一括処理）
     
-    # 1票のインデックスを取得
-    one_vote_indices = simulated_votes_df[simulated_votes_df['vote_value'] == 1].index
+    行ごとの一様乱数キーにセグメント番号を足して並べ替えると、各レプリケートで
+    セグメント→キーの順に並ぶ。セグメント内での順位が選択数未満の行を選択する
     
-    # 変換する1票の数
-    num_to_convert = int(len(one_vote_indices) * percentage)
+    Parameters:
+    -----------
+    segment_codes : numpy.ndarray
+        行ごとのセグメント番号 (行数,)。-1 の行は選択対象外
+    num_selected : numpy.ndarray
+        セグメントごとの選択数 (セグメント数,)
+    n_replicates : int
+        レプリケート数
+    rng : numpy.random.Generator, int or None
+        乱数生成器またはシード（None の場合は DEFAULT_SEED）
+        
+    Returns:
+    --------
+    numpy.ndarray
+        選択された行を True とするマスク (レプリケート数, 行数)
+    """
+    rng = as_generator(rng)
     
-    # ランダムに変換するインデックスを選択
-    indices_to_convert = random.sample(list(one_vote_indices), num_to_convert)
+    segment_codes = np.asarray(segment_codes)
+    num_selected = np.asarray(num_selected)
+    eligible = np.flatnonzero(segment_codes >= 0)
+    codes = segment_codes[eligible]
     
-    # 選択された1票を0票に変換（実質的に削除）
-    simulated_votes_df = simulated_votes_df.drop(indices_to_convert)
+    # セグメントごとの開始位置（セグメント番号順に並べたとき）
+    counts = np.bincount(codes, minlength=len(num_selected))
+    segment_start = np.concatenate([[0], np.cumsum(counts)[:-1]])
     
-    return simulated_votes_df
-
-def simulate_scenario_b(votes_df, voter_stats, probabilities):
-    """シナリオB: 投票者のパターンに応じて1票を0票に変換"""
-    simulated_votes_df = votes_df.copy()
-    indices_to_drop = []
+    # レプリケートごとにセグメント→乱数キーの順に並べ、セグメント内の順位を求める
+    keys = codes + rng.random((n_replicates, len(eligible)))
+    ranks = keys.argsort(axis=1).argsort(axis=1)
+    position = ranks - segment_start[codes]
     
-    for voter_id, stats in voter_stats.iterrows():
-        voter_pattern = stats['vote_pattern']
-        conversion_prob = probabilities.get(voter_pattern, 0) # パターンが見つからない場合は0
-        
-        # この投票者の1票を取得
-        voter_one_votes = simulated_votes_df[
-            (simulated_votes_df['voter_id'] == voter_id) & 
-            (simulated_votes_df['vote_value'] == 1)
-        ]
-        
-        for index, vote in voter_one_votes.iterrows():
-            if random.random() < conversion_prob:
-                indices_to_drop.append(index)
+    selected = np.zeros((n_replicates, len(segment_codes)), dtype=bool)
+    selected[:, eligible] = position < num_selected[codes]
     
-    # 選択された1票を削除
-    simulated_votes_df = simulated_votes_df.drop(indices_to_drop)
+    return selected
+
+def scenario_a_masks(votes_df, percentage, n_replicates=1, rng=None):
+    """シナリオA: 全ての1票から一定割合を選ぶ変換マスク (レプリケート数, 行数)"""
+    is_one_vote = (votes_df['vote_value'] == 1).to_numpy()
+    segment_codes = np.where(is_one_vote, 0, -1)
+    num_to_convert = np.array([int(is_one_vote.sum() * percentage)])
     
-    return simulated_votes_df
+    return select_within_segments(segment_codes, num_to_convert, n_replicates, rng)
 
-def simulate_scenario_c(votes_df, vote_stats, threshold, conversion_rate):
-    """シナリオC: プロジェクトの1票比率に応じて1票を0票に変換"""
-    simulated_votes_df = votes_df.copy()
-    indices_to_drop = []
+def scenario_b_masks(votes_df, voter_stats, probabilities, n_replicates=1, rng=None):
+    """シナリオB: 投票者パターンごとの変換確率で1票を選ぶ変換マスク (レプリケート数, 行数)"""
+    rng = as_generator(rng)
+    
+    # 投票者ごとの変換確率を1票の行に結合（パターンが見つからない場合は0）
+    voter_probabilities = voter_stats['vote_pattern'].map(probabilities).fillna(0)
+    voter_probabilities = voter_probabilities[~voter_probabilities.index.duplicated()]
+    row_probabilities = votes_df['voter_id'].map(voter_probabilities).fillna(0).to_numpy()
+    row_probabilities = np.where(votes_df['vote_value'].to_numpy() == 1, row_probabilities, 0)
     
+    # 一度のベルヌーイ試行で全レプリケート分を選択
+    return rng.random((n_replicates, len(votes_df))) < row_probabilities
+
+def scenario_c_masks(votes_df, vote_stats, threshold, conversion_rate, n_replicates=1, rng=None):
+    """シナリオC: 1票比率が高いプロジェクトの1票から一定割合を選ぶ変換マスク (レプリケート数, 行数)"""
     # 平均1票比率を計算
     mean_one_vote_percentage = vote_stats['one_vote_percentage'].mean()
     
     # 1票比率が高いプロジェクトを特定
-    high_bias_projects = vote_stats[vote_stats['one_vote_percentage'] > mean_one_vote_percentage * threshold]
+    # （analyze_vote_patterns.py の出力は candidate_id 列を持たず、候補者ID順に並んでいる）
+    if 'candidate_id' in vote_stats.columns:
+        project_ids = vote_stats['candidate_id'].to_numpy()
+    else:
+        project_ids = vote_stats.index.to_numpy()
+    high_bias_projects = project_ids[(vote_stats['one_vote_percentage'] > mean_one_vote_percentage * threshold).to_numpy()]
     
-    for _, project in high_bias_projects.iterrows():
-        project_id = project['candidate_id']
-        
-        # このプロジェクトへの1票を取得
-        project_one_votes = simulated_votes_df[
-            (simulated_votes_df['candidate_id'] == project_id) &
-            (simulated_votes_df['vote_value'] == 1)
-        ]
-        
-        # 変換する1票の数
-        num_to_convert = int(len(project_one_votes) * conversion_rate)
-        
-        # ランダムに変換するインデックスを選択（十分な票数があれば）
-        if len(project_one_votes) > 0:
-            # 最大でも利用可能な数だけ選択
-            num_to_convert = min(num_to_convert, len(project_one_votes))
-            indices_to_convert = random.sample(list(project_one_votes.index), num_to_convert)
-            indices_to_drop.extend(indices_to_convert)
-        
-    # 重複を除去して削除
-    simulated_votes_df = simulated_votes_df.drop(list(set(indices_to_drop)))
+    # 対象プロジェクトの1票にセグメント番号を割り当て、プロジェクトごとに一定割合を選択
+    is_one_vote = (votes_df['vote_value'] == 1).to_numpy()
+    project_codes = pd.Index(high_bias_projects).get_indexer(votes_df['candidate_id'])
+    segment_codes = np.where(is_one_vote, project_codes, -1)
+    one_vote_counts = np.bincount(segment_codes[segment_codes >= 0], minlength=len(high_bias_projects))
+    num_to_convert = (one_vote_counts * conversion_rate).astype(int)
     
-    return simulated_votes_df
+    return select_within_segments(segment_codes, num_to_convert, n_replicates, rng)
+
+def simulate_scenario_a(votes_df, percentage, rng=None):
+    """シナリオA: 一定割合の1票を0票に変換"""
+    # 選択された1票を0票に変換（実質的に削除）
+    return votes_df[~scenario_a_masks(votes_df, percentage, rng=rng)[0]].copy()
+
+def simulate_scenario_b(votes_df, voter_stats, probabilities, rng=None):
+    """シナリオB: 投票者のパターンに応じて1票を0票に変換"""
+    # 選択された1票を削除
+    return votes_df[~scenario_b_masks(votes_df, voter_stats, probabilities, rng=rng)[0]].copy()
+
+def simulate_scenario_c(votes_df, vote_stats, threshold, conversion_rate, rng=None):
+    """シナリオC: プロジェクトの1票比率に応じて1票を0票に変換"""
+    # 選択された1票を削除
+    return votes_df[~scenario_c_masks(votes_df, vote_stats, threshold, conversion_rate, rng=rng)[0]].copy()
 
 def calculate_qv_results(votes_df):
     """QV方式の予算配分を計算"""
-    # 各投票のコスト（= vote_value）とsqrt(cost)
-    votes_df['cost'] = votes_df['vote_value']
-    votes_df['sqrt_cost'] = np.sqrt(votes_df['cost'])
+    # 投票行列に変換し、共通カーネルで sqrt(cost)（cost = vote_value）に比例した配分を計算 (仮の総予算を1とする)
+    # 入力の votes_df は変更しない
+    _, ballots = long_to_ballot_matrix(votes_df)
+    allocation = allocate_qv_budget(ballots, score='sqrt_votes', total_budget=1.0)
+    
+    # 投票データに含まれるプロジェクトのみを結果に含める
+    candidate_ids = np.sort(votes_df['candidate_id'].unique())
+    
+    # DataFrameにまとめる
+    qv_results = pd.DataFrame({
+        'total_sqrt_cost': allocation['total_score'][0, candidate_ids],
+        'budget_allocation_ratio': allocation['budget_allocation'][0, candidate_ids]
+    }, index=pd.Index(candidate_ids, name='candidate_id'))
+    
+    return qv_results
+
+def calculate_replicate_qv_results(votes_df, drop_masks, quantiles=REPLICATE_QUANTILES):
+    """
+    レプリケートごとの変換マスクから予算配分の分布を一括で計算する
     
-    # プロジェクトごとのsqrt(cost)の合計
-    project_scores = votes_df.groupby('candidate_id')['sqrt_cost'].sum()
+    長形式の各行を「1票だけを持つ投票用紙」とみなし、残った行のマスクを重みとして
+    共通カーネルで全レプリケートの配分をまとめて計算する
     
-    # 全体のsqrt(cost)の合計
-    total_score = project_scores.sum()
+    Parameters:
+    -----------
+    votes_df : pandas.DataFrame
+        投票データ（長形式）
+    drop_masks : numpy.ndarray
+        変換（削除）する行を True とするマスク (レプリケート数, 行数)
+    quantiles : tuple of float
+        出力する分位点
+        
+    Returns:
+    --------
+    pandas.DataFrame
+        候補者ごとの予算配分比率の平均・標準偏差・分位点
+    """
+    candidate_ids = np.sort(votes_df['candidate_id'].unique())
+    row_candidates = np.searchsorted(candidate_ids, votes_df['candidate_id'].to_numpy())
     
-    # 予算配分計算 (仮の総予算を1とする)
-    budget_allocation = (project_scores / total_score) if total_score > 0 else pd.Series(0, index=project_scores.index)
+    # 行×候補者の投票行列と、レプリケートごとの重みマスク
+    row_ballots = np.zeros((len(votes_df), len(candidate_ids)))
+    row_ballots[np.arange(len(votes_df)), row_candidates] = votes_df['vote_value'].to_numpy()
+    keep = (~np.asarray(drop_masks)).astype(float)
+    masks = keep[:, :, np.newaxis] * (row_ballots != 0)
+    
+    allocation = allocate_qv_budget(row_ballots, masks=masks, score='sqrt_votes', total_budget=1.0)
+    ratios = allocation['budget_allocation']
     
     # DataFrameにまとめる
     qv_results = pd.DataFrame({
-        'total_sqrt_cost': project_scores,
-        'budget_allocation_ratio': budget_allocation
-    })
+        'n_replicates': len(ratios),
+        'budget_allocation_ratio_mean': ratios.mean(axis=0),
+        'budget_allocation_ratio_std': ratios.std(axis=0)
+    }, index=pd.Index(candidate_ids, name='candidate_id'))
+    for q, values in zip(quantiles, np.quantile(ratios, quantiles, axis=0)):
+        qv_results[f'budget_allocation_ratio_q{int(round(q * 100)):02d}'] = values
     
     return qv_results
 
+def save_replicate_results(votes_df, drop_masks, candidates_df, scenario_name, output_dir):
+    """レプリケートの集計結果を保存"""
+    replicate_results = calculate_replicate_qv_results(votes_df, drop_masks)
+    replicate_results = replicate_results.merge(
+        candidates_df[['candidate_id', 'name']],  # 候補者IDと名前の列を使用
+        left_index=True,
+        right_on='candidate_id'
+    ).set_index('name')
+    filename = f"qv_results_{scenario_name}_replicates.csv"
+    replicate_results.to_csv(os.path.join(output_dir, filename))
+    print(f"Saved: {filename}")
+
 def save_simulation_results(df, scenario_name, output_dir):
     """シミュレーション結果を保存"""
     filename = f"simulation_{scenario_name}_votes.csv"
@@ -207,7 +295,7 @@ def main():
     for percentage in SCENARIO_A_PERCENTAGES:
         scenario_name = f"A_pct{int(percentage*100)}"
         print(f"Running {scenario_name}...")
-        simulated_df_a = simulate_scenario_a(votes_df, percentage)
+        simulated_df_a = simulate_scenario_a(votes_df, percentage, rng=make_rng(DEFAULT_SEED, stream_key(scenario_name)))
         save_simulation_results(simulated_df_a, scenario_name, SIMULATION_OUTPUT_DIR)
         # 配分計算も行う場合
         qv_results_a = calculate_qv_results(simulated_df_a)
@@ -218,12 +306,19 @@ def main():
         ).set_index('name')
         qv_results_a.to_csv(os.path.join(SIMULATION_OUTPUT_DIR, f"qv_results_{scenario_name}.csv"))
         print(f"Saved: qv_results_{scenario_name}.csv")
+        # 複数回試行による配分の分布
+        save_replicate_results(
+            votes_df, scenario_a_masks(votes_df, percentage, N_REPLICATES, make_rng(DEFAULT_SEED, stream_key(scenario_name))),
+            candidates_df, scenario_name, SIMULATION_OUTPUT_DIR
+        )
 
     # シナリオBのシミュレーション実行と保存
     print("\n--- シナリオB --- (投票者パターンに応じて1票を0票に変換)")
     scenario_name_b = "B_voter_pattern"
     print(f"Running {scenario_name_b}...")
-    simulated_df_b = simulate_scenario_b(votes_df, voter_stats, SCENARIO_B_PROBABILITIES)
+    simulated_df_b = simulate_scenario_b(
+        votes_df, voter_stats, SCENARIO_B_PROBABILITIES, rng=make_rng(DEFAULT_SEED, stream_key(scenario_name_b))
+    )
     save_simulation_results(simulated_df_b, scenario_name_b, SIMULATION_OUTPUT_DIR)
     qv_results_b = calculate_qv_results(simulated_df_b)
     qv_results_b = qv_results_b.merge(
@@ -233,13 +328,19 @@ def main():
     ).set_index('name')
     qv_results_b.to_csv(os.path.join(SIMULATION_OUTPUT_DIR, f"qv_results_{scenario_name_b}.csv"))
     print(f"Saved: qv_results_{scenario_name_b}.csv")
+    save_replicate_results(
+        votes_df, scenario_b_masks(votes_df, voter_stats, SCENARIO_B_PROBABILITIES, N_REPLICATES,
+                                   make_rng(DEFAULT_SEED, stream_key(scenario_name_b))),
+        candidates_df, scenario_name_b, SIMULATION_OUTPUT_DIR
+    )
     
     # シナリオCのシミュレーション実行と保存
     print("\n--- シナリオC --- (1票比率が高いプロジェクトの1票を変換)")
     scenario_name_c = f"C_threshold{SCENARIO_C_THRESHOLD}_rate{int(SCENARIO_C_CONVERSION_RATE*100)}"
     print(f"Running {scenario_name_c}...")
     simulated_df_c = simulate_scenario_c(
-        votes_df, vote_stats, SCENARIO_C_THRESHOLD, SCENARIO_C_CONVERSION_RATE
+        votes_df, vote_stats, SCENARIO_C_THRESHOLD, SCENARIO_C_CONVERSION_RATE,
+        rng=make_rng(DEFAULT_SEED, stream_key(scenario_name_c))
     )
     save_simulation_results(simulated_df_c, scenario_name_c, SIMULATION_OUTPUT_DIR)
     qv_results_c = calculate_qv_results(simulated_df_c)
@@ -250,6 +351,11 @@ def main():
     ).set_index('name')
     qv_results_c.to_csv(os.path.join(SIMULATION_OUTPUT_DIR, f"qv_results_{scenario_name_c}.csv"))
     print(f"Saved: qv_results_{scenario_name_c}.csv")
+    save_replicate_results(
+        votes_df, scenario_c_masks(votes_df, vote_stats, SCENARIO_C_THRESHOLD, SCENARIO_C_CONVERSION_RATE, N_REPLICATES,
+                                   make_rng(DEFAULT_SEED, stream_key(scenario_name_c))),
+        candidates_df, scenario_name_c, SIMULATION_OUTPUT_DIR
+    )
 
     print("\nシミュレーション完了！ 結果は simulation_results ディレクトリに保存されました。")
 
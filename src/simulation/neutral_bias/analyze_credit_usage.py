@@ -124,91 +124,58 @@ def translate_text(text, translation_dict=None):
     
     return translation_dict.get(text, text)  # Return original if no translation
 
+TOTAL_CREDITS = 99  # 割り当てられた総クレジット
+REMAINING_CATEGORIES = ["0", "1-4", "5-7", "8-9", "10+"]  # 残クレジットのカテゴリ
+REMAINING_CATEGORY_BINS = [4, 7, 9]  # 残クレジット1以上のカテゴリの上限（np.digitize 用）
+
 def analyze_credit_usage(votes_df, candidates_df):
     """クレジット使用状況を分析"""
-    # 各投票者のクレジット使用状況を集計
-    total_credits = 99  # 割り当てられた総クレジット
-    voter_credit_usage = []
-
-    for voter_id in votes_df['voter_id'].unique():
-        voter_votes = []
-        for i in range(len(candidates_df)):
-            col_name = f'candidate_{i}'
-            if col_name in votes_df.columns:
-                # この投票者の該当列の値を取得（NaNの場合もある）
-                vote_values = votes_df.loc[votes_df['voter_id'] == voter_id, col_name].values
-                if len(vote_values) > 0 and not pd.isna(vote_values[0]):
-                    # フィルター: 負の値は除外
-                    if vote_values[0] >= 0:
-                        voter_votes.append(vote_values[0])
-        
-        # 使用クレジット計算（票の二乗の合計）
-        credits_used = sum([vote**2 for vote in voter_votes])
-        remaining_credits = total_credits - credits_used
-        
-        voter_credit_usage.append({
-            'voter_id': voter_id,
-            'credits_used': credits_used,
-            'usage_rate': credits_used / total_credits * 100,
-            'remaining_credits': remaining_credits,
-            'voted_projects': len(voter_votes),
-            'unused_projects': len(candidates_df) - len(voter_votes)
-        })
-
-    # データフレームに変換
-    credit_df = pd.DataFrame(voter_credit_usage)
+    # 各投票者の最初の投票行を投票者×候補者の行列として扱う
+    voter_rows = votes_df.drop_duplicates('voter_id', keep='first')
+    columns = [f'candidate_{i}' for i in range(len(candidates_df)) if f'candidate_{i}' in votes_df.columns]
+    ballots = voter_rows[columns]
+    
+    # 欠損値と負の値は投票に含めない
+    valid = ballots.ge(0)
+    
+    # 使用クレジット計算（票の二乗の行和）
+    credits_used = ballots.where(valid, 0).pow(2).sum(axis=1).to_numpy()
+    voted_projects = valid.sum(axis=1).to_numpy()
+    
+    credit_df = pd.DataFrame({
+        'voter_id': voter_rows['voter_id'].to_numpy(),
+        'credits_used': credits_used,
+        'usage_rate': credits_used / TOTAL_CREDITS * 100,
+        'remaining_credits': TOTAL_CREDITS - credits_used,
+        'voted_projects': voted_projects,
+        'unused_projects': len(candidates_df) - voted_projects
+    })
     return credit_df
 
 def analyze_potential_votes(credit_df, candidates_df):
     """残クレジットで追加投票可能だったケースを分析"""
-    # 残クレジットで投票可能だったユーザーを特定
-    potential_voters = []
-    
-    for _, voter in credit_df.iterrows():
-        remaining_credits = voter['remaining_credits']
-        
-        # Here is the key change: ensure we have a valid number of unused projects
-        # In this case, let's assume all projects are available for additional voting
-        # If your actual data has unused_projects field that's valid, use that instead
-        total_projects = len(candidates_df)
-        unused_projects = total_projects  # We're assuming all projects could receive more votes
-        
-        # 残クレジットで可能な最大追加投票数（整数）
-        max_additional_votes = int(remaining_credits ** 0.5)
-        
-        # 追加で投票できる最大プロジェクト数（未投票プロジェクト数と残クレジットで1点ずつ投票できる数の最小値）
-        max_additional_projects = min(unused_projects, int(remaining_credits))
-        
-        # 残クレジットによる追加可能投票値のカテゴリ
-        remaining_category = categorize_remaining_credits(remaining_credits)
-        
-        # 未投票プロジェクトがあり、かつ最低1票は投じられるケース
-        if remaining_credits >= 1:
-            potential_voters.append({
-                'voter_id': voter['voter_id'],
-                'remaining_credits': remaining_credits,
-                'max_possible_additional_votes': max_additional_votes,
-                'max_additional_projects': max_additional_projects,
-                'unused_projects': unused_projects,
-                'credits_used': voter['credits_used'],
-                'usage_rate': voter['usage_rate'],
-                'remaining_category': remaining_category
-            })
-        else:
-            # 残クレジットが1未満だが、分析のために追加
-            potential_voters.append({
-                'voter_id': voter['voter_id'],
-                'remaining_credits': remaining_credits,
-                'max_possible_additional_votes': 0,
-                'max_additional_projects': 0, 
-                'unused_projects': unused_projects,
-                'credits_used': voter['credits_used'],
-                'usage_rate': voter['usage_rate'],
-                'remaining_category': remaining_category
-            })
-    
-    # データフレームに変換
-    potential_df = pd.DataFrame(potential_voters)
+    remaining_credits = credit_df['remaining_credits'].to_numpy()
+    can_vote = remaining_credits >= 1
+    
+    # In this case, let's assume all projects are available for additional voting
+    total_projects = len(candidates_df)
+    
+    # 残クレジットで可能な最大追加投票数（整数）と、1点ずつ投票できる最大プロジェクト数
+    # （残クレジットが1未満の投票者は0）
+    safe_remaining = np.where(can_vote, remaining_credits, 0)
+    max_additional_votes = np.floor(np.sqrt(safe_remaining)).astype(int)
+    max_additional_projects = np.minimum(total_projects, np.floor(safe_remaining)).astype(int)
+    
+    potential_df = pd.DataFrame({
+        'voter_id': credit_df['voter_id'].to_numpy(),
+        'remaining_credits': remaining_credits,
+        'max_possible_additional_votes': max_additional_votes,
+        'max_additional_projects': max_additional_projects,
+        'unused_projects': total_projects,
+        'credits_used': credit_df['credits_used'].to_numpy(),
+        'usage_rate': credit_df['usage_rate'].to_numpy(),
+        'remaining_category': categorize_remaining_credits(remaining_credits)
+    })
     
     # 残クレジット範囲ごとの分析結果を計算
     remaining_analysis = analyze_remaining_credits_distribution(potential_df)
@@ -216,17 +183,53 @@ def analyze_potential_votes(credit_df, candidates_df):
     return potential_df, remaining_analysis
 
 def categorize_remaining_credits(remaining):
-    """残クレジットをカテゴライズ"""
-    if remaining < 1:
-        return "0"
-    elif remaining <= 4:
-        return "1-4"
-    elif remaining <= 7:
-        return "5-7"
-    elif remaining <= 9:
-        return "8-9"
-    else:
-        return "10+"
+    """残クレジットをカテゴライズ（スカラーまたは配列）"""
+    remaining = np.asarray(remaining)
+    index = np.where(remaining < 1, 0, np.digitize(remaining, REMAINING_CATEGORY_BINS, right=True) + 1)
+    categories = np.array(REMAINING_CATEGORIES, dtype=object)[index]
+    
+    return categories if categories.ndim > 0 else categories.item()
+
+def unused_credits_distribution(ballots, total_credits=TOTAL_CREDITS):
+    """
+    投票行列から、投票者ごとの未使用クレジットの分布を計算する
+    
+    負の票はクレジット計算に含めない（analyze_credit_usage() と同じ扱い）。
+    行和と np.bincount だけで計算するため、数百万人規模の投票者でも高速に集計できる
+    
+    Parameters:
+    -----------
+    ballots : numpy.ndarray
+        投票者×候補者の投票行列（欠損値は0票）
+    total_credits : int
+        1人あたりのクレジット
+    
+    Returns:
+    --------
+    pandas.DataFrame
+        未使用クレジット（0〜total_credits）ごとの投票者数・割合・累積割合。
+        クレジットを超過した投票者は、analyze_credit_usage() の remaining_credits と同じ
+        負の未使用クレジット（超過分）の行に数える（超過した投票者がいる値のみ、表の先頭）
+    """
+    ballots = np.asarray(ballots)
+    credits_used = (np.clip(ballots, 0, None).astype(np.int64) ** 2).sum(axis=1)
+    remaining = total_credits - credits_used
+    over_budget = remaining < 0
+    
+    # 予算内の投票者は 0〜total_credits のすべての値、超過した投票者は現れた負の値だけ
+    over_values, over_counts = np.unique(remaining[over_budget], return_counts=True)
+    unused_credits = np.concatenate([over_values, np.arange(total_credits + 1)])
+    counts = np.concatenate([over_counts, np.bincount(remaining[~over_budget], minlength=total_credits + 1)])
+    
+    total_voters = counts.sum()
+    percentages = counts / total_voters * 100 if total_voters > 0 else np.zeros(len(counts))
+    
+    return pd.DataFrame({
+        'unused_credits': unused_credits,
+        'voters': counts,
+        'percentage': percentages,
+        'cumulative_percentage': np.cumsum(percentages)
+    })
 
 def analyze_remaining_credits_distribution(potential_df):
     """残クレジットの分布を詳細に分析"""
@@ -243,7 +246,7 @@ def analyze_remaining_credits_distribution(potential_df):
     remaining_8_9_pct = remaining_8_9 / total_voters * 100
     
     # カテゴリ別の分析
-    categories = ["0", "1-4", "5-7", "8-9", "10+"]
+    categories = REMAINING_CATEGORIES
     category_counts = potential_df['remaining_category'].value_counts().reindex(categories, fill_value=0)
     category_percentages = (category_counts / total_voters * 100).round(2)
     
@@ -471,6 +474,12 @@ def main():
     potential_count = len(potential_df[potential_df['max_possible_additional_votes'] > 0])
     print(f"{translate_text('追加投票可能性の分析完了')}: {potential_count}{translate_text('名が追加投票可能だった')}")
     
+    # 未使用クレジットの分布
+    voter_rows = votes_df.drop_duplicates('voter_id', keep='first')
+    columns = [f'candidate_{i}' for i in range(len(candidates_df)) if f'candidate_{i}' in votes_df.columns]
+    unused_df = unused_credits_distribution(voter_rows[columns].fillna(0).to_numpy())
+    unused_df.to_csv(f'{output_dir}/unused_credits_distribution.csv', index=False)
+    
     # 可視化
     generate_visualizations(credit_df, potential_df, remaining_analysis)
     print(translate_text("可視化グラフの生成完了"))
@@ -3,9 +3,16 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
+import sys
 from scipy import stats
 import matplotlib.ticker as mtick
 
+# ルートディレクトリへのパスを取得
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+sys.path.append(ROOT_DIR)
+
+from src.utils.vote_histogram import VoteHistogram
+
 # ディレクトリ設定
 VOTES_FILE = 'data/votes.csv'  
 CANDIDATES_FILE = 'data/candidates.csv'
@@ -54,13 +61,14 @@ def load_and_transform_data():
     
     return candidates_df, votes_long
 
-def analyze_vote_distribution(votes_df, candidates_df):
-    """Analyze the distribution of votes"""
+def analyze_vote_distribution(votes_df, candidates_df, vote_histogram=None):
+    """Analyze the distribution of votes (statistics are read from the candidate x vote-value count table)"""
+    if vote_histogram is None:
+        vote_histogram = VoteHistogram.from_long(votes_df)
+    
     # Basic statistics
-    vote_stats = votes_df.groupby('candidate_id')['vote_value'].agg([
-        'count', 'mean', 'std', 'min', 'max', 
-        lambda x: x.value_counts().get(1, 0)  # Count of 1-point votes
-    ]).rename(columns={'<lambda_0>': 'one_vote_count'})
+    vote_stats = vote_histogram.describe()
+    vote_stats['one_vote_count'] = vote_histogram.count_of(1)[vote_stats.index]  # Count of 1-point votes
     
     # Add candidate names
     if 'title' in candidates_df.columns:
@@ -107,10 +115,13 @@ def analyze_voter_patterns(votes_df):
     
     return voter_stats
 
-def detect_neutral_bias(votes_df, vote_stats):
+def detect_neutral_bias(votes_df, vote_stats, vote_histogram=None):
     """Detect neutral bias patterns"""
+    if vote_histogram is None:
+        vote_histogram = VoteHistogram.from_long(votes_df)
+    
     # Overall vote distribution
-    vote_dist = votes_df['vote_value'].value_counts().sort_index()
+    vote_dist = vote_histogram.value_counts()
     vote_dist_pct = vote_dist / vote_dist.sum() * 100
     
     # 投票値ごとのコスト（1票=1クレジット、9票=81クレジット）
@@ -377,10 +388,13 @@ def main():
     # Load and transform data
     candidates_df, votes_df = load_and_transform_data()
     
+    # Candidate x vote-value count table, shared by the vote statistics and the bias detection
+    vote_histogram = VoteHistogram.from_long(votes_df)
+    
     # Run analysis
-    vote_stats = analyze_vote_distribution(votes_df, candidates_df)
+    vote_stats = analyze_vote_distribution(votes_df, candidates_df, vote_histogram)
     voter_stats = analyze_voter_patterns(votes_df)
-    bias_results = detect_neutral_bias(votes_df, vote_stats)
+    bias_results = detect_neutral_bias(votes_df, vote_stats, vote_histogram)
     
     # Visualizations
     plot_vote_distribution(
@@ -6,17 +6,25 @@
 """
 
 import os
+import sys
 import pandas as pd
 import numpy as np
-import random
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+# ルートディレクトリへのパスを取得
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+sys.path.append(ROOT_DIR)
+
+from src.utils.ballot_matrix import long_to_ballot_matrix
+from src.utils.qv_allocation import allocate_qv_budget
+from src.utils.rng import DEFAULT_SEED
+
 class BiasSimulatorBase:
     """中立バイアスシミュレーションの基本クラス"""
     
     def __init__(self, votes_file='data/votes.csv', candidates_file='data/candidates.csv', 
-                 output_dir='results/bias_simulation'):
+                 output_dir='results/bias_simulation', seed=DEFAULT_SEED):
         """
         初期化
         
@@ -28,10 +36,13 @@ class BiasSimulatorBase:
             候補者データのファイルパス
         output_dir : str
             出力ディレクトリ
+        seed : int
+            乱数シード（シミュレーションごとの乱数ストリームはこのシードから作る）
         """
         self.votes_file = votes_file
         self.candidates_file = candidates_file
         self.output_dir = output_dir
+        self.seed = seed
         
         # 出力ディレクトリの作成
         os.makedirs(output_dir, exist_ok=True)
@@ -139,25 +150,18 @@ class BiasSimulatorBase:
         if votes_long_df is None:
             votes_long_df = self.votes_long_df
         
-        # 各投票のコスト（= vote_value）とsqrt(cost)
-        votes_long_df = votes_long_df.copy()
-        votes_long_df['cost'] = votes_long_df['vote_value']
-        votes_long_df['sqrt_cost'] = np.sqrt(votes_long_df['cost'])
-        
-        # プロジェクトごとのsqrt(cost)の合計
-        project_scores = votes_long_df.groupby('candidate_id')['sqrt_cost'].sum()
-        
-        # 全体のsqrt(cost)の合計
-        total_score = project_scores.sum()
+        # 投票行列に変換し、共通カーネルで sqrt(cost)（cost = vote_value）に比例した配分を計算 (総予算を1とする)
+        _, ballots = long_to_ballot_matrix(votes_long_df)
+        allocation = allocate_qv_budget(ballots, score='sqrt_votes', total_budget=1.0)
         
-        # 予算配分計算 (総予算を1とする)
-        budget_allocation = (project_scores / total_score) if total_score > 0 else pd.Series(0, index=project_scores.index)
+        # 投票データに含まれる候補者のみを結果に含める
+        candidate_ids = np.sort(votes_long_df['candidate_id'].unique())
         
         # DataFrameにまとめる
         qv_results = pd.DataFrame({
-            'candidate_id': project_scores.index,
-            'total_sqrt_cost': project_scores.values,
-            'budget_allocation_ratio': budget_allocation.values
+            'candidate_id': candidate_ids,
+            'total_sqrt_cost': allocation['total_score'][0, candidate_ids],
+            'budget_allocation_ratio': allocation['budget_allocation'][0, candidate_ids]
         })
         
         # 候補者名を追加
@@ -0,0 +1,228 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Maximum-likelihood fitting of the utility maximization models to the observed vote-value distribution
+
+For each model, the vote-value probabilities p(v | theta) are precomputed once on a parameter grid
+(one large simulation per grid point, all grid points sharing the same random stream so the table is
+smooth in theta). The multinomial log-likelihood sum_v n_v log p(v | theta) is then evaluated by
+interpolating the table and maximized with a bounded optimizer, so model fitting and comparison are
+deterministic and need no further simulation.
+"""
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+from functools import lru_cache
+from scipy.interpolate import RegularGridInterpolator
+from scipy.optimize import minimize
+
+# Root directory path
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+sys.path.append(ROOT_DIR)
+
+from src.simulation.neutral_bias.simulate_utility_max_model import (
+    load_data, get_vote_distribution, get_filtered_vote_distribution,
+    simulate_optimal_votes, simulate_optimal_votes_with_zero
+)
+from src.utils.rng import make_rng, DEFAULT_SEED
+
+OUTPUT_FILE = 'results/data/simulation/preference_mle_fits.csv'
+TABLE_SIMULATIONS = 140000  # Simulated votes per grid point of a probability table
+
+# Models to fit. The traditional model is fitted to positive votes only (as in simulate_utility_max_model),
+# the zero-vote model to all votes. Votes of the traditional model are invariant to the scale of the
+# preferences, so one shape parameter per distribution is fitted and the other is fixed.
+MLE_MODELS = {
+    'uniform': {
+        'simulate_fn': simulate_optimal_votes,
+        'preference_distribution': 'uniform',
+        'fixed': {'max': 10},
+        'grid': {'min': np.linspace(0.0, 9.5, 39)},
+        'vote_values': list(range(1, 10))
+    },
+    'normal': {
+        'simulate_fn': simulate_optimal_votes,
+        'preference_distribution': 'normal',
+        'fixed': {'mean': 5},
+        'grid': {'std': np.linspace(0.25, 10.0, 40)},
+        'vote_values': list(range(1, 10))
+    },
+    'power_law': {
+        'simulate_fn': simulate_optimal_votes,
+        'preference_distribution': 'power_law',
+        'fixed': {},
+        'grid': {'alpha': np.linspace(0.1, 5.0, 50)},
+        'vote_values': list(range(1, 10))
+    },
+    'with_zero': {
+        'simulate_fn': simulate_optimal_votes_with_zero,
+        'preference_distribution': 'uniform',
+        'fixed': {},
+        'grid': {
+            'indifference_threshold': np.linspace(0.0, 5.0, 21),
+            'decision_cost': np.linspace(0.0, 2.0, 21)
+        },
+        'vote_values': list(range(0, 10))
+    }
+}
+
+def simulate_vote_probabilities(model, point, n_simulations=TABLE_SIMULATIONS, seed=DEFAULT_SEED):
+    """Vote-value probabilities of a model at one parameter point (common random stream for every point)"""
+    spec = MLE_MODELS[model]
+    values = dict(spec['fixed'])
+    values.update(point)
+    rng = make_rng(seed, 2)
+
+    if spec['simulate_fn'] is simulate_optimal_votes:
+        # One voter per n_projects votes
+        counts, _ = simulate_optimal_votes(n_simulations=n_simulations // 7, n_projects=7, max_credits=99,
+                                           preference_distribution=spec['preference_distribution'],
+                                           params=values, rng=rng)
+    else:
+        counts, _ = spec['simulate_fn'](n_simulations=n_simulations, n_projects=7, max_credits=99,
+                                        preference_distribution=spec['preference_distribution'],
+                                        rng=rng, **values)
+
+    counts = np.array([counts.get(v, 0) for v in spec['vote_values']], dtype=float)
+    return counts / counts.sum() if counts.sum() > 0 else np.full(len(counts), 1 / len(counts))
+
+@lru_cache(maxsize=None)
+def vote_probability_table(model, n_simulations=TABLE_SIMULATIONS, seed=DEFAULT_SEED):
+    """
+    Precompute p(v | theta) on the parameter grid of a model (memoized per model)
+
+    Returns:
+    --------
+    axes : tuple of numpy.ndarray
+        Grid values of each parameter
+    table : numpy.ndarray
+        Probabilities of shape (grid sizes..., number of vote values)
+    """
+    grid = MLE_MODELS[model]['grid']
+    names = list(grid.keys())
+    axes = tuple(np.asarray(grid[name], dtype=float) for name in names)
+    n_values = len(MLE_MODELS[model]['vote_values'])
+
+    table = np.zeros(tuple(len(axis) for axis in axes) + (n_values,))
+    for index in np.ndindex(*table.shape[:-1]):
+        point = {name: axis[i] for name, axis, i in zip(names, axes, index)}
+        table[index] = simulate_vote_probabilities(model, point, n_simulations, seed)
+
+    return axes, table
+
+def fit_model_mle(model, observed_counts, n_simulations=TABLE_SIMULATIONS, seed=DEFAULT_SEED):
+    """
+    Fit the parameters of a model by maximum likelihood
+
+    Parameters:
+    -----------
+    model : str
+        Key of MLE_MODELS
+    observed_counts : pd.Series
+        Observed vote counts by vote value (values outside the model's vote values are ignored)
+    n_simulations : int
+        Simulated votes per grid point of the probability table
+    seed : int
+        Random seed of the probability table
+
+    Returns:
+    --------
+    dict
+        Fitted parameters, log-likelihood, AIC, BIC and fitted probabilities
+    """
+    spec = MLE_MODELS[model]
+    names = list(spec['grid'].keys())
+    axes, table = vote_probability_table(model, n_simulations, seed)
+    counts = np.array([float(observed_counts.get(v, 0)) for v in spec['vote_values']])
+    n_obs = counts.sum()
+
+    # Floor at the table resolution so values never seen in the simulation are not impossible
+    floor = 0.5 / n_simulations
+    interpolator = RegularGridInterpolator(axes, table)
+    lower = np.array([axis[0] for axis in axes])
+    upper = np.array([axis[-1] for axis in axes])
+
+    def negative_log_likelihood(x):
+        probabilities = np.clip(interpolator(np.clip(x, lower, upper))[0], floor, None)
+        return -np.sum(counts * np.log(probabilities / probabilities.sum()))
+
+    # Start from the best grid point, then refine between grid points
+    grid_log_likelihood = np.sum(counts * np.log(np.clip(table, floor, None)), axis=-1)
+    start = np.array([axis[i] for axis, i in zip(axes, np.unravel_index(np.argmax(grid_log_likelihood), grid_log_likelihood.shape))])
+    result = minimize(negative_log_likelihood, start, method='Nelder-Mead', bounds=list(zip(lower, upper)))
+
+    x = result.x if result.fun <= negative_log_likelihood(start) else start
+    log_likelihood = -negative_log_likelihood(x)
+    n_params = len(names)
+    probabilities = np.clip(interpolator(x)[0], floor, None)
+
+    return {
+        'model': model,
+        'preference_distribution': spec['preference_distribution'],
+        'data': 'all votes' if 0 in spec['vote_values'] else 'positive votes',
+        'params': {**spec['fixed'], **dict(zip(names, x.tolist()))},
+        'log_likelihood': log_likelihood,
+        'n_params': n_params,
+        'n_obs': int(n_obs),
+        'aic': 2 * n_params - 2 * log_likelihood,
+        'bic': n_params * np.log(n_obs) - 2 * log_likelihood,
+        'probabilities': pd.Series(probabilities / probabilities.sum(), index=spec['vote_values'])
+    }
+
+def fit_all_models(votes_df, models=None, n_simulations=TABLE_SIMULATIONS, seed=DEFAULT_SEED):
+    """
+    Fit every model by maximum likelihood and tabulate the results
+
+    AIC and BIC are comparable only between models fitted to the same data
+    (the 'data' column: positive votes or all votes).
+    """
+    if models is None:
+        models = list(MLE_MODELS.keys())
+    all_counts, _ = get_vote_distribution(votes_df)
+    positive_counts, _ = get_filtered_vote_distribution(votes_df, min_value=1)
+
+    rows = []
+    for model in models:
+        observed = all_counts if 0 in MLE_MODELS[model]['vote_values'] else positive_counts
+        fit = fit_model_mle(model, observed, n_simulations, seed)
+        rows.append({
+            'model': fit['model'],
+            'preference_distribution': fit['preference_distribution'],
+            'data': fit['data'],
+            'params': ', '.join(f"{name}={value:.3f}" for name, value in fit['params'].items()),
+            'log_likelihood': fit['log_likelihood'],
+            'n_params': fit['n_params'],
+            'n_obs': fit['n_obs'],
+            'aic': fit['aic'],
+            'bic': fit['bic']
+        })
+
+    results = pd.DataFrame(rows)
+    # Akaike weights within each data set
+    results['delta_aic'] = results['aic'] - results.groupby('data')['aic'].transform('min')
+    results['aic_weight'] = np.exp(-results['delta_aic'] / 2)
+    results['aic_weight'] = results['aic_weight'] / results.groupby('data')['aic_weight'].transform('sum')
+
+    return results
+
+def main():
+    """Fit all models by maximum likelihood and save the comparison table"""
+    print("Maximum-likelihood fitting of utility maximization models...")
+    votes_df, _ = load_data()
+
+    results = fit_all_models(votes_df)
+
+    pd.set_option('display.width', 200)
+    for data, group in results.groupby('data'):
+        print(f"\nModels fitted to {data}:")
+        print(group.drop(columns='data').sort_values('aic').to_string(index=False))
+
+    os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
+    results.to_csv(OUTPUT_FILE, index=False)
+    print(f"\nSaved: {OUTPUT_FILE}")
+
+if __name__ == "__main__":
+    main()
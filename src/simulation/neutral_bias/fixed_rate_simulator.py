@@ -8,17 +8,81 @@
 import os
 import pandas as pd
 import numpy as np
-import random
 import matplotlib.pyplot as plt
 import seaborn as sns
+from concurrent.futures import ProcessPoolExecutor
 from .bias_simulator_base import BiasSimulatorBase
+from src.utils.ballot_matrix import long_to_ballot_matrix
+from src.utils.qv_allocation import allocate_qv_budget, removed_contributions_by_key
+from src.utils.rng import as_generator, make_rng, DEFAULT_SEED
+
+BATCH_CHUNK_TRIALS = 1000  # バッチ実行で1つの乱数ストリームから生成する試行数
+BATCH_QUANTILES = (0.05, 0.5, 0.95)  # バッチ実行で出力する分位点
+
+def _simulate_rate_trials(base_scores, contributions, rate, num_to_convert, n_trials, method, seed, rate_index):
+    """
+    1つの変換率について n_trials 回の試行を行い、試行ごとの予算配分比率を返す
+    （プロセスプールのワーカーで実行するためモジュールレベルで定義）
+    
+    試行は BATCH_CHUNK_TRIALS 回ずつのチャンクに分け、乱数は (seed, 変換率番号, チャンク番号) の
+    独立ストリームを使う。そのため並列数によらず同じ結果になる
+    """
+    num_ones = len(contributions)
+    simulated_ratio = np.empty((n_trials, contributions.shape[1]))
+    num_converted = np.empty(n_trials, dtype=int)
+    
+    for chunk_index, start in enumerate(range(0, n_trials, BATCH_CHUNK_TRIALS)):
+        stop = min(start + BATCH_CHUNK_TRIALS, n_trials)
+        keys = make_rng(seed, rate_index, chunk_index).random((stop - start, num_ones))
+        
+        if method == 'bernoulli':
+            mask = keys < rate
+        else:
+            # 乱数キーが小さい順に num_to_convert 個を選ぶ（非復元抽出と同じ分布）
+            mask = keys.argsort(axis=1).argsort(axis=1) < num_to_convert
+        
+        total_scores = base_scores - mask.astype(float) @ contributions
+        totals = total_scores.sum(axis=1, keepdims=True)
+        simulated_ratio[start:stop] = np.divide(total_scores, totals, out=np.zeros(total_scores.shape), where=totals > 0)
+        num_converted[start:stop] = mask.sum(axis=1)
+    
+    return simulated_ratio, num_converted
+
+def _simulate_crn_chunk(base_scores, contributions, rates, num_to_convert, n_trials, method, seed, chunk_index):
+    """
+    共通乱数法で全変換率の試行を n_trials 回分まとめて実行する
+    （プロセスプールのワーカーで実行するためモジュールレベルで定義）
+    
+    試行ごとに1票のキーを (seed, チャンク番号) のストリームから一度だけ引き、全変換率で共有する。
+    'bernoulli' ではキーが変換率未満の1票、'without_replacement' ではキーが小さい順に
+    num_to_convert 個の1票を変換するため、変換される票は変換率について入れ子になる
+    
+    Returns:
+    --------
+    simulated_ratio : numpy.ndarray
+        予算配分比率 (試行数, 変換率数, 候補者数)
+    num_converted : numpy.ndarray
+        変換された1票の数 (試行数, 変換率数)
+    """
+    keys = make_rng(seed, chunk_index).random((n_trials, len(contributions)))
+    
+    if method == 'bernoulli':
+        num_converted = (keys[:, :, np.newaxis] < np.asarray(rates)).sum(axis=1)
+    else:
+        num_converted = np.tile(np.asarray(num_to_convert), (n_trials, 1))
+    
+    total_scores = base_scores - removed_contributions_by_key(keys, contributions, num_converted)
+    totals = total_scores.sum(axis=2, keepdims=True)
+    simulated_ratio = np.divide(total_scores, totals, out=np.zeros(total_scores.shape), where=totals > 0)
+    
+    return simulated_ratio, num_converted
 
 class FixedRateSimulator(BiasSimulatorBase):
     """一定割合の1票を0票に変換するシミュレーター"""
     
     def __init__(self, conversion_rate=0.3, votes_file='data/votes.csv', 
                  candidates_file='data/candidates.csv', 
-                 output_dir='results/bias_simulation/fixed_rate'):
+                 output_dir='results/bias_simulation/fixed_rate', seed=DEFAULT_SEED):
         """
         初期化
         
@@ -32,17 +96,24 @@ class FixedRateSimulator(BiasSimulatorBase):
             候補者データのファイルパス
         output_dir : str
             出力ディレクトリ
+        seed : int
+            乱数シード
         """
         # 変換率を保存
         self.conversion_rate = conversion_rate
         
         # 親クラスの初期化
-        super().__init__(votes_file, candidates_file, output_dir)
+        super().__init__(votes_file, candidates_file, output_dir, seed)
     
-    def simulate(self):
+    def simulate(self, rng=None):
         """
         一定割合の1票を0票に変換するシミュレーション
         
+        Parameters:
+        -----------
+        rng : numpy.random.Generator, optional
+            乱数生成器。指定しない場合は self.seed から作る
+        
         Returns:
         --------
         pandas.DataFrame
@@ -60,7 +131,8 @@ class FixedRateSimulator(BiasSimulatorBase):
         num_to_convert = int(len(one_vote_indices) * self.conversion_rate)
         
         # ランダムに変換するインデックスを選択
-        indices_to_convert = random.sample(list(one_vote_indices), num_to_convert)
+        rng = as_generator(self.seed if rng is None else rng)
+        indices_to_convert = rng.choice(one_vote_indices, size=num_to_convert, replace=False)
         
         # 選択された1票を0票に変換（実質的に削除）
         simulated_df = simulated_df.drop(indices_to_convert)
@@ -93,12 +165,12 @@ class FixedRateSimulator(BiasSimulatorBase):
         
         # 各変換率でシミュレーション
         results = {}
-        for rate in rates:
+        for rate_index, rate in enumerate(rates):
             # 変換率を設定
             self.conversion_rate = rate
             
-            # シミュレーション実行
-            simulated_votes = self.simulate()
+            # シミュレーション実行（変換率ごとに独立な乱数ストリーム）
+            simulated_votes = self.simulate(make_rng(self.seed, rate_index))
             
             # シミュレーション後の予算配分を計算
             simulated_results = self.calculate_qv_results(simulated_votes)
@@ -137,6 +209,189 @@ class FixedRateSimulator(BiasSimulatorBase):
         
         return results
     
+    def simulate_batch(self, rates, n_trials=1000, method='without_replacement', seed=None, n_jobs=1,
+                       common_random_numbers=False):
+        """
+        T回の試行 × R個の変換率のシミュレーションを配列演算で一括実行する
+        
+        1票の位置ごとに乱数を引いて削除マスク (試行数, 1票の数) を作り、
+        1票の候補者への寄与行列との積で全試行の予算配分を一度に計算する
+        
+        Parameters:
+        -----------
+        rates : list of float
+            変換率のリスト
+        n_trials : int
+            変換率ごとの試行回数
+        method : str
+            'without_replacement' - simulate() と同じく int(1票の数 × 変換率) 個を非復元抽出で変換
+            'bernoulli' - 各1票を独立に確率「変換率」で変換
+        seed : int, optional
+            乱数シード。指定しない場合は self.seed
+        n_jobs : int
+            並列プロセス数（1 の場合は逐次実行）。並列数によらず結果は同じ
+        common_random_numbers : bool
+            True の場合、試行ごとの乱数キーを全変換率で共有する（共通乱数法）。
+            変換される票が変換率について入れ子になり、変換率間の差の推定誤差が小さくなる
+            
+        Returns:
+        --------
+        original_ratio : numpy.ndarray
+            元の予算配分比率 (候補者数,)
+        simulated_ratio : numpy.ndarray
+            試行ごとの予算配分比率 (変換率数, 試行数, 候補者数)
+        num_converted : numpy.ndarray
+            試行ごとに変換された1票の数 (変換率数, 試行数)
+        """
+        if method not in ('without_replacement', 'bernoulli'):
+            raise ValueError(f"Unknown sampling method: {method}")
+        if seed is None:
+            seed = self.seed
+        
+        # 投票行列と元の配分（score='sqrt_votes' では1票の寄与は1）
+        _, ballots = long_to_ballot_matrix(self.votes_long_df)
+        original = allocate_qv_budget(ballots, score='sqrt_votes', total_budget=1.0)
+        base_scores = original['total_score'][0]
+        
+        # 1票の位置と候補者への寄与行列 (1票の数, 候補者数)
+        _, one_vote_candidates = np.nonzero(ballots == 1)
+        num_ones = len(one_vote_candidates)
+        contributions = np.zeros((num_ones, ballots.shape[1]))
+        contributions[np.arange(num_ones), one_vote_candidates] = 1.0
+        
+        num_to_convert = [int(num_ones * rate) for rate in rates]
+        if common_random_numbers:
+            # チャンクごとのタスク（全変換率で乱数キーを共有）
+            worker = _simulate_crn_chunk
+            tasks = [
+                (base_scores, contributions, rates, num_to_convert, min(BATCH_CHUNK_TRIALS, n_trials - start), method, seed, chunk_index)
+                for chunk_index, start in enumerate(range(0, n_trials, BATCH_CHUNK_TRIALS))
+            ]
+        else:
+            # 変換率ごとのタスク
+            worker = _simulate_rate_trials
+            tasks = [
+                (base_scores, contributions, rate, num_to_convert[rate_index], n_trials, method, seed, rate_index)
+                for rate_index, rate in enumerate(rates)
+            ]
+        
+        if n_jobs > 1:
+            with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                task_results = list(executor.map(worker, *zip(*tasks)))
+        else:
+            task_results = [worker(*task) for task in tasks]
+        
+        if common_random_numbers:
+            # (試行数, 変換率数, ...) → (変換率数, 試行数, ...)
+            simulated_ratio = np.concatenate([ratio for ratio, _ in task_results]).transpose(1, 0, 2)
+            num_converted = np.concatenate([converted for _, converted in task_results]).T
+        else:
+            simulated_ratio = np.stack([ratio for ratio, _ in task_results])
+            num_converted = np.stack([converted for _, converted in task_results])
+        
+        return original['budget_allocation'][0], simulated_ratio, num_converted
+    
+    def run_batch_simulations(self, rates=None, n_trials=1000, method='without_replacement', seed=None,
+                              n_jobs=1, quantiles=BATCH_QUANTILES, common_random_numbers=False):
+        """
+        多数の試行 × 変換率のシミュレーションを一括実行し、予算配分比率の変化の分布を集計する
+        
+        結果（集計表とグラフ）はすべての変換率の計算が終わった後に一度だけ保存する
+        
+        Parameters:
+        -----------
+        rates : list of float, optional
+            変換率のリスト。指定しない場合は 0.01～1.00 の100個
+        n_trials : int
+            変換率ごとの試行回数
+        method : str
+            'without_replacement' または 'bernoulli'（simulate_batch() を参照）
+        seed : int, optional
+            乱数シード。指定しない場合は self.seed
+        n_jobs : int
+            並列プロセス数
+        quantiles : tuple of float
+            出力する分位点
+        common_random_numbers : bool
+            True の場合、共通乱数法を使う（simulate_batch() を参照）
+            
+        Returns:
+        --------
+        pandas.DataFrame
+            変換率×候補者ごとの予算配分比率変化の集計結果
+        """
+        if rates is None:
+            rates = np.round(np.arange(1, 101) / 100, 2)
+        
+        print(f"{len(rates)}個の変換率 × {n_trials}回の試行でシミュレーションを実行しています...")
+        
+        original_ratio, simulated_ratio, num_converted = self.simulate_batch(rates, n_trials, method, seed, n_jobs, common_random_numbers)
+        change_percentage = (simulated_ratio - original_ratio) / original_ratio * 100
+        
+        # 変換率×候補者ごとに集計
+        num_rates, _, num_candidates = simulated_ratio.shape
+        titles = self.candidates_df.set_index('candidate_id')['title'].reindex(range(num_candidates)).values
+        summary = pd.DataFrame({
+            'rate': np.repeat(rates, num_candidates),
+            'candidate_id': np.tile(np.arange(num_candidates), num_rates),
+            'title': np.tile(titles, num_rates),
+            'n_trials': n_trials,
+            'mean_converted_votes': np.repeat(num_converted.mean(axis=1), num_candidates),
+            'budget_allocation_ratio_original': np.tile(original_ratio, num_rates),
+            'budget_allocation_ratio_mean': simulated_ratio.mean(axis=1).ravel(),
+            'budget_change_percentage_mean': change_percentage.mean(axis=1).ravel(),
+            'budget_change_percentage_std': change_percentage.std(axis=1).ravel()
+        })
+        for q, values in zip(quantiles, np.quantile(change_percentage, quantiles, axis=1)):
+            summary[f'budget_change_percentage_q{int(round(q * 100)):02d}'] = values.ravel()
+        
+        # 結果を一度だけ保存
+        summary.to_csv(os.path.join(self.output_dir, 'batch_summary.csv'), index=False)
+        self.plot_batch_summary(summary, quantiles)
+        
+        print(f"バッチシミュレーション完了。結果は {self.output_dir} に保存されました。")
+        
+        return summary
+    
+    def plot_batch_summary(self, summary, quantiles=BATCH_QUANTILES):
+        """
+        バッチシミュレーションの集計結果（平均と分位点の帯）を変換率に対してプロット
+        
+        Parameters:
+        -----------
+        summary : pandas.DataFrame
+            run_batch_simulations() の集計結果
+        quantiles : tuple of float
+            帯として描画する分位点（最小・最大を使用）
+        """
+        lower = f'budget_change_percentage_q{int(round(min(quantiles) * 100)):02d}'
+        upper = f'budget_change_percentage_q{int(round(max(quantiles) * 100)):02d}'
+        
+        plt.figure(figsize=(15, 10))
+        
+        colors = plt.cm.tab10(np.linspace(0, 1, summary['candidate_id'].nunique()))
+        for color, (_, candidate_data) in zip(colors, summary.groupby('candidate_id')):
+            rate_percentage = candidate_data['rate'] * 100
+            plt.plot(rate_percentage, candidate_data['budget_change_percentage_mean'],
+                     color=color, linewidth=2, label=str(candidate_data['title'].iloc[0])[:20])
+            plt.fill_between(rate_percentage, candidate_data[lower], candidate_data[upper], color=color, alpha=0.2)
+        
+        # ゼロラインを表示
+        plt.axhline(y=0, color='black', linestyle='-', alpha=0.3)
+        
+        # プロット装飾
+        plt.title('Distribution of Budget Allocation Change Across Conversion Rates')
+        plt.xlabel('Conversion Rate (%)')
+        plt.ylabel('Change in Budget Allocation (%)')
+        plt.grid(linestyle='--', alpha=0.7)
+        plt.legend(title='Project')
+        
+        plt.tight_layout()
+        plt.savefig(os.path.join(self.output_dir, 'batch_rate_sweep.png'), dpi=300)
+        plt.close()
+        
+        print(f"バッチシミュレーションのグラフを保存しました: {os.path.join(self.output_dir, 'batch_rate_sweep.png')}")
+    
     def plot_rate_comparison(self, results, rates):
         """
         異なる変換率間の比較プロット
@@ -206,6 +461,9 @@ def main():
     
     # 複数の変換率でシミュレーション実行
     simulator.run_simulations(rates)
+    
+    # 多数の試行による変換率スイープ（予算配分変化の分布）
+    simulator.run_batch_simulations(n_trials=1000)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
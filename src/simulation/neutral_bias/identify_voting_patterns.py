@@ -6,16 +6,35 @@
 """
 
 import os
+import sys
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from scipy import stats
-from sklearn.cluster import KMeans, DBSCAN
+from sklearn.cluster import KMeans, MiniBatchKMeans, DBSCAN
 from sklearn.preprocessing import StandardScaler
-from sklearn.decomposition import PCA
-from sklearn.metrics import silhouette_score
+from sklearn.decomposition import PCA, IncrementalPCA
+from sklearn.metrics import silhouette_score, adjusted_rand_score
+from sklearn.neighbors import KDTree
 import matplotlib.cm as cm
+from concurrent.futures import ProcessPoolExecutor
+
+# ルートディレクトリへのパスを取得
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+sys.path.append(ROOT_DIR)
+
+from src.utils.preference_inference import infer_preferences
+from src.utils.streaming_stats import StreamingCovariance
+
+LARGE_ELECTION_THRESHOLD = 20000  # この投票者数を超えたら大規模モードでクラスタリング
+CLUSTER_RANGE = range(2, 8)  # 試すクラスター数（2から7）
+SILHOUETTE_SAMPLE_SIZE = 10000  # 大規模モードでシルエット係数を推定する標本サイズ
+MINIBATCH_SIZE = 4096  # 大規模モードのミニバッチサイズ
+CHUNK_SIZE = 100000  # 相関・主成分分析でまとめて処理する投票者数
+OUTLIER_EPS_QUANTILE = 0.9  # 外れ値検出（DBSCAN）の近傍半径を決める、投票者の外れ値スコアの分位点
+OUTLIER_MIN_SAMPLES = 5  # 外れ値検出（DBSCAN）のコア点に必要な近傍の投票者数（自身を含む）
+OUTLIER_SCORES_FILE = os.path.join(ROOT_DIR, 'results', 'data', 'voter_outlier_scores.csv')
 
 # Add translation functions
 def get_translation_dict():
@@ -125,23 +144,14 @@ def load_data():
     
     # Create a wide-to-long format transformation for voters and their votes to each candidate
     # Each row in votes.csv has columns for each candidate (candidate_0, candidate_1, etc.)
-    voter_data = []
+    candidate_columns = [f'candidate_{i}' for i in range(7) if f'candidate_{i}' in votes_df.columns]  # 7 candidates in the data
+    votes_long_df = votes_df[['voter_id'] + candidate_columns].melt(
+        id_vars='voter_id', var_name='candidate_id', value_name='vote_value', ignore_index=False
+    )
+    votes_long_df['candidate_id'] = votes_long_df['candidate_id'].str[len('candidate_'):].astype(int)
     
-    for _, row in votes_df.iterrows():
-        voter_id = row['voter_id']
-        vote_id = row['vote_id']
-        
-        for i in range(7):  # 7 candidates in the data
-            col_name = f'candidate_{i}'
-            if col_name in row:
-                vote_value = row[col_name]
-                voter_data.append({
-                    'voter_id': voter_id,
-                    'candidate_id': i,
-                    'vote_value': vote_value
-                })
-    
-    votes_long_df = pd.DataFrame(voter_data)
+    # Keep the voter-major order (each voter row, then each candidate)
+    votes_long_df = votes_long_df.rename_axis('row').sort_values(['row', 'candidate_id']).reset_index(drop=True)
     
     # Update candidate dataframe
     candidates_df = candidates_df.rename(columns={
@@ -161,73 +171,196 @@ def create_voter_pattern_matrix(votes_df, candidates_df):
     voter_ids = votes_df['voter_id'].unique()
     project_names = candidates_df.set_index('candidate_id')['title']
     
-    # Create voter × project matrix
-    pattern_dict = {}
-    
-    for voter_id in voter_ids:
-        voter_votes = votes_df[votes_df['voter_id'] == voter_id]
-        voter_pattern = {}
-        
-        # Fill in vote values for each project
-        for _, vote_row in voter_votes.iterrows():
-            candidate_id = vote_row['candidate_id']
-            if candidate_id in project_names.index:
-                project_name = project_names[candidate_id]
-                voter_pattern[project_name] = vote_row['vote_value']
-        
-        pattern_dict[voter_id] = voter_pattern
-    
-    # Convert to DataFrame
-    pattern_df = pd.DataFrame.from_dict(pattern_dict, orient='index')
+    # Create voter × project matrix with a pivot (the last vote of a voter for a project is used)
+    known_votes = votes_df[votes_df['candidate_id'].isin(project_names.index)]
+    known_votes = known_votes.drop_duplicates(['voter_id', 'candidate_id'], keep='last')
+    candidate_order = known_votes['candidate_id'].unique()
+    pattern_df = known_votes.pivot(index='voter_id', columns='candidate_id', values='vote_value')
+    pattern_df = pattern_df.reindex(index=voter_ids, columns=candidate_order)
+    pattern_df.columns = project_names[candidate_order].to_numpy()
+    pattern_df.index.name = None
     
     # Replace NaN values with 0 (no vote)
     pattern_df = pattern_df.fillna(0)
     
     return pattern_df
 
+def create_preference_pattern_matrix(pattern_df):
+    """
+    投票パターン行列を、効用モデルから逆推定した選好（予算を使い切った場合の票数に換算）の行列に変換する
+    
+    未使用クレジットの多寡による票数の違いを除き、選好の相対的な強さでクラスタリングするために使う
+    """
+    inferred = infer_preferences(pattern_df.to_numpy())
+    return pd.DataFrame(inferred['normalized'], index=pattern_df.index, columns=pattern_df.columns)
+
+def iter_chunks(pattern_df, chunk_size=CHUNK_SIZE):
+    """投票パターン行列を chunk_size 行ずつに分けて返す"""
+    for start in range(0, len(pattern_df), chunk_size):
+        yield pattern_df.iloc[start:start + chunk_size]
+
+def load_pattern_chunks(votes_file='data/votes.csv', candidates_df=None, chunk_size=CHUNK_SIZE):
+    """
+    投票データ（横形式）をチャンクごとに読み込み、投票パターン行列のチャンクとして返す（アウトオブコア処理用）
+    
+    投票用紙1枚を1行とし、同じ投票者の複数の投票はまとめない。
+    列名は candidates_df の title（指定しない場合は candidate_i 列名のまま）
+    """
+    for chunk in pd.read_csv(votes_file, chunksize=chunk_size):
+        candidate_columns = [col for col in chunk.columns if col.startswith('candidate_')]
+        pattern_chunk = chunk.set_index('voter_id')[candidate_columns].fillna(0)
+        pattern_chunk.index.name = None
+        if candidates_df is not None:
+            titles = candidates_df.set_index('candidate_id')['title']
+            pattern_chunk.columns = [titles[int(col[len('candidate_'):])] for col in candidate_columns]
+        yield pattern_chunk
+
+def compute_voter_statistics(pattern_df):
+    """投票者ごとの最大投票と他の投票の関係を、行ごとの集約演算で一括計算する"""
+    votes = pattern_df.to_numpy()
+    num_voters, num_projects = votes.shape
+    rows = np.arange(num_voters)
+    
+    # 最大投票値とそのプロジェクト（同点の場合は最初のプロジェクト）
+    max_index = votes.argmax(axis=1)
+    max_vote = votes[rows, max_index]
+    
+    # 最大以外の投票値の統計
+    is_other = np.ones(votes.shape, dtype=bool)
+    is_other[rows, max_index] = False
+    avg_other_votes = np.where(is_other, votes, 0).sum(axis=1) / (num_projects - 1)
+    min_other_vote = np.where(is_other, votes, votes.max(initial=0)).min(axis=1)
+    
+    # 最大投票と他投票の比率
+    with np.errstate(divide='ignore', invalid='ignore'):
+        vote_ratio = np.where(avg_other_votes > 0, max_vote / avg_other_votes, np.inf)
+    
+    return pd.DataFrame({
+        'voter_id': pattern_df.index,
+        'max_vote': max_vote,
+        'max_project': pattern_df.columns[max_index],
+        'avg_other_votes': avg_other_votes,
+        'min_other_vote': min_other_vote,
+        'vote_ratio': vote_ratio,
+        # 小票（1-2）の数
+        'small_votes': ((votes >= 1) & (votes <= 2)).sum(axis=1),
+        # 未投票（0票）の数
+        'zero_votes': (votes == 0).sum(axis=1)
+    })
+
+def streaming_correlation(chunks):
+    """
+    投票パターン行列のチャンクを順に読み、プロジェクト間の相関行列を計算する
+    
+    Returns:
+    --------
+    correlation_matrix : pandas.DataFrame
+        プロジェクト間の相関行列
+    accumulator : StreamingCovariance
+        平均・共分散の集計器（標準化や主成分分析に再利用できる）
+    """
+    accumulator = StreamingCovariance()
+    columns = None
+    for chunk in chunks:
+        columns = chunk.columns
+        accumulator.update(chunk.to_numpy(dtype=float))
+    
+    correlation_matrix = pd.DataFrame(accumulator.correlation(), index=columns, columns=columns)
+    return correlation_matrix, accumulator
+
+def incremental_pca_projection(make_chunks, mean, std, n_components=2):
+    """
+    標準化した投票パターンに対する主成分分析をチャンク単位で行い、各投票者の主成分得点を返す
+    
+    make_chunks() はチャンクの反復子を毎回新しく返す関数（学習と射影で2回読み込む）
+    """
+    std = np.where(std > 0, std, 1.0)
+    
+    # プロジェクト数は少ないため全成分を保持して学習する（上位成分だけを保持する近似による誤差を避ける）
+    n_features = len(std)
+    pca = IncrementalPCA(n_components=n_features)
+    held = np.zeros((0, n_features))
+    for chunk in make_chunks():
+        # partial_fit には成分数以上の行が必要なため、行数の足りないチャンクは前のチャンクとまとめる
+        scaled = (chunk.to_numpy(dtype=float) - mean) / std
+        if len(held) >= n_features and len(scaled) >= n_features:
+            pca.partial_fit(held)
+            held = scaled
+        else:
+            held = np.vstack([held, scaled])
+    if len(held) >= n_features:
+        pca.partial_fit(held)
+    elif len(held) > 0:
+        # 全体の行数がプロジェクト数に満たない場合は、partial_fit を一度も呼んでおらず held が全データになる。
+        # その行数で求められる成分数だけ通常の主成分分析で学習する
+        pca = PCA(n_components=min(n_features, len(held))).fit(held)
+    
+    projections = []
+    for chunk in make_chunks():
+        projection = pca.transform((chunk.to_numpy(dtype=float) - mean) / std)[:, :n_components]
+        # 学習できた成分数が n_components に満たない場合は残りの得点を0とする
+        projections.append(np.pad(projection, ((0, 0), (0, n_components - projection.shape[1]))))
+    return np.vstack(projections) if projections else np.zeros((0, n_components))
+
+def analyze_patterns_out_of_core(make_chunks, n_components=2):
+    """
+    投票パターン行列をチャンク単位で読みながら、相関行列・投票者ごとの統計・主成分得点を計算する
+    
+    Parameters:
+    -----------
+    make_chunks : callable
+        投票パターン行列のチャンクの反復子を返す関数
+        （例: lambda: load_pattern_chunks('data/votes.csv', candidates_df)）
+    n_components : int
+        主成分の数
+    
+    Returns:
+    --------
+    correlation_matrix : pandas.DataFrame
+        プロジェクト間の相関行列
+    voter_analysis_df : pandas.DataFrame
+        投票者ごとの最大投票と他の投票の関係
+    pca_result : numpy.ndarray
+        投票者ごとの主成分得点 (投票者数, n_components)
+    """
+    # 1回目の読み込み: 相関行列と投票者ごとの統計
+    accumulator = StreamingCovariance()
+    columns = None
+    voter_statistics = []
+    for chunk in make_chunks():
+        columns = chunk.columns
+        accumulator.update(chunk.to_numpy(dtype=float))
+        voter_statistics.append(compute_voter_statistics(chunk))
+    
+    correlation_matrix = pd.DataFrame(accumulator.correlation(), index=columns, columns=columns)
+    voter_analysis_df = pd.concat(voter_statistics, ignore_index=True)
+    
+    # 2・3回目の読み込み: 主成分分析の学習と射影（母標準偏差で標準化、StandardScaler と同じ）
+    pca_result = incremental_pca_projection(make_chunks, accumulator.mean, accumulator.std(ddof=0), n_components)
+    
+    return correlation_matrix, voter_analysis_df, pca_result
+
 def analyze_correlations(pattern_df):
     """投票パターン間の相関分析"""
-    # プロジェクト間の相関行列
-    correlation_matrix = pattern_df.corr()
+    # プロジェクト間の相関行列（チャンク単位のストリーミング計算）
+    correlation_matrix, _ = streaming_correlation(iter_chunks(pattern_df))
     
     # 投票者の最大投票先とその他投票先の関係分析
-    voter_analysis = []
-    
-    for voter_id, row in pattern_df.iterrows():
-        # 最大投票値とそのプロジェクト
-        max_vote = row.max()
-        max_project = row.idxmax()
-        
-        # 最大以外の投票値の統計
-        other_votes = row[row.index != max_project]
-        avg_other_votes = other_votes.mean()
-        min_other_vote = other_votes.min()
-        
-        # 最大投票と他投票の比率
-        vote_ratio = max_vote / avg_other_votes if avg_other_votes > 0 else float('inf')
-        
-        # 小票（1-2）の数
-        small_votes = len(row[(row >= 1) & (row <= 2)])
-        
-        # 未投票（0票）の数
-        zero_votes = len(row[row == 0])
-        
-        voter_analysis.append({
-            'voter_id': voter_id,
-            'max_vote': max_vote,
-            'max_project': max_project,
-            'avg_other_votes': avg_other_votes,
-            'min_other_vote': min_other_vote,
-            'vote_ratio': vote_ratio,
-            'small_votes': small_votes,
-            'zero_votes': zero_votes
-        })
-    
-    voter_analysis_df = pd.DataFrame(voter_analysis)
+    voter_analysis_df = compute_voter_statistics(pattern_df)
     return correlation_matrix, voter_analysis_df
 
-def perform_clustering(pattern_df):
-    """投票パターンのクラスタリング分析"""
+def perform_clustering(pattern_df, large_election=None, n_jobs=None):
+    """
+    投票パターンのクラスタリング分析
+    
+    投票者数が LARGE_ELECTION_THRESHOLD を超える場合（または large_election=True の場合）は
+    perform_clustering_large() を使う
+    """
+    if large_election is None:
+        large_election = len(pattern_df) > LARGE_ELECTION_THRESHOLD
+    if large_election:
+        return perform_clustering_large(pattern_df, n_jobs=n_jobs)
+    
     # スケーリング
     scaler = StandardScaler()
     scaled_data = scaler.fit_transform(pattern_df)
@@ -240,7 +373,7 @@ def perform_clustering(pattern_df):
     silhouette_scores = []
     kmeans_results = {}
     
-    for k in range(2, 8):  # 2から7クラスタを試す
+    for k in CLUSTER_RANGE:
         kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
         clusters = kmeans.fit_predict(scaled_data)
         score = silhouette_score(scaled_data, clusters)
@@ -248,7 +381,7 @@ def perform_clustering(pattern_df):
         kmeans_results[k] = clusters
     
     # 最適クラスター数
-    optimal_k = range(2, 8)[np.argmax(silhouette_scores)]
+    optimal_k = CLUSTER_RANGE[np.argmax(silhouette_scores)]
     optimal_clusters = kmeans_results[optimal_k]
     
     # 結果をデータフレームに追加
@@ -259,6 +392,143 @@ def perform_clustering(pattern_df):
     
     return clustering_df, optimal_k, silhouette_scores
 
+def stratified_sample_indices(labels, sample_size, rng):
+    """クラスターごとの比率を保って sample_size 件の行番号を非復元抽出する"""
+    labels = np.asarray(labels)
+    if len(labels) <= sample_size:
+        return np.arange(len(labels))
+    
+    indices = []
+    for label in np.unique(labels):
+        members = np.flatnonzero(labels == label)
+        n_members = max(1, int(round(len(members) * sample_size / len(labels))))
+        indices.append(rng.choice(members, size=min(n_members, len(members)), replace=False))
+    
+    return np.sort(np.concatenate(indices))
+
+def _fit_minibatch_kmeans(scaled_data, k, sample_size, random_state):
+    """
+    ミニバッチk-meansを1つのクラスター数で実行し、層化標本でシルエット係数を推定する
+    （プロセスプールのワーカーで実行するためモジュールレベルで定義）
+    """
+    kmeans = MiniBatchKMeans(n_clusters=k, random_state=random_state, batch_size=MINIBATCH_SIZE, n_init=3)
+    clusters = kmeans.fit_predict(scaled_data)
+    
+    sample = stratified_sample_indices(clusters, sample_size, np.random.default_rng([random_state, k]))
+    if len(np.unique(clusters[sample])) < 2:
+        return clusters, -1.0
+    
+    return clusters, silhouette_score(scaled_data[sample], clusters[sample])
+
+def perform_clustering_large(pattern_df, n_jobs=None, sample_size=SILHOUETTE_SAMPLE_SIZE, random_state=42):
+    """
+    大規模な選挙向けの投票パターンのクラスタリング分析
+    
+    クラスター数ごとのミニバッチk-meansをプロセスプールで並列に実行し、
+    シルエット係数はクラスターで層化した標本（sample_size 件）で推定する。
+    計算量・メモリ量は投票者数に対して線形で、perform_clustering() と同じ形式の結果を返す
+    
+    Parameters:
+    -----------
+    pattern_df : pandas.DataFrame
+        投票者×プロジェクトの投票パターン行列
+    n_jobs : int
+        並列プロセス数（None の場合はCPUコア数、1 の場合は逐次実行）
+    sample_size : int
+        シルエット係数を推定する標本サイズ
+    random_state : int
+        乱数シード
+    """
+    if n_jobs is None:
+        n_jobs = os.cpu_count() or 1
+    
+    # スケーリング（float32でメモリ使用量を半分に）
+    scaled_data = StandardScaler().fit_transform(pattern_df.to_numpy(dtype=np.float32)).astype(np.float32)
+    
+    # 次元削減（可視化用、チャンク単位の主成分分析）
+    scaled_df = pd.DataFrame(scaled_data)
+    pca_result = incremental_pca_projection(lambda: iter_chunks(scaled_df), 0.0, np.ones(scaled_data.shape[1]))
+    
+    tasks = [(scaled_data, k, sample_size, random_state) for k in CLUSTER_RANGE]
+    if n_jobs > 1:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(tasks))) as executor:
+            results = list(executor.map(_fit_minibatch_kmeans, *zip(*tasks)))
+    else:
+        results = [_fit_minibatch_kmeans(*task) for task in tasks]
+    
+    silhouette_scores = [score for _, score in results]
+    optimal_index = int(np.argmax(silhouette_scores))
+    optimal_k = CLUSTER_RANGE[optimal_index]
+    
+    # 結果をデータフレームに追加
+    clustering_df = pattern_df.copy()
+    clustering_df['cluster'] = results[optimal_index][0]
+    clustering_df['pca_x'] = pca_result[:, 0]
+    clustering_df['pca_y'] = pca_result[:, 1]
+    
+    return clustering_df, optimal_k, silhouette_scores
+
+def detect_outlier_voters(pattern_df, eps=None, min_samples=OUTLIER_MIN_SAMPLES, eps_quantile=OUTLIER_EPS_QUANTILE):
+    """
+    密度に基づく外れ値投票者の検出（DBSCAN）
+    
+    QVの投票はまったく同じ投票パターンが繰り返し現れるため、同一の投票パターンをまとめてから
+    重複数を重みとしてKD木によるDBSCANを実行し、結果を投票者ごとに戻す。
+    計算量は投票者数ではなく異なる投票パターンの数に依存する
+    
+    Parameters:
+    -----------
+    pattern_df : pandas.DataFrame
+        投票者×プロジェクトの投票パターン行列
+    eps : float, optional
+        近傍半径（票数の空間でのユークリッド距離）。指定しない場合は、投票者の外れ値スコアの
+        eps_quantile 分位点（投票者の約 1 - eps_quantile がコア点にならない半径）
+    min_samples : int
+        コア点に必要な近傍の投票者数（自身を含む）
+    eps_quantile : float
+        eps を指定しない場合に使う分位点
+    
+    Returns:
+    --------
+    pandas.DataFrame
+        投票者ごとの外れ値指標（pattern_df と同じ索引）
+        'duplicate_count' : 同じ投票パターンの投票者数（自身を含む）
+        'outlier_score' : min_samples 人目の近傍投票者までの距離（大きいほど孤立している）
+        'dbscan_label' : DBSCANのクラスター番号（-1 は外れ値）
+        'is_outlier' : DBSCANで外れ値と判定されたかどうか
+        'uniform_ballot' : 全プロジェクトに同じ票数を投じたかどうか
+    """
+    ballots = pattern_df.to_numpy(dtype=float)
+    
+    # 同一の投票パターンをまとめる
+    unique_ballots, inverse, counts = np.unique(ballots, axis=0, return_inverse=True, return_counts=True)
+    inverse = inverse.ravel()
+    
+    # 外れ値スコア: 重複数を考慮した min_samples 人目の近傍までの距離（コア距離）
+    tree = KDTree(unique_ballots)
+    k = min(min_samples, len(unique_ballots))
+    distances, neighbors = tree.query(unique_ballots, k=k)
+    cumulative_counts = np.cumsum(counts[neighbors], axis=1)
+    reached = cumulative_counts >= min_samples
+    first_reached = reached.argmax(axis=1)
+    core_distance = np.where(reached.any(axis=1), distances[np.arange(len(unique_ballots)), first_reached], np.inf)
+    
+    if eps is None:
+        finite = np.isfinite(core_distance)
+        eps = np.quantile(np.repeat(core_distance[finite], counts[finite]), eps_quantile) if finite.any() else 0.0
+    
+    # 重複数を重みとしたDBSCAN（KD木で近傍を探索）
+    dbscan = DBSCAN(eps=max(eps, 1e-9), min_samples=min_samples, algorithm='kd_tree')
+    unique_labels = dbscan.fit_predict(unique_ballots, sample_weight=counts)
+    
+    return pd.DataFrame({
+        'duplicate_count': counts[inverse],
+        'outlier_score': core_distance[inverse],
+        'dbscan_label': unique_labels[inverse],
+        'is_outlier': unique_labels[inverse] == -1,
+        'uniform_ballot': ballots.max(axis=1) == ballots.min(axis=1)
+    }, index=pattern_df.index)
+
 def identify_voting_strategies(clustering_df, pattern_df):
     """投票戦略パターンの特定"""
     # クラスターごとの特徴を分析
@@ -335,7 +605,7 @@ def generate_visualizations(pattern_df, correlation_matrix, clustering_df, optim
     
     # 3. シルエットスコアのエルボープロット
     plt.figure(figsize=(10, 6))
-    plt.plot(range(2, 8), silhouette_scores, marker='o')
+    plt.plot(CLUSTER_RANGE, silhouette_scores, marker='o')
     plt.axvline(x=optimal_k, color='red', linestyle='--', 
                 label=f"{translate_text('最適クラスター数', trans_dict)}: {optimal_k}")
     plt.title(translate_text('クラスター数とシルエットスコアの関係', trans_dict))
@@ -417,8 +687,15 @@ def generate_visualizations(pattern_df, correlation_matrix, clustering_df, optim
     plt.savefig(f'{output_dir}/small_votes_by_cluster.png', dpi=300)
     plt.close()
 
-def generate_report(correlation_matrix, voter_analysis_df, clustering_df, optimal_k, silhouette_scores, cluster_stats):
-    """分析結果のテキストレポート生成"""
+def generate_report(correlation_matrix, voter_analysis_df, clustering_df, optimal_k, silhouette_scores, cluster_stats,
+                    preference_clustering=None):
+    """
+    分析結果のテキストレポート生成
+    
+    preference_clustering に逆推定した選好のクラスタリング結果
+    (clustering_df, optimal_k, silhouette_scores) を渡すと、レポートと
+    vote_patterns_with_clusters.csv の preference_cluster 列に含める
+    """
     # Get translation dictionary
     trans_dict = get_translation_dict()
     
@@ -495,6 +772,24 @@ def generate_report(correlation_matrix, voter_analysis_df, clustering_df, optima
             
             f.write("\n")
         
+        # 逆推定した選好に基づくクラスター
+        if preference_clustering is not None:
+            preference_df, preference_k, preference_scores = preference_clustering
+            preference_labels = preference_df['cluster']
+            f.write("## Preference-Based Cluster Analysis\n\n")
+            f.write(f"- {translate_text('最適クラスター数', trans_dict)}: {preference_k}\n")
+            f.write(f"- {translate_text('最大シルエットスコア', trans_dict)}: {max(preference_scores):.4f}\n")
+            agreement = adjusted_rand_score(clustering_df['cluster'], preference_labels.reindex(clustering_df.index))
+            f.write(f"- Agreement with vote-pattern clusters (adjusted Rand index): {agreement:.4f}\n\n")
+            
+            project_columns = [col for col in preference_df.columns if col not in ('cluster', 'pca_x', 'pca_y')]
+            for cluster_id, members in preference_df.groupby('cluster'):
+                avg_preferences = members[project_columns].mean().sort_values(ascending=False)
+                f.write(f"### Preference Cluster {cluster_id}\n\n")
+                f.write(f"- {translate_text('サイズ', trans_dict)}: {len(members)}{translate_text('名', trans_dict)} ({len(members) / len(preference_df) * 100:.1f}%)\n")
+                f.write(f"- {translate_text('主要プロジェクト', trans_dict)}: {avg_preferences.index[0]} (mean normalized preference {avg_preferences.iloc[0]:.2f})\n")
+                f.write(f"- {translate_text('次点プロジェクト', trans_dict)}: {avg_preferences.index[1]} (mean normalized preference {avg_preferences.iloc[1]:.2f})\n\n")
+        
         # 仮説への含意
         f.write(f"## {translate_text('仮説への含意', trans_dict)}\n\n")
         
@@ -549,6 +844,8 @@ def generate_report(correlation_matrix, voter_analysis_df, clustering_df, optima
     
     # クラスタリング結果をオリジナルの投票パターンと合わせて保存
     pattern_with_clusters = clustering_df.drop(['pca_x', 'pca_y'], axis=1)
+    if preference_clustering is not None:
+        pattern_with_clusters['preference_cluster'] = preference_clustering[0]['cluster']
     pattern_with_clusters.to_csv(f'{output_dir}/vote_patterns_with_clusters.csv')
 
 def main():
@@ -567,10 +864,33 @@ def main():
     correlation_matrix, voter_analysis_df = analyze_correlations(pattern_df)
     print("Voting pattern correlation analysis complete")
     
+    # Out-of-core analysis of the ballots file (one row per ballot, read in chunks)
+    ballot_correlation, ballot_analysis_df, ballot_pca = analyze_patterns_out_of_core(
+        lambda: load_pattern_chunks('data/votes.csv', candidates_df)
+    )
+    ballot_analysis_df['pca_x'] = ballot_pca[:, 0]
+    ballot_analysis_df['pca_y'] = ballot_pca[:, 1]
+    ballot_analysis_df.to_csv(f'{output_dir}/ballot_pattern_analysis.csv', index=False)
+    correlation_diff = (ballot_correlation - correlation_matrix).abs().max().max()
+    print(f"Out-of-core ballot analysis complete: {len(ballot_analysis_df)} ballots "
+          f"(max correlation difference from voter-level analysis = {correlation_diff:.4f})")
+    
     # Cluster analysis
     clustering_df, optimal_k, silhouette_scores = perform_clustering(pattern_df)
     print(f"Clustering analysis complete: optimal number of clusters = {optimal_k}")
     
+    # Cluster analysis on preferences inferred from the ballots
+    preference_pattern_df = create_preference_pattern_matrix(pattern_df)
+    preference_clustering_df, preference_k, preference_scores = perform_clustering(preference_pattern_df)
+    print(f"Preference-based clustering complete: optimal number of clusters = {preference_k} (silhouette = {max(preference_scores):.3f})")
+    
+    # Density-based outlier detection
+    outlier_df = detect_outlier_voters(pattern_df)
+    os.makedirs(os.path.dirname(OUTLIER_SCORES_FILE), exist_ok=True)
+    outlier_df.rename_axis('voter_id').to_csv(OUTLIER_SCORES_FILE)
+    print(f"Outlier detection complete: {outlier_df['is_outlier'].sum()} outlier voters, "
+          f"{outlier_df['uniform_ballot'].sum()} uniform ballots")
+    
     # Identify voting strategies
     cluster_stats = identify_voting_strategies(clustering_df, pattern_df)
     print("Vote strategy pattern identification complete")
@@ -582,7 +902,8 @@ def main():
     
     # Generate report
     generate_report(correlation_matrix, voter_analysis_df, clustering_df, 
-                   optimal_k, silhouette_scores, cluster_stats)
+                   optimal_k, silhouette_scores, cluster_stats,
+                   preference_clustering=(preference_clustering_df, preference_k, preference_scores))
     print("Analysis report generation complete")
     
     print(f"All results have been saved to {output_dir} directory")
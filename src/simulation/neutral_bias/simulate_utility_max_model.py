@@ -6,6 +6,7 @@ Simulation and comparison analysis of the utility maximization hypothesis model
 """
 
 import os
+import sys
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
@@ -13,6 +14,16 @@ import seaborn as sns
 from scipy import stats
 import matplotlib.ticker as mtick
 import time
+import json
+
+# Root directory path
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+sys.path.append(ROOT_DIR)
+
+from src.utils.rng import as_generator, make_rng, DEFAULT_SEED
+from src.utils.adaptive_mc import run_adaptive_replicates
+from src.utils.qv_ballot_solver import solve_optimal_ballots
+from src.utils.param_search import fit_parameters
 
 # Font settings to avoid font errors
 plt.rcParams['font.family'] = 'sans-serif'
@@ -25,6 +36,17 @@ warnings.filterwarnings("ignore", category=UserWarning, module="matplotlib")
 # Directory setup
 INPUT_DIR = 'data/'
 OUTPUT_DIR = 'results/figures/neutral_bias'
+VOTE_VALUES = list(range(0, 10))  # Vote values tracked by adaptive simulation
+ADAPTIVE_REPLICATE_SIZE = 700  # Simulations per replicate in adaptive simulation
+PARAM_CACHE_FILE = 'results/data/simulation/utility_max_param_cache.json'  # Evaluated parameter points
+ZERO_MODEL_GRID = {  # Initial grid for the zero-vote model parameter search
+    'indifference_threshold': [0.5, 1.0, 1.5, 2.0],
+    'decision_cost': [0.1, 0.2, 0.3, 0.4]
+}
+ZERO_MODEL_BOUNDS = {  # Search range for refining the zero-vote model parameters
+    'indifference_threshold': (0.0, 5.0),
+    'decision_cost': (0.0, 2.0)
+}
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 # Add dictionary for Japanese to English translation
@@ -173,11 +195,54 @@ def get_filtered_vote_distribution(votes_df, min_value=1):
     
     return vote_counts, vote_percentages
 
+def generate_preferences(n_voters, n_projects, preference_distribution, params, rng, model='traditional'):
+    """
+    Draw an (n_voters x n_projects) matrix of preference intensities
+    
+    Rows are drawn in the same order as one vector per voter, so results match the
+    per-voter loop for the same random stream.
+    
+    model selects the parameterisation: 'traditional' (simulate_optimal_votes) or
+    'with_zero' (simulate_optimal_votes_with_zero).
+    """
+    size = (n_voters, n_projects)
+    
+    if model == 'traditional':
+        if preference_distribution == 'uniform':
+            # Uniform distribution between min and max
+            return rng.uniform(params.get('min', 0), params.get('max', 10), size)
+        elif preference_distribution == 'normal':
+            # Normal distribution with mean and std, no negative preferences
+            return np.clip(rng.normal(params.get('mean', 5), params.get('std', 2), size), 0, None)
+        elif preference_distribution == 'power_law':
+            # Power law distribution (+1 to avoid zero, capped at 10 for consistency)
+            return np.clip(rng.pareto(params.get('alpha', 1.5), size) + 1, 0, 10)
+        raise ValueError(f"Unknown preference distribution: {preference_distribution}")
+    
+    if preference_distribution == 'uniform':
+        return rng.uniform(0, 10, size)
+    elif preference_distribution == 'normal':
+        return np.clip(rng.normal(params.get('mu', 5), params.get('sigma', 2), size), 0, 10)
+    elif preference_distribution == 'power_law':
+        return np.clip(rng.pareto(params.get('alpha', 2), size) * 3, 0, 10)
+    raise ValueError(f"Unknown distribution: {preference_distribution}")
+
+def count_vote_values(votes):
+    """Count and percentage of each vote value in an array of non-negative integer-valued votes"""
+    counts = np.bincount(np.asarray(votes, dtype=np.int64).ravel())
+    values = np.flatnonzero(counts)
+    vote_counts = pd.Series(counts[values], index=values.astype(float))
+    vote_percentages = vote_counts / vote_counts.sum() * 100
+    
+    return vote_counts, vote_percentages
+
 def simulate_optimal_votes(n_simulations=1000, n_projects=7, max_credits=99, 
-                          preference_distribution='uniform', params=None):
+                          preference_distribution='uniform', params=None, rng=None):
     """
     Simulate optimal votes based on the utility maximization hypothesis
     
+    All simulations are computed at once on an (n_simulations x n_projects) matrix.
+    
     Parameters:
     -----------
     n_simulations : int
@@ -190,6 +255,8 @@ def simulate_optimal_votes(n_simulations=1000, n_projects=7, max_credits=99,
         Type of preference distribution ('uniform', 'normal', 'power_law')
     params : dict
         Parameters for the preference distribution
+    rng : numpy.random.Generator, int or None
+        Random number generator or seed (DEFAULT_SEED if None)
         
     Returns:
     --------
@@ -198,151 +265,270 @@ def simulate_optimal_votes(n_simulations=1000, n_projects=7, max_credits=99,
     vote_percentages : pd.Series
         Percentage of votes for each vote value
     """
-    simulated_votes = []
-    
     # Default parameters
     if params is None:
         params = {}
+    rng = as_generator(rng)
     
-    for _ in range(n_simulations):
-        # Generate random preference intensities based on the specified distribution
-        if preference_distribution == 'uniform':
-            # Uniform distribution between min and max
-            min_val = params.get('min', 0)
-            max_val = params.get('max', 10)
-            preferences = np.random.uniform(min_val, max_val, n_projects)
-        
-        elif preference_distribution == 'normal':
-            # Normal distribution with mean and std
-            mean = params.get('mean', 5)
-            std = params.get('std', 2)
-            preferences = np.random.normal(mean, std, n_projects)
-            preferences = np.clip(preferences, 0, None)  # No negative preferences
-        
-        elif preference_distribution == 'power_law':
-            # Power law distribution (simplification)
-            alpha = params.get('alpha', 1.5)
-            preferences = np.random.pareto(alpha, n_projects) + 1  # +1 to avoid zero
-            preferences = np.clip(preferences, 0, 10)  # Cap at 10 for consistency
-        
-        else:
-            raise ValueError(f"Unknown preference distribution: {preference_distribution}")
-        
-        # Optimal voting calculation
-        # v_i = u_i / sqrt(sum(u_i^2) / C)
-        denominator = np.sqrt(np.sum(preferences**2) / max_credits)
-        if denominator == 0:  # Avoid division by zero
-            optimal_votes = np.zeros(n_projects)
-        else:
-            optimal_votes = preferences / denominator
-        
-        # Discretize votes (round to 1-9)
-        discretized_votes = np.clip(np.round(optimal_votes), 0, 9)
-        
-        # Only include positive votes
-        positive_votes = discretized_votes[discretized_votes > 0]
-        
-        simulated_votes.extend(positive_votes)
+    # Generate random preference intensities based on the specified distribution
+    preferences = generate_preferences(n_simulations, n_projects, preference_distribution, params, rng)
+    
+    # Optimal voting calculation
+    # v_i = u_i / sqrt(sum(u_i^2) / C)
+    denominator = np.sqrt(np.sum(preferences**2, axis=1, keepdims=True) / max_credits)
+    optimal_votes = np.divide(preferences, denominator, out=np.zeros(preferences.shape), where=denominator > 0)
+    
+    # Discretize votes (round to 1-9)
+    discretized_votes = np.clip(np.round(optimal_votes), 0, 9)
+    
+    # Only include positive votes
+    positive_votes = discretized_votes[discretized_votes > 0]
     
     # Count votes by value
-    vote_counts = pd.Series(simulated_votes).value_counts().sort_index()
-    vote_percentages = vote_counts / vote_counts.sum() * 100
+    return count_vote_values(positive_votes)
+
+def simulate_exact_optimal_votes(n_simulations=1000, n_projects=7, max_credits=99, max_votes=9,
+                                 preference_distribution='uniform', params=None, rng=None):
+    """
+    Simulate integer-optimal votes based on the utility maximization hypothesis
     
-    return vote_counts, vote_percentages
+    Same preferences as simulate_optimal_votes, but each voter casts the integer vote vector
+    that maximizes sum(u_i * v_i) subject to sum(v_i^2) <= max_credits, instead of rounding
+    the continuous optimum (which can exceed the budget or leave usable credits unspent).
+    Only positive votes are counted, as in simulate_optimal_votes.
+    """
+    # Default parameters
+    if params is None:
+        params = {}
+    rng = as_generator(rng)
+    
+    # Generate random preference intensities based on the specified distribution
+    preferences = generate_preferences(n_simulations, n_projects, preference_distribution, params, rng)
+    
+    # Exact integer optimum for every voter at once
+    optimal_votes = solve_optimal_ballots(preferences, max_credits, max_votes)
+    
+    # Only include positive votes
+    return count_vote_values(optimal_votes[optimal_votes > 0])
 
 def simulate_optimal_votes_with_zero(n_simulations=1000, n_projects=7, max_credits=99, 
                                     preference_distribution='uniform', params=None, 
-                                    indifference_threshold=0.5, decision_cost=0.2):
+                                    indifference_threshold=0.5, decision_cost=0.2, rng=None, verbose=False):
     """
     Simulate optimal votes with the possibility of 0 votes when preference is below threshold
-    """
-    simulated_votes = []
     
+    n_simulations // n_projects voters are simulated at once on a (voters x projects) matrix.
+    rng is a random number generator or seed (DEFAULT_SEED if None).
+    If verbose is True, the preferences and votes of every simulated voter are printed.
+    """
     # Default parameters
     if params is None:
         params = {}
+    rng = as_generator(rng)
     
-    print(f"  Debug: Starting simulation (threshold={indifference_threshold}, cost={decision_cost})")
+    if verbose:
+        print(f"  Debug: Starting simulation (threshold={indifference_threshold}, cost={decision_cost})")
     
-    for sim in range(n_simulations // n_projects):
-        # Generate random preference intensities
-        if preference_distribution == 'uniform':
-            preferences = np.random.uniform(0, 10, n_projects)
-        elif preference_distribution == 'normal':
-            mu = params.get('mu', 5)
-            sigma = params.get('sigma', 2)
-            preferences = np.random.normal(mu, sigma, n_projects)
-            preferences = np.clip(preferences, 0, 10)  # Clip to valid range
-        elif preference_distribution == 'power_law':
-            alpha = params.get('alpha', 2)
-            # Generate power-law distributed values
-            preferences = np.random.pareto(alpha, n_projects) * 3
-            preferences = np.clip(preferences, 0, 10)  # Clip to valid range
-        else:
-            raise ValueError(f"Unknown distribution: {preference_distribution}")
-        
-        # Apply indifference threshold and decision cost
-        adjusted_preferences = np.copy(preferences)
-        for i in range(n_projects):
-            if preferences[i] < indifference_threshold:
-                adjusted_preferences[i] = 0
-            else:
-                adjusted_preferences[i] -= decision_cost
-                if adjusted_preferences[i] < 0:
-                    adjusted_preferences[i] = 0
-        
-        # Calculate optimal vote allocation
-        credits_used = 0
-        final_votes = np.zeros(n_projects)
-        
-        # Sort indices by adjusted preference in descending order
-        sorted_indices = np.argsort(-adjusted_preferences)
+    # Generate random preference intensities
+    n_voters = n_simulations // n_projects
+    preferences = generate_preferences(n_voters, n_projects, preference_distribution, params, rng, model='with_zero')
+    
+    # Apply indifference threshold and decision cost
+    adjusted_preferences = np.where(preferences < indifference_threshold, 0,
+                                    np.clip(preferences - decision_cost, 0, None))
+    
+    # Allocate votes greedily in descending order of adjusted preference (all voters at once)
+    voters = np.arange(n_voters)
+    sorted_indices = np.argsort(-adjusted_preferences, axis=1)
+    final_votes = np.zeros((n_voters, n_projects))
+    credits_used = np.zeros(n_voters)
+    
+    for rank in range(n_projects):
+        idx = sorted_indices[:, rank]
+        preference = adjusted_preferences[voters, idx]
+        active = (preference > 0) & (credits_used < max_credits)
         
-        for idx in sorted_indices:
-            if adjusted_preferences[idx] <= 0:
-                continue
-                
-            # Calculate votes based on square root formula
-            optimal_votes = np.sqrt(adjusted_preferences[idx])
-            
-            # Round to nearest integer
-            votes = np.round(optimal_votes)
-            
-            # Check if we have enough credits left
-            cost = votes ** 2
-            if credits_used + cost > max_credits:
-                # If not enough credits, allocate maximum possible
-                max_possible = int(np.sqrt(max_credits - credits_used))
-                votes = max_possible
-                cost = votes ** 2
-            
-            # Update votes and credits
-            final_votes[idx] = votes
-            credits_used += cost
-            
-            # If no more credits, break
-            if credits_used >= max_credits:
-                break
+        # Votes from the square root formula, rounded to the nearest integer
+        votes = np.round(np.sqrt(preference))
+        cost = votes ** 2
         
-        # Print simulation details
-        print(f"    Simulation {sim+1}: Preference values = {preferences.round(2)}")
-        print(f"    Simulation {sim+1}: Adjusted preferences = {adjusted_preferences.round(2)}")
-        print(f"    Simulation {sim+1}: Final votes = {final_votes.astype(int)}")
+        # If not enough credits, allocate maximum possible
+        over_budget = credits_used + cost > max_credits
+        votes = np.where(over_budget, np.floor(np.sqrt(np.clip(max_credits - credits_used, 0, None))), votes)
+        cost = votes ** 2
         
-        # Add to simulated votes
-        for i in range(n_projects):
-            simulated_votes.append(final_votes[i])
+        final_votes[voters[active], idx[active]] = votes[active]
+        credits_used = credits_used + np.where(active, cost, 0)
+    
+    if verbose:
+        for sim in range(n_voters):
+            print(f"    Simulation {sim+1}: Preference values = {preferences[sim].round(2)}")
+            print(f"    Simulation {sim+1}: Adjusted preferences = {adjusted_preferences[sim].round(2)}")
+            print(f"    Simulation {sim+1}: Final votes = {final_votes[sim].astype(int)}")
     
     # Calculate distribution
-    vote_counts = pd.Series(simulated_votes).value_counts().sort_index()
-    vote_percentages = vote_counts / vote_counts.sum() * 100
+    vote_counts, vote_percentages = count_vote_values(final_votes.ravel())
     
-    print(f"  Debug: Total votes generated: {len(simulated_votes)}")
-    print(f"  Debug: Vote value types: {sorted(vote_counts.index.tolist())}")
-    print(f"  Debug: 0-vote percentage: {vote_percentages.get(0, 0):.2f}%")
+    if verbose:
+        print(f"  Debug: Total votes generated: {final_votes.size}")
+        print(f"  Debug: Vote value types: {sorted(vote_counts.index.tolist())}")
+        print(f"  Debug: 0-vote percentage: {vote_percentages.get(0, 0):.2f}%")
     
     return vote_counts, vote_percentages
 
+def simulate_vote_distribution_adaptive(simulate_fn, actual_counts, tolerance=0.5, chi2_rtol=0.2,
+                                        replicate_size=ADAPTIVE_REPLICATE_SIZE, replicates_per_batch=5, min_replicates=10,
+                                        max_replicates=100, seed=DEFAULT_SEED, **simulate_kwargs):
+    """
+    Run a vote-distribution simulation in batches until its estimates are precise enough
+    
+    Each replicate is one call of simulate_fn with replicate_size simulations and its own random stream.
+    Replicates are added in batches until the 95% confidence interval half-width of every tracked metric
+    (percentage at each vote value, chi-square statistic against actual_counts) is within its tolerance,
+    or max_replicates is reached.
+    
+    Parameters:
+    -----------
+    simulate_fn : callable
+        simulate_optimal_votes, simulate_exact_optimal_votes or simulate_optimal_votes_with_zero
+    actual_counts : pd.Series
+        Actual vote counts by vote value (for the chi-square statistic)
+    tolerance : float
+        Tolerance for the percentage at each vote value (percentage points)
+    chi2_rtol : float
+        Tolerance for the chi-square statistic, relative to its mean
+    replicate_size : int
+        n_simulations per replicate
+    replicates_per_batch : int
+        Number of replicates added per batch
+    min_replicates, max_replicates : int
+        Minimum and maximum number of replicates
+    seed : int
+        Random seed
+    **simulate_kwargs
+        Additional arguments passed to simulate_fn
+        
+    Returns:
+    --------
+    vote_counts : pd.Series
+        Pooled count of votes for each vote value
+    vote_percentages : pd.Series
+        Pooled percentage of votes for each vote value
+    adaptive_result : dict
+        Result of run_adaptive_replicates (n_replicates, converged, ci_half_width, ...)
+    """
+    replicate_counts = []
+    
+    def draw_batch(batch_index, n_replicates):
+        metrics = []
+        for i in range(n_replicates):
+            rng = make_rng(seed, batch_index, i)
+            counts, percentages = simulate_fn(n_simulations=replicate_size, rng=rng, **simulate_kwargs)
+            replicate_counts.append(counts)
+            chi2_stat, _, _ = chi_square_test(actual_counts, counts)
+            metrics.append([percentages.get(v, 0) for v in VOTE_VALUES] + [chi2_stat])
+        return metrics
+    
+    tolerances = np.array([tolerance] * len(VOTE_VALUES) + [0.0])
+    rtols = np.array([0.0] * len(VOTE_VALUES) + [chi2_rtol])
+    adaptive_result = run_adaptive_replicates(
+        draw_batch, tolerances, batch_size=replicates_per_batch,
+        max_replicates=max_replicates, min_replicates=min_replicates, rtol=rtols
+    )
+    
+    # Pool all replicates
+    vote_counts = pd.concat(replicate_counts, axis=1).fillna(0).sum(axis=1).sort_index()
+    vote_percentages = vote_counts / vote_counts.sum() * 100
+    
+    return vote_counts, vote_percentages, adaptive_result
+
+def zero_vote_model_objective(params, actual_counts, n_simulations=7000, n_projects=7, max_credits=99,
+                              preference_distribution='uniform', seed=DEFAULT_SEED):
+    """
+    Fit metrics of the zero-vote model at one parameter point (objective for fit_parameters)
+    
+    params holds indifference_threshold and decision_cost; any other entries are passed as
+    preference distribution parameters. Every point uses the same random stream (common random
+    numbers), so the loss (chi-square statistic against actual_counts on the fixed vote-value
+    support, see fixed_support_chi_square) is deterministic and comparable between points.
+    """
+    model_params = {name: value for name, value in params.items() if name in ZERO_MODEL_BOUNDS}
+    distribution_params = {name: value for name, value in params.items() if name not in ZERO_MODEL_BOUNDS}
+    
+    sim_counts, sim_percentages = simulate_optimal_votes_with_zero(
+        n_simulations=n_simulations,
+        n_projects=n_projects,
+        max_credits=max_credits,
+        preference_distribution=preference_distribution,
+        params=distribution_params,
+        rng=make_rng(seed, 1),
+        **model_params
+    )
+    chi2_stat, p_value, df = fixed_support_chi_square(actual_counts, sim_counts)
+    
+    actual_zero_percent = actual_counts.get(0, 0) / actual_counts.sum() * 100
+    zero_percent = sim_percentages.get(0, 0)
+    
+    return {
+        'loss': chi2_stat,
+        'chi2': chi2_stat,
+        'p_value': p_value,
+        'df': df,
+        'zero_percent': zero_percent,
+        'zero_percent_diff': abs(zero_percent - actual_zero_percent)
+    }
+
+def fit_zero_vote_model(actual_counts, grid=None, bounds=None, n_simulations=7000, n_projects=7, max_credits=99,
+                        preference_distribution='uniform', seed=DEFAULT_SEED, n_jobs=None,
+                        cache_file=PARAM_CACHE_FILE):
+    """
+    Fit the zero-vote model parameters to the actual vote distribution
+    
+    The grid is evaluated on a process pool, then the best grid point is refined with Nelder-Mead
+    within bounds (pass bounds={} to skip refining). Evaluated points are cached in cache_file,
+    so rerunning or widening the grid only simulates new points.
+    
+    Parameters:
+    -----------
+    actual_counts : pd.Series
+        Actual vote counts by vote value
+    grid : dict
+        Parameter name -> list of values (ZERO_MODEL_GRID if None). Names other than
+        indifference_threshold and decision_cost are preference distribution parameters
+    bounds : dict
+        Parameter name -> (lower, upper) for refining (ZERO_MODEL_BOUNDS if None)
+    n_simulations, n_projects, max_credits, preference_distribution, seed
+        Simulation settings for every parameter point
+    n_jobs : int
+        Number of worker processes for the grid (CPU count if None)
+    cache_file : str
+        JSON file of evaluated parameter points (None to disable caching)
+        
+    Returns:
+    --------
+    best_params : dict
+        Parameters with the lowest chi-square statistic
+    evaluations : pd.DataFrame
+        All evaluated parameter points with their metrics
+    """
+    if grid is None:
+        grid = ZERO_MODEL_GRID
+    if bounds is None:
+        bounds = ZERO_MODEL_BOUNDS
+    
+    # Settings that change the results are part of the cache key
+    context = json.dumps({
+        'model': 'with_zero', 'loss': 'fixed_support_chi2', 'n_simulations': n_simulations, 'n_projects': n_projects,
+        'max_credits': max_credits, 'preference_distribution': preference_distribution, 'seed': seed,
+        'actual_counts': {str(k): int(v) for k, v in actual_counts.items()}
+    }, sort_keys=True)
+    
+    return fit_parameters(
+        zero_vote_model_objective, grid, bounds, cache_file=cache_file, context=context, n_jobs=n_jobs,
+        actual_counts=actual_counts, n_simulations=n_simulations, n_projects=n_projects,
+        max_credits=max_credits, preference_distribution=preference_distribution, seed=seed
+    )
+
 def compare_distributions(actual_percentages, simulated_percentages):
     """Compare actual and simulated distributions"""
     # Align indices
@@ -395,6 +581,34 @@ def chi_square_test(actual_counts, simulated_counts):
     
     return chi2_stat, p_value, df
 
+def fixed_support_chi_square(actual_counts, simulated_counts, support=VOTE_VALUES):
+    """
+    Chi-square test of the actual counts against simulated probabilities on a fixed vote-value support
+    
+    Unlike chi_square_test, no vote value is dropped when the simulation produced none of it:
+    empty simulated bins get a floor probability at the simulation resolution (as in
+    fit_preference_mle), so every parameter point is scored on the same bins with the same
+    degrees of freedom. Actual votes outside the support (negative votes) are ignored.
+    
+    Returns:
+    --------
+    chi2_stat, p_value, df (len(support) - 1)
+    """
+    actual_array = np.array([float(actual_counts.get(v, 0)) for v in support])
+    simulated_array = np.array([float(simulated_counts.get(v, 0)) for v in support])
+    n_simulated = simulated_array.sum()
+    if n_simulated <= 0:
+        return float('inf'), 0.0, len(support) - 1
+    
+    # Floor empty bins at half a simulated vote, then renormalize
+    probabilities = np.clip(simulated_array / n_simulated, 0.5 / n_simulated, None)
+    expected = probabilities / probabilities.sum() * actual_array.sum()
+    
+    chi2_stat = np.sum((actual_array - expected) ** 2 / expected)
+    df = len(support) - 1
+    
+    return chi2_stat, stats.chi2.sf(chi2_stat, df), df
+
 def plot_distribution_comparison(comparison_df, output_file):
     """Plot comparison of actual and simulated distributions"""
     trans_dict = get_translation_dict()
@@ -623,12 +837,15 @@ def main():
     
     # Simulate using traditional utility maximization model (no zero votes)
     print("\nTraditional utility maximization model simulation:")
-    traditional_sim_counts, traditional_sim_percentages = simulate_optimal_votes(
-        n_simulations=7000,  # Simulate for 7 projects * 1000 voters
+    # At least 7000 simulations (7 projects * 1000 voters), more until the estimates are precise enough
+    traditional_sim_counts, traditional_sim_percentages, traditional_adaptive = simulate_vote_distribution_adaptive(
+        simulate_optimal_votes,
+        actual_counts,
         n_projects=7,
         max_credits=99,
         preference_distribution='uniform'
     )
+    print(f"Simulations run: {traditional_adaptive['n_replicates'] * ADAPTIVE_REPLICATE_SIZE} (converged: {traditional_adaptive['converged']})")
     
     # Print simulated distribution
     print("Traditional utility maximization model theoretical distribution:")
@@ -658,65 +875,55 @@ def main():
     traditional_output_file = os.path.join(OUTPUT_DIR, 'utility_max_comparison.png')
     plot_distribution_comparison(traditional_comparison, traditional_output_file)
     
-    # Approach 2: Enhanced model with 0 votes
-    print("\nApproach 2: Utility maximization model including 0 votes")
+    # Exact integer-optimal ballots (no rounding of the continuous optimum)
+    print("\nExact integer-optimal utility maximization model simulation:")
+    exact_sim_counts, exact_sim_percentages, exact_adaptive = simulate_vote_distribution_adaptive(
+        simulate_exact_optimal_votes,
+        actual_counts,
+        n_projects=7,
+        max_credits=99,
+        preference_distribution='uniform'
+    )
+    print(f"Simulations run: {exact_adaptive['n_replicates'] * ADAPTIVE_REPLICATE_SIZE} (converged: {exact_adaptive['converged']})")
     
-    # Parameter grid search
-    thresholds = [0.5, 1.0, 1.5, 2.0]
-    costs = [0.1, 0.2, 0.3, 0.4]
+    exact_comparison = compare_distributions(filtered_percentages, exact_sim_percentages)
+    print("\nExact integer-optimal model vs. filtered data comparison:")
+    print(exact_comparison)
     
-    best_threshold = None
-    best_cost = None
-    best_zero_percent_diff = float('inf')
-    best_chi2 = float('inf')
-    best_sim_counts = None
-    best_sim_percentages = None
+    exact_chi2_stat, exact_p_value, exact_df = chi_square_test(filtered_counts, exact_sim_counts)
+    print(f"Chi-square test for exact integer-optimal model vs. filtered data: x^2={exact_chi2_stat:.4f}, df={exact_df}, p={exact_p_value:.8f}")
     
-    # Get actual zero vote percentage
-    actual_zero_percent = actual_percentages.get(0, 0)
+    # Approach 2: Enhanced model with 0 votes
+    print("\nApproach 2: Utility maximization model including 0 votes")
     
+    # Parameter search: grid on a process pool, then Nelder-Mead refinement (cached on disk)
     print("Parameter optimization in progress...")
-    for threshold in thresholds:
-        for cost in costs:
-            try:
-                print(f"  Debug: Starting simulation (threshold={threshold}, cost={cost})")
-                zero_sim_counts, zero_sim_percentages = simulate_optimal_votes_with_zero(
-                    n_simulations=7000,
-                    n_projects=7,
-                    max_credits=99,
-                    preference_distribution='uniform',
-                    indifference_threshold=threshold,
-                    decision_cost=cost
-                )
-                
-                # Calculate zero vote percentage difference
-                model_zero_percent = zero_sim_percentages.get(0, 0)
-                zero_percent_diff = abs(model_zero_percent - actual_zero_percent)
-                
-                print(f"  Threshold={threshold}, Cost={cost}: 0-vote percentage={model_zero_percent:.2f}% (Actual: {actual_zero_percent:.2f}%, Difference: {zero_percent_diff:.2f}%)")
-                
-                # Chi-square test for full distribution
-                try:
-                    zero_chi2_stat, zero_p_value, zero_df = chi_square_test(actual_counts, zero_sim_counts)
-                    print(f"    x^2={zero_chi2_stat:.4f}, p={zero_p_value:.4f}, df={zero_df}")
-                except Exception as e:
-                    print(f"    Statistical test error: {str(e)}")
-                    zero_chi2_stat = float('inf')
-                
-                # Update best parameters based on zero percentage difference and chi-square
-                if zero_percent_diff < best_zero_percent_diff or (zero_percent_diff == best_zero_percent_diff and zero_chi2_stat < best_chi2):
-                    best_threshold = threshold
-                    best_cost = cost
-                    best_zero_percent_diff = zero_percent_diff
-                    best_chi2 = zero_chi2_stat
-                    best_sim_counts = zero_sim_counts
-                    best_sim_percentages = zero_sim_percentages
-                    print(f"    Found new optimal parameters!")
-                
-            except Exception as e:
-                print(f"  Simulation error (threshold={threshold}, cost={cost}): {str(e)}")
-                
-    print(f"\nOptimal parameters: Threshold={best_threshold}, Cost={best_cost}, 0-vote difference={best_zero_percent_diff:.2f}%, x^2={best_chi2:.4f}")
+    best_params, evaluations = fit_zero_vote_model(actual_counts)
+    
+    for _, row in evaluations[evaluations['stage'] == 'grid'].iterrows():
+        print(f"  Threshold={row['indifference_threshold']:.3f}, Cost={row['decision_cost']:.3f}: "
+              f"0-vote percentage={row['zero_percent']:.2f}% (Difference: {row['zero_percent_diff']:.2f}%), "
+              f"x^2={row['chi2']:.4f}, df={row['df']:.0f}, p={row['p_value']:.4f}")
+    print(f"  Refinement: {(evaluations['stage'] == 'refine').sum()} parameter points evaluated")
+    
+    best_threshold = best_params['indifference_threshold']
+    best_cost = best_params['decision_cost']
+    best_row = evaluations.loc[evaluations['loss'].idxmin()]
+    best_zero_percent_diff = best_row['zero_percent_diff']
+    best_chi2 = best_row['chi2']
+    
+    # Rerun the best parameters (same random stream as in the search) for the plots and report
+    best_sim_counts, best_sim_percentages = simulate_optimal_votes_with_zero(
+        n_simulations=7000,
+        n_projects=7,
+        max_credits=99,
+        preference_distribution='uniform',
+        indifference_threshold=best_threshold,
+        decision_cost=best_cost,
+        rng=make_rng(DEFAULT_SEED, 1)
+    )
+    
+    print(f"\nOptimal parameters: Threshold={best_threshold:.3f}, Cost={best_cost:.3f}, 0-vote difference={best_zero_percent_diff:.2f}%, x^2={best_chi2:.4f}")
     
     if best_sim_percentages is not None:
         # Compare best model with actual data
@@ -728,7 +935,7 @@ def main():
         
         # Chi-square test for the best model
         try:
-            zero_chi2_stat, zero_p_value, zero_df = chi_square_test(actual_counts, best_sim_counts)
+            zero_chi2_stat, zero_p_value, zero_df = fixed_support_chi_square(actual_counts, best_sim_counts)
             print(f"Chi-square test for 0-vote model vs. all data: x^2={zero_chi2_stat:.4f}, df={zero_df}, p={zero_p_value:.8f}")
         except Exception as e:
             print(f"Statistical test error for 0-vote model vs. all data: {str(e)}")
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+信頼区間の幅に基づいて試行回数を決める逐次（適応的）モンテカルロのユーティリティ
+
+試行をバッチ単位で追加し、追跡するすべての指標の信頼区間の半幅が許容誤差以下になるか、
+試行回数の上限に達した時点で停止する。ばらつきの小さいシナリオは早く終わり、
+ばらつきの大きいシナリオには必要なだけ試行を割り当てる
+"""
+
+import numpy as np
+from scipy import stats
+
+def confidence_half_width(samples, confidence=0.95):
+    """
+    試行結果 (試行数, ...) から、指標ごとの平均の信頼区間の半幅（t分布）を計算する
+    """
+    samples = np.asarray(samples, dtype=float)
+    n = len(samples)
+    if n < 2:
+        return np.full(samples.shape[1:], np.inf)
+
+    t_value = stats.t.ppf((1 + confidence) / 2, n - 1)
+    return t_value * samples.std(axis=0, ddof=1) / np.sqrt(n)
+
+def run_adaptive_replicates(draw_batch, tolerance, batch_size=100, max_replicates=10000,
+                            min_replicates=None, confidence=0.95, rtol=0.0):
+    """
+    信頼区間の幅が許容誤差以下になるまで、試行をバッチ単位で繰り返す
+
+    Parameters:
+    -----------
+    draw_batch : callable
+        draw_batch(バッチ番号, 試行数) が試行ごとの指標 (試行数, ...) を返す関数。
+        バッチ番号を乱数ストリームのキーに使えば、結果は停止位置によらず再現できる
+    tolerance : float or numpy.ndarray
+        信頼区間の半幅の許容誤差（絶対値。指標ごとに指定する場合は指標の形状に合わせた配列）
+    batch_size : int
+        1バッチあたりの試行数
+    max_replicates : int
+        試行回数の上限
+    min_replicates : int, optional
+        停止判定を行う最小の試行回数（指定しない場合は batch_size）
+    confidence : float
+        信頼水準
+    rtol : float or numpy.ndarray
+        平均の絶対値に対する相対的な許容誤差。停止条件は 半幅 <= tolerance + rtol × |平均|
+
+    Returns:
+    --------
+    dict
+        'samples' : 全試行の指標 (試行数, ...)
+        'mean' : 指標ごとの平均
+        'std' : 指標ごとの標準偏差
+        'ci_half_width' : 指標ごとの信頼区間の半幅
+        'n_replicates' : 実行した試行数
+        'n_batches' : 実行したバッチ数
+        'converged' : すべての指標が許容誤差以下になったかどうか
+    """
+    if batch_size < 1 or max_replicates < 1:
+        raise ValueError("batch_size と max_replicates は1以上である必要があります")
+    if min_replicates is None:
+        min_replicates = batch_size
+
+    batches = []
+    n_replicates = 0
+    converged = False
+    while n_replicates < max_replicates:
+        batch = np.asarray(draw_batch(len(batches), min(batch_size, max_replicates - n_replicates)), dtype=float)
+        batches.append(batch)
+        n_replicates += len(batch)
+
+        if n_replicates >= min_replicates:
+            samples = np.concatenate(batches)
+            half_width = confidence_half_width(samples, confidence)
+            if np.all(half_width <= tolerance + rtol * np.abs(samples.mean(axis=0))):
+                converged = True
+                break
+
+    samples = np.concatenate(batches)
+
+    return {
+        'samples': samples,
+        'mean': samples.mean(axis=0),
+        'std': samples.std(axis=0, ddof=1) if len(samples) > 1 else np.zeros(samples.shape[1:]),
+        'ci_half_width': confidence_half_width(samples, confidence),
+        'n_replicates': n_replicates,
+        'n_batches': len(batches),
+        'converged': converged
+    }
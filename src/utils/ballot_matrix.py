@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+横形式の投票データ（votes.csv）を投票者×候補者の投票行列として扱うための共通ユーティリティ
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+# ルートディレクトリへのパスを取得
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+def get_candidate_columns(num_candidates):
+    """候補者ごとの投票列名（candidate_0, candidate_1, ...）のリストを返す"""
+    return [f'candidate_{i}' for i in range(num_candidates)]
+
+def to_ballot_matrix(votes_df, num_candidates=None):
+    """
+    横形式の投票データを投票者×候補者の投票行列に変換する
+
+    Parameters:
+    -----------
+    votes_df : pandas.DataFrame
+        投票データ（横形式、candidate_i 列を持つ）
+    num_candidates : int, optional
+        候補者数。指定しない場合は candidate_i 列の数から決定
+
+    Returns:
+    --------
+    numpy.ndarray
+        形状 (投票者数, 候補者数) の整数行列。欠損値・存在しない列は0票として扱う
+    """
+    if num_candidates is None:
+        num_candidates = sum(1 for col in votes_df.columns if col.startswith('candidate_'))
+
+    columns = get_candidate_columns(num_candidates)
+    ballots = votes_df.reindex(columns=columns).fillna(0).to_numpy()
+
+    return ballots.astype(int)
+
+def load_ballot_matrix(votes_file='votes.csv', num_candidates=None):
+    """
+    data ディレクトリの投票データを読み込み、投票者IDと投票行列を返す
+
+    Parameters:
+    -----------
+    votes_file : str
+        投票データのファイル名（data ディレクトリからの相対パス）
+    num_candidates : int, optional
+        候補者数
+
+    Returns:
+    --------
+    voter_ids : numpy.ndarray
+        投票行列の各行に対応する投票者ID
+    ballots : numpy.ndarray
+        投票者×候補者の投票行列
+    """
+    votes_df = pd.read_csv(os.path.join(ROOT_DIR, 'data', votes_file))
+
+    return votes_df['voter_id'].to_numpy(), to_ballot_matrix(votes_df, num_candidates)
+
+def long_to_ballot_matrix(votes_long_df, num_candidates=None):
+    """
+    長形式の投票データ（voter_id, candidate_id, vote_value）を投票行列に変換する
+
+    同じ投票者が複数回投票している場合は、それぞれを別の行（投票用紙）として扱う。
+    candidate_id はそのまま投票行列の列番号として使うため、0 以上 候補者数 未満の整数でなければならない
+
+    Parameters:
+    -----------
+    votes_long_df : pandas.DataFrame
+        投票データ（長形式）
+    num_candidates : int, optional
+        候補者数。指定しない場合は candidate_id の最大値から決定
+
+    Returns:
+    --------
+    voter_ids : numpy.ndarray
+        投票行列の各行に対応する投票者ID
+    ballots : numpy.ndarray
+        投票者×候補者の投票行列（長形式に存在しない組み合わせは0票）
+
+    Raises:
+    -------
+    ValueError
+        candidate_id が整数でない・負・候補者数以上の場合、または投票値が整数でない場合
+    """
+    raw_ids = votes_long_df['candidate_id'].to_numpy(dtype=float)
+    raw_values = votes_long_df['vote_value'].fillna(0).to_numpy(dtype=float)
+    if np.any(raw_ids != np.round(raw_ids)):
+        raise ValueError("candidate_id は整数でなければなりません")
+    if np.any(raw_values != np.round(raw_values)):
+        raise ValueError("vote_value は整数でなければなりません")
+
+    candidate_ids = raw_ids.astype(int)
+    if num_candidates is None:
+        num_candidates = int(candidate_ids.max()) + 1 if len(candidate_ids) > 0 else 0
+    if np.any((candidate_ids < 0) | (candidate_ids >= num_candidates)):
+        raise ValueError(f"candidate_id は 0 以上 {num_candidates} 未満でなければなりません")
+
+    # 同じ投票者・候補者の組み合わせが何回目の投票かで投票用紙を区別する
+    occurrence = votes_long_df.groupby(['voter_id', 'candidate_id'], sort=False).cumcount()
+    row_index = votes_long_df.groupby([votes_long_df['voter_id'], occurrence], sort=False).ngroup().to_numpy()
+    num_ballots = int(row_index.max()) + 1 if len(row_index) > 0 else 0
+
+    voter_ids = np.empty(num_ballots, dtype=object)
+    voter_ids[row_index] = votes_long_df['voter_id'].to_numpy()
+
+    ballots = np.zeros((num_ballots, num_candidates), dtype=int)
+    ballots[row_index, candidate_ids] = raw_values.astype(int)
+
+    return voter_ids, ballots
@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+シミュレーションモデルのパラメータ探索のユーティリティ
+
+パラメータグリッドをプロセスプールで評価し、最良点から微分を使わない最適化（Nelder-Mead 法）で
+連続的に絞り込む。評価済みのパラメータ点はディスク上のキャッシュ（JSON）に保存し、
+再実行やグリッドの拡張時には未評価の点だけを計算する。
+
+目的関数は objective(params, **objective_kwargs) の形のモジュールレベルの関数で、
+'loss' を含む指標の辞書を返す。パラメータ点ごとに同じ乱数ストリームを使う（共通乱数）と
+目的関数が決定的になり、最適化とキャッシュの再利用が安定する
+"""
+
+import os
+import json
+import itertools
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from scipy.optimize import minimize
+
+PARAM_DECIMALS = 6  # キャッシュのキーに使うパラメータの小数点以下の桁数
+
+def grid_points(grid):
+    """パラメータ名→値のリストの辞書から、直積のパラメータ点のリストを作る"""
+    names = list(grid.keys())
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+class ParameterCache:
+    """
+    評価済みパラメータ点のディスクキャッシュ
+
+    キーは (context, パラメータ) で、context には目的関数の名前・試行回数・シードなど
+    結果を左右する設定を入れる。設定が変わったときに古い結果を使わないため
+    """
+
+    def __init__(self, cache_file=None, context=''):
+        self.cache_file = cache_file
+        self.context = context
+        self.entries = {}
+        if cache_file is not None and os.path.exists(cache_file):
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+
+    def key(self, params):
+        """パラメータ点のキャッシュキー（名前順、丸めた値）"""
+        rounded = {name: round(float(value), PARAM_DECIMALS) for name, value in sorted(params.items())}
+        return json.dumps([self.context, rounded], sort_keys=True)
+
+    def get(self, params):
+        return self.entries.get(self.key(params))
+
+    def put(self, params, metrics):
+        self.entries[self.key(params)] = metrics
+
+    def save(self):
+        """キャッシュをファイルに保存（一時ファイル経由で置き換え）"""
+        if self.cache_file is None:
+            return
+        os.makedirs(os.path.dirname(self.cache_file) or '.', exist_ok=True)
+        tmp_file = self.cache_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_file, self.cache_file)
+
+def evaluate_points(objective, points, cache=None, n_jobs=None, **objective_kwargs):
+    """
+    パラメータ点のリストを評価する（キャッシュ済みの点は再計算しない）
+
+    Parameters:
+    -----------
+    objective : callable
+        objective(params, **objective_kwargs) が 'loss' を含む指標の辞書を返す
+        モジュールレベルの関数（プロセスプールで実行するため）
+    points : list of dict
+        パラメータ点のリスト
+    cache : ParameterCache, optional
+        評価済みパラメータ点のキャッシュ
+    n_jobs : int
+        並列プロセス数（None の場合はCPUコア数、1 の場合は逐次実行）
+
+    Returns:
+    --------
+    pandas.DataFrame
+        パラメータ点ごとのパラメータと指標（points と同じ順序）
+    """
+    if cache is None:
+        cache = ParameterCache()
+    if n_jobs is None:
+        n_jobs = os.cpu_count() or 1
+
+    # 未評価の点だけを計算（同じ点の重複も1回にまとめる）
+    pending = {}
+    for params in points:
+        if cache.get(params) is None:
+            pending.setdefault(cache.key(params), params)
+    pending = list(pending.values())
+
+    if pending:
+        if n_jobs > 1 and len(pending) > 1:
+            with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                futures = [executor.submit(objective, params, **objective_kwargs) for params in pending]
+                results = [future.result() for future in futures]
+        else:
+            results = [objective(params, **objective_kwargs) for params in pending]
+
+        for params, metrics in zip(pending, results):
+            cache.put(params, {name: float(value) for name, value in metrics.items()})
+        cache.save()
+
+    return pd.DataFrame([{**params, **cache.get(params)} for params in points])
+
+def refine_parameters(objective, start, bounds, cache=None, max_evaluations=60, initial_step=None,
+                      **objective_kwargs):
+    """
+    開始点から Nelder-Mead 法で損失を最小化するパラメータを探す
+
+    評価はすべてキャッシュを経由するため、同じ点を二度計算しない
+
+    Parameters:
+    -----------
+    objective : callable
+        evaluate_points() と同じ形式の目的関数
+    start : dict
+        開始点のパラメータ
+    bounds : dict
+        パラメータ名→(下限, 上限)。最適化するパラメータ
+    cache : ParameterCache, optional
+        評価済みパラメータ点のキャッシュ
+    max_evaluations : int
+        目的関数の評価回数の上限
+    initial_step : dict, optional
+        パラメータ名→初期単体の辺の長さ（指定しない場合は範囲の10%）
+
+    Returns:
+    --------
+    pandas.DataFrame
+        最適化中に評価したパラメータ点と指標（評価順）
+    """
+    if cache is None:
+        cache = ParameterCache()
+    names = list(bounds.keys())
+    lower = np.array([bounds[name][0] for name in names], dtype=float)
+    upper = np.array([bounds[name][1] for name in names], dtype=float)
+    if initial_step is None:
+        initial_step = {}
+    steps = np.array([initial_step.get(name, 0.1 * (bounds[name][1] - bounds[name][0])) for name in names])
+
+    evaluated = []
+
+    def loss(x):
+        params = dict(start)
+        params.update(zip(names, np.clip(x, lower, upper)))
+        row = evaluate_points(objective, [params], cache, n_jobs=1, **objective_kwargs).iloc[0]
+        evaluated.append(row)
+        return row['loss']
+
+    # 開始点の周りの初期単体（範囲内に収まる向きに辺を伸ばす）
+    x0 = np.array([start[name] for name in names], dtype=float)
+    simplex = [x0]
+    for i in range(len(names)):
+        vertex = x0.copy()
+        vertex[i] = vertex[i] + steps[i] if vertex[i] + steps[i] <= upper[i] else vertex[i] - steps[i]
+        simplex.append(vertex)
+
+    minimize(loss, x0, method='Nelder-Mead', bounds=list(zip(lower, upper)),
+             options={'initial_simplex': np.array(simplex), 'maxfev': max_evaluations})
+
+    return pd.DataFrame(evaluated).drop_duplicates(subset=names).reset_index(drop=True)
+
+def fit_parameters(objective, grid, bounds=None, cache_file=None, context='', n_jobs=None,
+                   max_evaluations=60, **objective_kwargs):
+    """
+    グリッド探索（並列）と Nelder-Mead 法による絞り込みでパラメータを推定する
+
+    Parameters:
+    -----------
+    objective : callable
+        evaluate_points() と同じ形式の目的関数
+    grid : dict
+        パラメータ名→値のリスト（グリッド探索の点）
+    bounds : dict, optional
+        パラメータ名→(下限, 上限)。指定した場合はグリッドの最良点から絞り込む
+    cache_file : str, optional
+        評価済みパラメータ点のキャッシュファイル（JSON）
+    context : str
+        キャッシュのキーに含める設定（目的関数・試行回数・シードなど）
+    n_jobs : int
+        グリッド探索の並列プロセス数
+    max_evaluations : int
+        絞り込みでの目的関数の評価回数の上限
+
+    Returns:
+    --------
+    best_params : dict
+        損失が最小のパラメータ
+    evaluations : pandas.DataFrame
+        評価したすべてのパラメータ点と指標（'stage' 列が 'grid' または 'refine'）
+    """
+    cache = ParameterCache(cache_file, context)
+
+    grid_results = evaluate_points(objective, grid_points(grid), cache, n_jobs, **objective_kwargs)
+    grid_results['stage'] = 'grid'
+    evaluations = grid_results
+
+    best = grid_results.loc[grid_results['loss'].idxmin()]
+    if bounds:
+        start = {name: best[name] for name in grid}
+        refine_results = refine_parameters(objective, start, bounds, cache, max_evaluations, **objective_kwargs)
+        refine_results['stage'] = 'refine'
+        evaluations = pd.concat([grid_results, refine_results], ignore_index=True)
+
+    best = evaluations.loc[evaluations['loss'].idxmin()]
+    best_params = {name: float(best[name]) for name in grid}
+
+    return best_params, evaluations
@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+QV投票から効用モデルのもとでの投票者の潜在的な選好の強さを逆推定するユーティリティ
+
+効用 Σu_i v_i を予算 Σv_i^2 <= クレジット の下で最大化する投票者は、クレジット1単位あたりの
+限界効用 μ に対して「1票追加するコスト 2|v_i|+1 に見合わない」「1票減らして節約できる 2|v_i|-1 より
+価値がある」を満たす票数 v_i を選ぶ。すなわち選好を票数の単位 u_i / (2μ) で表すと
+
+    v_i - 0.5 <= u_i / (2μ) <= v_i + 0.5
+
+となり、各投票と整合する選好の範囲（集合推定）と点推定（v_i）が得られる。
+選好の尺度（μ）は投票からは識別できないため、予算を使い切った場合の票数に換算した値
+（予算正規化した選好）も返す。すべて投票者×候補者の行列演算で一括計算する
+"""
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+# ルートディレクトリへのパスを取得
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.append(ROOT_DIR)
+
+from src.utils.ballot_matrix import load_ballot_matrix
+from src.utils.qv_ballot_solver import vote_cost_table, DEFAULT_CREDITS, DEFAULT_MAX_VOTES
+
+PREFERENCE_ESTIMATES_FILE = os.path.join(ROOT_DIR, 'results', 'data', 'voter_preference_estimates.csv')
+
+def infer_preferences(ballots, credits=DEFAULT_CREDITS, max_votes=DEFAULT_MAX_VOTES, allow_negative=True):
+    """
+    投票行列から、各投票と整合する選好の範囲と点推定を一括で計算する
+
+    Parameters:
+    -----------
+    ballots : numpy.ndarray
+        投票者×候補者の投票行列
+    credits : int
+        1人あたりのクレジット
+    max_votes : int
+        1候補あたりの最大票数（これに達した票の上限は無限大）
+    allow_negative : bool
+        負の投票を認めるかどうか（False の場合、0票の選好の下限は0）
+
+    Returns:
+    --------
+    dict
+        'estimate' : 選好の点推定（票数の単位） (投票者数, 候補者数)
+        'lower', 'upper' : 投票と整合する選好の下限・上限（票数の単位）
+        'normalized' : 予算を使い切った場合の票数に換算した選好の点推定
+        'normalized_lower', 'normalized_upper' : 同じ換算をした下限・上限
+        'credits_used' : 使用クレジット (投票者数,)
+        'slack_credits' : 未使用クレジット (投票者数,)
+        'budget_consistent' : 未使用クレジットで票を追加できる投票先がない
+            （効用モデルと整合する）かどうか (投票者数,)
+    """
+    ballots = np.asarray(ballots, dtype=int)
+    votes, _ = vote_cost_table(credits, max_votes)
+    max_vote = votes[-1]
+    magnitude = np.abs(ballots)
+
+    credits_used = (ballots ** 2).sum(axis=1)
+    slack_credits = credits - credits_used
+
+    estimate = ballots.astype(float)
+    lower = estimate - 0.5
+    upper = estimate + 0.5
+    if not allow_negative:
+        lower[ballots == 0] = 0.0
+
+    # 最大票数に達した投票は、それ以上の選好の強さを区別できない
+    upper[ballots >= max_vote] = np.inf
+    lower[ballots <= -max_vote] = -np.inf
+
+    # 未使用クレジットで1票追加できる投票先: 0票ならその候補への選好は0、票があればモデルと矛盾
+    can_add = (magnitude < max_vote) & (2 * magnitude + 1 <= slack_credits[:, None])
+    indifferent = can_add & (ballots == 0)
+    lower[indifferent] = 0.0
+    upper[indifferent] = 0.0
+    budget_consistent = ~np.any(can_add & (ballots != 0), axis=1)
+
+    # 予算を使い切った場合の票数への換算（連続最適解 v = u / (2μ) の尺度を合わせる）
+    scale = np.sqrt(np.divide(credits, credits_used, out=np.zeros(len(ballots)), where=credits_used > 0))
+
+    return {
+        'estimate': estimate,
+        'lower': lower,
+        'upper': upper,
+        'normalized': estimate * scale[:, None],
+        'normalized_lower': lower * scale[:, None],
+        'normalized_upper': upper * scale[:, None],
+        'credits_used': credits_used,
+        'slack_credits': slack_credits,
+        'budget_consistent': budget_consistent
+    }
+
+def preference_estimate_table(voter_ids, ballots, **kwargs):
+    """
+    infer_preferences() の結果を長形式（投票者×候補者の1行ずつ）の表にする
+
+    Parameters:
+    -----------
+    voter_ids : numpy.ndarray
+        投票行列の各行に対応する投票者ID
+    ballots : numpy.ndarray
+        投票者×候補者の投票行列
+    **kwargs
+        infer_preferences() に渡す引数
+
+    Returns:
+    --------
+    pandas.DataFrame
+        voter_id, candidate_id, vote, 選好の推定値・範囲, 予算の使用状況の列を持つ表
+    """
+    ballots = np.asarray(ballots, dtype=int)
+    num_voters, num_candidates = ballots.shape
+    inferred = infer_preferences(ballots, **kwargs)
+
+    table = pd.DataFrame({
+        'voter_id': np.repeat(np.asarray(voter_ids), num_candidates),
+        'candidate_id': np.tile(np.arange(num_candidates), num_voters),
+        'vote': ballots.ravel()
+    })
+    for name in ['estimate', 'lower', 'upper', 'normalized', 'normalized_lower', 'normalized_upper']:
+        table[name] = inferred[name].ravel()
+    for name in ['credits_used', 'slack_credits', 'budget_consistent']:
+        table[name] = np.repeat(inferred[name], num_candidates)
+
+    return table
+
+def main():
+    """投票データから選好の推定値を計算して保存する"""
+    voter_ids, ballots = load_ballot_matrix()
+    table = preference_estimate_table(voter_ids, ballots)
+
+    consistent = table['budget_consistent'].to_numpy()[::ballots.shape[1]]
+    print(f"投票者数: {len(consistent)}、効用モデルと整合する投票者: {consistent.sum()} ({consistent.mean() * 100:.1f}%)")
+
+    os.makedirs(os.path.dirname(PREFERENCE_ESTIMATES_FILE), exist_ok=True)
+    table.to_csv(PREFERENCE_ESTIMATES_FILE, index=False)
+    print(f"Saved: {PREFERENCE_ESTIMATES_FILE}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+QV方式の予算配分を複数シナリオ分まとめて計算する共通カーネル
+感度分析・中立バイアスシミュレーション・モンテカルロ実験で共有する
+"""
+
+import numpy as np
+
+# 投票値から配分スコアへの変換
+# 'votes'      : sqrt(vote_value^2) = |vote_value|（sensitivity_analysis の方式）
+# 'sqrt_votes' : sqrt(vote_value)、負の票はスコア0（BiasSimulatorBase・simulate_unbiased_voting の方式）
+SCORE_FUNCTIONS = {
+    'votes': lambda ballots: np.abs(ballots).astype(float),
+    'sqrt_votes': lambda ballots: np.sqrt(np.clip(ballots, 0, None))
+}
+
+def allocate_qv_budget(ballots, masks=None, score='votes', total_budget=1.0):
+    """
+    S個のシナリオについて、QV方式の予算配分を行列演算で一括計算する
+
+    Parameters:
+    -----------
+    ballots : numpy.ndarray
+        投票行列。(投票者数, 候補者数) または シナリオごとの摂動済み投票行列 (S, 投票者数, 候補者数)
+    masks : numpy.ndarray, optional
+        シナリオごとの重みマスク (S, 投票者数, 候補者数)。0 の要素はその票を除外したものとして扱う。
+        ballots が2次元の場合に、同じ投票行列から S 個のシナリオを作るために使用する
+    score : str
+        投票値から配分スコアへの変換方式（SCORE_FUNCTIONS のキー）
+    total_budget : float
+        配分する予算総額（1 の場合は配分比率）
+
+    Returns:
+    --------
+    dict
+        'total_score' : 候補者ごとのスコア合計 (S, 候補者数)
+        'budget_allocation' : 予算配分 (S, 候補者数)
+        'total_votes' : 候補者ごとの投票値合計 (S, 候補者数)
+    """
+    if score not in SCORE_FUNCTIONS:
+        raise ValueError(f"Unknown score function: {score}")
+
+    ballots = np.asarray(ballots)
+    scores = SCORE_FUNCTIONS[score](ballots)
+
+    if masks is None:
+        # 摂動済み投票行列のスタック（または単一シナリオ）
+        if ballots.ndim == 2:
+            ballots = ballots[np.newaxis]
+            scores = scores[np.newaxis]
+        total_score = scores.sum(axis=1)
+        total_votes = ballots.sum(axis=1)
+    else:
+        # 共通の投票行列 × シナリオごとの重みマスク
+        masks = np.asarray(masks, dtype=float)
+        if ballots.ndim == 2:
+            total_score = np.einsum('svc,vc->sc', masks, scores)
+            total_votes = np.einsum('svc,vc->sc', masks, ballots)
+        else:
+            total_score = (masks * scores).sum(axis=1)
+            total_votes = (masks * ballots).sum(axis=1)
+
+    # スコア合計に比例した予算配分
+    totals = total_score.sum(axis=1, keepdims=True)
+    budget_allocation = np.divide(total_score, totals, out=np.zeros(total_score.shape), where=totals > 0) * total_budget
+
+    return {
+        'total_score': total_score,
+        'budget_allocation': budget_allocation,
+        'total_votes': total_votes
+    }
+
+def removed_contributions_by_key(keys, contributions, num_removed):
+    """
+    乱数キーが小さい順に票を削除したときの、候補者ごとの削除量をまとめて計算する
+
+    共通乱数法（common random numbers）用。試行ごとに1組のキーを引き、削除数の異なる
+    複数のシナリオ（バイアス率・変換率）で同じキーを共有する。削除される票の集合は
+    削除数について入れ子になるため、シナリオ間の差に試行ごとのサンプリング誤差が混ざらない
+
+    Parameters:
+    -----------
+    keys : numpy.ndarray
+        票ごとの一様乱数キー (試行数, 票数)
+    contributions : numpy.ndarray
+        各票の候補者ごとの寄与 (票数, 候補者数)
+    num_removed : numpy.ndarray
+        削除数。シナリオごと (シナリオ数,) または試行×シナリオごと (試行数, シナリオ数)
+
+    Returns:
+    --------
+    numpy.ndarray
+        候補者ごとの削除量 (試行数, シナリオ数, 候補者数)
+    """
+    keys = np.asarray(keys)
+    order = keys.argsort(axis=1)
+
+    # キー順に並べた寄与の累積和（先頭に0を付けて「k個削除」を添字kで引けるようにする）
+    cumulative = np.cumsum(np.asarray(contributions, dtype=float)[order], axis=1)
+    cumulative = np.concatenate([np.zeros((len(keys), 1, cumulative.shape[2])), cumulative], axis=1)
+
+    num_removed = np.broadcast_to(np.asarray(num_removed, dtype=int), (len(keys), np.shape(num_removed)[-1]))
+    return np.take_along_axis(cumulative, num_removed[:, :, np.newaxis], axis=1)
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+QV（二次投票）の整数最適投票の厳密ソルバー
+
+投票者の選好 u から、予算制約 Σv_i^2 <= クレジット の下で効用 Σu_i v_i を最大化する
+整数投票ベクトル v（0 <= v_i <= 最大票数）を求める。
+丸めや貪欲法による近似と異なり、予算を超過したり、増やせる票を残したりする解は返さない
+"""
+
+from functools import lru_cache
+import numpy as np
+
+DEFAULT_CREDITS = 99  # 1人あたりのクレジット
+DEFAULT_MAX_VOTES = 9  # 1候補あたりの最大票数
+SOLVER_CHUNK_SIZE = 100000  # 一度に処理する投票者数
+
+def vote_cost_table(credits=DEFAULT_CREDITS, max_votes=DEFAULT_MAX_VOTES):
+    """
+    予算内で選べる票数とそのコストの表
+
+    Returns:
+    --------
+    votes : numpy.ndarray
+        選べる票数 0, 1, ..., min(max_votes, floor(sqrt(credits)))
+    costs : numpy.ndarray
+        各票数のコスト（票数の2乗）
+    """
+    votes = np.arange(min(max_votes, int(np.sqrt(credits))) + 1)
+    return votes, votes ** 2
+
+@lru_cache(maxsize=None)
+def candidate_ballots(n_projects, credits=DEFAULT_CREDITS, max_votes=DEFAULT_MAX_VOTES):
+    """
+    最適解の候補となる投票ベクトルの表（引数ごとにメモ化）
+
+    選好を降順に並べると、最適な票数も降順に並べたものが最適解に含まれ（並べ替え不等式）、
+    非負の選好ではどの候補にも1票も追加できない「極大」なベクトルが最適解に含まれる。
+    そのため、降順かつ極大な投票ベクトルだけを候補にすればよい
+    （7候補・99クレジット・最大9票では65通り）
+
+    Returns:
+    --------
+    numpy.ndarray
+        候補の投票ベクトル (候補数, n_projects)。総票数の少ない順
+    """
+    votes, costs = vote_cost_table(credits, max_votes)
+    max_vote = votes[-1]
+
+    # 降順の投票ベクトルを列挙
+    ballots = []
+
+    def extend(prefix, remaining, cap):
+        if len(prefix) == n_projects:
+            ballots.append(prefix)
+            return
+        for v in range(min(cap, int(np.sqrt(remaining))), -1, -1):
+            extend(prefix + [v], remaining - v * v, v)
+
+    extend([], credits, max_vote)
+    ballots = np.array(ballots, dtype=int).reshape(-1, n_projects)
+
+    # どの候補にも1票を追加できない（極大な）ベクトルだけを残す
+    used = (ballots ** 2).sum(axis=1, keepdims=True)
+    can_add = (ballots < max_vote) & (used + 2 * ballots + 1 <= credits)
+    ballots = ballots[~can_add.any(axis=1)]
+
+    return ballots[np.argsort(ballots.sum(axis=1), kind='stable')]
+
+def solve_optimal_ballots(preferences, credits=DEFAULT_CREDITS, max_votes=DEFAULT_MAX_VOTES,
+                          chunk_size=SOLVER_CHUNK_SIZE):
+    """
+    投票者ごとの整数最適投票を一括して求める
+
+    選好を降順に並べ、候補の投票ベクトル表との行列積で全候補の効用を計算して最大のものを選ぶ。
+    選好が0以下の候補には投票しない
+
+    Parameters:
+    -----------
+    preferences : numpy.ndarray
+        選好の強さ (投票者数, 候補者数)
+    credits : int
+        1人あたりのクレジット
+    max_votes : int
+        1候補あたりの最大票数
+    chunk_size : int
+        一度に処理する投票者数（メモリ使用量の上限）
+
+    Returns:
+    --------
+    numpy.ndarray
+        最適な票数 (投票者数, 候補者数)
+    """
+    preferences = np.atleast_2d(np.asarray(preferences, dtype=float))
+    n_voters, n_projects = preferences.shape
+    table = candidate_ballots(n_projects, credits, max_votes)
+
+    ballots = np.zeros((n_voters, n_projects), dtype=int)
+    for start in range(0, n_voters, chunk_size):
+        chunk = preferences[start:start + chunk_size]
+
+        # 選好を降順に並べて、全候補の効用を一度に比較
+        order = np.argsort(-chunk, axis=1, kind='stable')
+        sorted_preferences = np.clip(np.take_along_axis(chunk, order, axis=1), 0, None)
+        best = table[(sorted_preferences @ table.T).argmax(axis=1)]
+
+        # 元の候補者の並びに戻す
+        np.put_along_axis(ballots[start:start + chunk_size], order, best, axis=1)
+
+    # 選好が0以下の候補への票は効用を増やさないため0票にする
+    ballots[preferences <= 0] = 0
+
+    return ballots
+
+def solve_ballots_dp(preferences, credits=DEFAULT_CREDITS, max_votes=DEFAULT_MAX_VOTES):
+    """
+    投票者ごとの整数最適投票をクレジットについての動的計画法で求める（検証用の参照実装）
+
+    dp[c] を「これまでの候補者にクレジット c 以下を使ったときの最大効用」として
+    候補者ごとに票数の選択肢を比較する。solve_optimal_ballots() と効用が一致することの確認に使う
+    """
+    preferences = np.atleast_2d(np.asarray(preferences, dtype=float))
+    n_voters, n_projects = preferences.shape
+    votes, costs = vote_cost_table(credits, max_votes)
+
+    dp = np.zeros((n_voters, credits + 1))
+    choices = np.zeros((n_projects, n_voters, credits + 1), dtype=np.int8)
+
+    for j in range(n_projects):
+        # 候補者 j に v 票を投じる場合: dp[c - v^2] + u_j * v（真に大きい場合のみ更新）
+        best = dp.copy()
+        for v, cost in zip(votes[1:], costs[1:]):
+            candidate = dp[:, :credits + 1 - cost] + preferences[:, j:j + 1] * v
+            improved = candidate > best[:, cost:]
+            best[:, cost:][improved] = candidate[improved]
+            choices[j, :, cost:][improved] = v
+        dp = best
+
+    # クレジットを逆にたどって票数を復元
+    ballots = np.zeros((n_voters, n_projects), dtype=int)
+    remaining = np.full(n_voters, credits)
+    rows = np.arange(n_voters)
+    for j in reversed(range(n_projects)):
+        ballots[:, j] = votes[choices[j, rows, remaining]]
+        remaining = remaining - costs[ballots[:, j]]
+
+    return ballots
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+シミュレーションで共有する乱数ストリームのユーティリティ
+
+乱数はグローバルな状態（random モジュール、np.random.seed）を使わず、
+(シード, ストリームキー) ごとに独立な numpy の Generator を作って使う。
+ストリームキーにはシナリオ番号・レプリケート（チャンク）番号などを指定する。
+同じ (シード, ストリームキー) からは実行順序や並列数によらず同じ乱数列が得られるため、
+逐次実行とプロセスプールでの並列実行の結果が一致する
+"""
+
+import hashlib
+import numpy as np
+
+DEFAULT_SEED = 42  # シードを指定しない場合の既定値（結果の再現性のため）
+
+def make_seed_sequence(seed=DEFAULT_SEED, *stream_keys):
+    """
+    シードとストリームキーから独立な SeedSequence を作る
+
+    make_seed_sequence(seed, i, j) は SeedSequence(seed).spawn(...)[i].spawn(...)[j] と同じストリームになる
+
+    Parameters:
+    -----------
+    seed : int, numpy.random.SeedSequence or None
+        元になるシード（None の場合は毎回異なる乱数）
+    *stream_keys : int
+        ストリームを識別するキー（シナリオ番号、レプリケート番号など）
+
+    Returns:
+    --------
+    numpy.random.SeedSequence
+    """
+    stream_keys = tuple(int(key) for key in stream_keys)
+    if isinstance(seed, np.random.SeedSequence):
+        return np.random.SeedSequence(seed.entropy, spawn_key=tuple(seed.spawn_key) + stream_keys,
+                                      pool_size=seed.pool_size)
+
+    return np.random.SeedSequence(seed, spawn_key=stream_keys)
+
+def make_rng(seed=DEFAULT_SEED, *stream_keys):
+    """シードとストリームキーに対応する独立な乱数生成器を作る"""
+    return np.random.default_rng(make_seed_sequence(seed, *stream_keys))
+
+def as_generator(rng=None):
+    """
+    乱数生成器・シード・SeedSequence のいずれかを受け取り、乱数生成器を返す
+    （None の場合は DEFAULT_SEED の乱数生成器）
+    """
+    if isinstance(rng, np.random.Generator):
+        return rng
+    if rng is None:
+        return make_rng(DEFAULT_SEED)
+
+    return np.random.default_rng(rng)
+
+def stream_key(name):
+    """
+    シナリオ名などの文字列から安定したストリームキーを作る
+
+    Python の hash() と異なりプロセス間で同じ値になるため、シナリオの追加・並べ替えによらず
+    同じシナリオには同じ乱数ストリームを割り当てられる
+    """
+    return int.from_bytes(hashlib.sha256(str(name).encode('utf-8')).digest()[:4], 'little')
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+データをチャンクごとに読み込みながら平均・共分散・相関を計算するストリーミング統計のユーティリティ
+
+Welford 法をチャンク単位に拡張した Chan らの更新式を使い、チャンクの統計量を順に合成する。
+全データをメモリに載せる必要がなく、別々に集計した結果（プロセスごとの部分集計など）も
+merge() で合成できる。大きな平均値からの差を直接累積するため、二乗和から求める方法より数値的に安定
+"""
+
+import numpy as np
+
+class StreamingCovariance:
+    """
+    列ごとの平均と列間の共分散をチャンク単位で更新する集計器
+
+    使用例:
+        accumulator = StreamingCovariance()
+        for chunk in chunks:
+            accumulator.update(chunk)
+        correlation = accumulator.correlation()
+    """
+
+    def __init__(self, n_features=None):
+        self.count = 0
+        self.mean = None if n_features is None else np.zeros(n_features)
+        self.comoment = None if n_features is None else np.zeros((n_features, n_features))
+
+    def update(self, chunk):
+        """チャンク (行数, 列数) の統計量を合成する"""
+        chunk = np.asarray(chunk, dtype=float)
+        if chunk.ndim == 1:
+            chunk = chunk[None, :]
+        if len(chunk) == 0:
+            return self
+
+        chunk_mean = chunk.mean(axis=0)
+        centered = chunk - chunk_mean
+        return self._combine(len(chunk), chunk_mean, centered.T @ centered)
+
+    def merge(self, other):
+        """別の集計器の統計量を合成する"""
+        if other.count == 0:
+            return self
+        return self._combine(other.count, other.mean, other.comoment)
+
+    def _combine(self, count, mean, comoment):
+        if self.count == 0:
+            self.count = count
+            self.mean = np.array(mean, dtype=float)
+            self.comoment = np.array(comoment, dtype=float)
+            return self
+
+        total = self.count + count
+        delta = mean - self.mean
+        self.comoment = self.comoment + comoment + np.outer(delta, delta) * (self.count * count / total)
+        self.mean = self.mean + delta * (count / total)
+        self.count = total
+        return self
+
+    def _check_features(self):
+        # 列数が未定（n_features を指定せず、まだデータを合成していない）の場合は統計量を作れない
+        if self.comoment is None:
+            raise ValueError("データが1件も合成されていません（空のチャンク列の場合は n_features を指定してください）")
+
+    def covariance(self, ddof=1):
+        """共分散行列（ddof=1 で不偏共分散。データ数が足りない場合は NaN）"""
+        self._check_features()
+        if self.count - ddof <= 0:
+            return np.full_like(self.comoment, np.nan)
+        return self.comoment / (self.count - ddof)
+
+    def std(self, ddof=1):
+        """列ごとの標準偏差"""
+        return np.sqrt(np.diag(self.covariance(ddof)))
+
+    def correlation(self):
+        """相関行列（分散が0の列、データがない場合は NaN）"""
+        self._check_features()
+        std = np.sqrt(np.diag(self.comoment))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.comoment / np.outer(std, std)
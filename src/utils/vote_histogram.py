@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+候補者×投票値の度数表（投票値ヒストグラム）を一度だけ集計し、投票値の統計量を度数から計算するユーティリティ
+
+平均・中央値・最頻値・標準偏差・0票の数・投票値の分布などはすべて候補者ごとの投票値の度数で決まる。
+投票データを np.bincount で一度走査して (候補者数, 投票値の数) の度数表を作れば、
+それぞれの統計量は投票者数によらず O(候補者数×投票値の数) で正確に求められる。
+セグメント（投票者のグループ）を指定すると (セグメント数, 候補者数, 投票値の数) の度数表になり、
+統計量はセグメント×候補者ごとに計算される
+"""
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+# ルートディレクトリへのパスを取得
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.append(ROOT_DIR)
+
+from src.utils.ballot_matrix import get_candidate_columns
+
+# 度数表に含める投票値の既定の範囲（QVの最大9票、負の投票を含む）
+MIN_VOTE_VALUE = -9
+MAX_VOTE_VALUE = 9
+
+class VoteHistogram:
+    """
+    候補者ごとの投票値の度数表
+
+    counts[..., c, k] は候補者 c に投票値 values[k] を投じた投票の数。
+    統計量のメソッドは最後の軸（投票値）について集計し、先頭の軸（セグメント・候補者）の形を保つ
+
+    使用例:
+        histogram = VoteHistogram.from_votes(votes_df)
+        positive = histogram.select(min_value=1)
+        mean, median = positive.mean(), positive.median()
+    """
+
+    def __init__(self, values, counts):
+        self.values = np.asarray(values, dtype=int)
+        self.counts = np.asarray(counts, dtype=np.int64)
+
+    @classmethod
+    def from_pairs(cls, candidate_ids, vote_values, num_candidates=None, segments=None, num_segments=None,
+                   min_value=MIN_VOTE_VALUE, max_value=MAX_VOTE_VALUE):
+        """
+        (候補者ID, 投票値) の組の列から度数表を集計する（np.bincount による1回の走査）
+
+        Parameters:
+        -----------
+        candidate_ids : numpy.ndarray
+            各投票の候補者ID 0, 1, ...
+        vote_values : numpy.ndarray
+            各投票の投票値（NaN は投票なしとして数えない）
+        num_candidates : int, optional
+            候補者数。指定しない場合は candidate_ids の最大値から決定
+        segments : numpy.ndarray, optional
+            各投票のセグメント番号 0, 1, ...（pd.factorize などで作る）
+        num_segments : int, optional
+            セグメント数。指定しない場合は segments の最大値から決定
+        min_value, max_value : int
+            度数表に含める投票値の範囲
+
+        Returns:
+        --------
+        VoteHistogram
+            counts の形状は (候補者数, 投票値の数)、segments を指定した場合は
+            (セグメント数, 候補者数, 投票値の数)
+        """
+        candidate_ids = np.asarray(candidate_ids, dtype=int)
+        vote_values = np.asarray(vote_values, dtype=float)
+        if num_candidates is None:
+            num_candidates = int(candidate_ids.max()) + 1 if len(candidate_ids) > 0 else 0
+        values = np.arange(min_value, max_value + 1)
+        num_values = len(values)
+
+        present = ~np.isnan(vote_values)
+        vote_values = vote_values[present].astype(int)
+        if np.any((vote_values < min_value) | (vote_values > max_value)):
+            raise ValueError(f"投票値が範囲 [{min_value}, {max_value}] の外にあります")
+
+        # (セグメント, 候補者, 投票値) を1つの通し番号にして一度に数える
+        index = candidate_ids[present] * num_values + (vote_values - min_value)
+        shape = (num_candidates, num_values)
+        if segments is not None:
+            segments = np.asarray(segments, dtype=int)
+            if num_segments is None:
+                num_segments = int(segments.max()) + 1 if len(segments) > 0 else 0
+            index = segments[present] * (num_candidates * num_values) + index
+            shape = (num_segments,) + shape
+
+        counts = np.bincount(index, minlength=int(np.prod(shape))).reshape(shape)
+        return cls(values, counts)
+
+    @classmethod
+    def from_ballots(cls, ballots, segments=None, **kwargs):
+        """
+        投票者×候補者の投票行列から度数表を集計する
+
+        segments は各投票者（行）のセグメント番号。その他の引数は from_pairs() と同じ
+        """
+        ballots = np.asarray(ballots, dtype=float)
+        num_voters, num_candidates = ballots.shape
+        if segments is not None:
+            segments = np.repeat(np.asarray(segments, dtype=int), num_candidates)
+        return cls.from_pairs(np.tile(np.arange(num_candidates), num_voters), ballots.ravel(),
+                              num_candidates=num_candidates, segments=segments, **kwargs)
+
+    @classmethod
+    def from_votes(cls, votes_df, num_candidates=None, segment_column=None, **kwargs):
+        """
+        横形式の投票データ（candidate_i 列を持つ）から度数表を集計する
+
+        segment_column を指定すると、その列の値ごとのセグメントで集計する
+        （セグメントのラベルは戻り値の segment_labels 属性）
+        """
+        if num_candidates is None:
+            num_candidates = sum(1 for col in votes_df.columns if col.startswith('candidate_'))
+        ballots = votes_df.reindex(columns=get_candidate_columns(num_candidates)).to_numpy(dtype=float)
+
+        if segment_column is None:
+            return cls.from_ballots(ballots, **kwargs)
+
+        codes, labels = pd.factorize(votes_df[segment_column], sort=True)
+        histogram = cls.from_ballots(ballots, segments=codes, num_segments=len(labels), **kwargs)
+        histogram.segment_labels = labels
+        return histogram
+
+    @classmethod
+    def from_long(cls, votes_long_df, num_candidates=None, segment_column=None, **kwargs):
+        """
+        長形式の投票データ（candidate_id, vote_value 列を持つ）から度数表を集計する
+
+        segment_column の扱いは from_votes() と同じ
+        """
+        candidate_ids = votes_long_df['candidate_id'].to_numpy()
+        vote_values = votes_long_df['vote_value'].to_numpy(dtype=float)
+
+        if segment_column is None:
+            return cls.from_pairs(candidate_ids, vote_values, num_candidates, **kwargs)
+
+        codes, labels = pd.factorize(votes_long_df[segment_column], sort=True)
+        histogram = cls.from_pairs(candidate_ids, vote_values, num_candidates, segments=codes,
+                                   num_segments=len(labels), **kwargs)
+        histogram.segment_labels = labels
+        return histogram
+
+    def select(self, min_value=None, max_value=None):
+        """指定した範囲の投票値だけを残した度数表（例: select(min_value=1) で正の票のみ）"""
+        keep = np.ones(len(self.values), dtype=bool)
+        if min_value is not None:
+            keep &= self.values >= min_value
+        if max_value is not None:
+            keep &= self.values <= max_value
+        selected = VoteHistogram(self.values[keep], self.counts[..., keep])
+        if hasattr(self, 'segment_labels'):
+            selected.segment_labels = self.segment_labels
+        return selected
+
+    def overall(self):
+        """候補者をまとめた投票値の度数 (..., 投票値の数)"""
+        return self.counts.sum(axis=-2)
+
+    def value_counts(self):
+        """全候補者の投票値の度数（度数が0の投票値を除く、value_counts().sort_index() と同じ形式）"""
+        totals = self.counts.reshape(-1, self.counts.shape[-2], len(self.values)).sum(axis=(0, 1))
+        nonzero = totals > 0
+        return pd.Series(totals[nonzero], index=pd.Index(self.values[nonzero]), name='count')
+
+    def count_of(self, value):
+        """投票値 value の度数"""
+        matches = np.nonzero(self.values == value)[0]
+        if len(matches) == 0:
+            return np.zeros(self.counts.shape[:-1], dtype=np.int64)
+        return self.counts[..., matches[0]]
+
+    def count(self):
+        """投票数"""
+        return self.counts.sum(axis=-1)
+
+    def total(self):
+        """投票値の合計"""
+        return self.counts @ self.values
+
+    def mean(self):
+        """平均（投票がない場合は NaN）"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.total() / self.count()
+
+    def std(self, ddof=0):
+        """標準偏差（ddof=0 は np.std、ddof=1 は pandas の std と同じ定義）"""
+        mean = self.mean()
+        deviation = (self.values - mean[..., None]) ** 2
+        with np.errstate(invalid='ignore', divide='ignore'):
+            variance = (self.counts * deviation).sum(axis=-1) / (self.count() - ddof)
+        return np.sqrt(np.where(self.count() - ddof > 0, variance, np.nan))
+
+    def _value_at_rank(self, rank):
+        """小さい方から rank 番目（0始まり）の投票値"""
+        cumulative = np.cumsum(self.counts, axis=-1)
+        position = (cumulative <= rank[..., None]).sum(axis=-1)
+        return self.values[np.minimum(position, len(self.values) - 1)]
+
+    def median(self):
+        """中央値（np.median と同じく、偶数個の場合は中央の2値の平均。投票がない場合は NaN）"""
+        n = self.count()
+        lower = self._value_at_rank((n - 1) // 2)
+        upper = self._value_at_rank(n // 2)
+        return np.where(n > 0, (lower + upper) / 2, np.nan)
+
+    def mode(self):
+        """最頻値（同数の場合は小さい方、scipy.stats.mode と同じ。投票がない場合は NaN）"""
+        return np.where(self.count() > 0, self.values[self.counts.argmax(axis=-1)], np.nan)
+
+    def min(self):
+        """最小値（投票がない場合は NaN）"""
+        observed = self.counts > 0
+        return np.where(observed.any(axis=-1), self.values[observed.argmax(axis=-1)], np.nan)
+
+    def max(self):
+        """最大値（投票がない場合は NaN）"""
+        observed = self.counts[..., ::-1] > 0
+        return np.where(observed.any(axis=-1), self.values[::-1][observed.argmax(axis=-1)], np.nan)
+
+    def describe(self, ddof=1):
+        """
+        候補者ごとの基本統計量の表（groupby(...).agg(['count', 'mean', 'std', 'min', 'max']) に相当）
+
+        セグメントなしの度数表でのみ使用でき、インデックスは候補者ID
+        """
+        if self.counts.ndim != 2:
+            raise ValueError("describe() はセグメントなしの度数表でのみ使用できます")
+        stats = pd.DataFrame({
+            'count': self.count(),
+            'mean': self.mean(),
+            'std': self.std(ddof),
+            'min': self.min(),
+            'max': self.max()
+        }, index=pd.Index(np.arange(self.counts.shape[0]), name='candidate_id'))
+        # 投票のない候補者は含めない（groupby と同じ）
+        stats = stats[stats['count'] > 0]
+        return stats.astype({'min': int, 'max': int})